@@ -0,0 +1,153 @@
+"""
+bench_forecast_memory.py
+
+Allocation comparison: raw lists + per-hour dicts vs. columnar
+HourlyForecast, analysed by the NumPy engine or by the scalar engine
+over the columns (what compute_plan runs for the threshold model).
+
+Measures, with tracemalloc,
+  1. memory held by one cached 16-day forecast window
+  2. memory allocated per planning request (one date) through
+     forecast slicing, risk timeline and decision, averaged over
+     REQUESTS requests whose results are kept alive (as the plan
+     cache does; a single request would mostly reuse freed objects)
+  3. wall time per request, for context
+
+Per request, the columnar pipelines allocate about as much as the
+dict pipeline: results reference shared floats (missing_as_none)
+just as dict results reference the raw lists. The saving is in the
+cached window and in time.
+
+Run from the repository root:
+    python benchmarks/bench_forecast_memory.py
+"""
+
+import os
+import sys
+import timeit
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.synthetic import synthetic_open_meteo_hourly
+from hourly_forecast import HourlyForecast
+from risk_engine import (
+    generate_risk_timeline,
+    generate_risk_timeline_from_columns,
+    derive_planning_decision
+)
+from risk_engine_vectorized import (
+    generate_risk_timeline_columnar,
+    derive_planning_decision_columnar
+)
+
+
+DATE = "2026-05-03"
+REQUESTS = 200
+
+
+def _measure(fn):
+    """
+    Returns (bytes still held by the result, peak bytes allocated).
+    """
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    result = fn()
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, current, peak
+
+
+def dict_request(hourly: dict) -> tuple:
+    # Previous flow: raw Open-Meteo lists cached, normalized into
+    # per-hour dicts for the requested date on every request
+    forecast = [
+        {
+            "time": hourly["time"][i],
+            "temperature": hourly["temperature_2m"][i],
+            "humidity": hourly["relativehumidity_2m"][i],
+            "wind_speed": hourly["windspeed_10m"][i]
+        }
+        for i in range(len(hourly["time"]))
+        if hourly["time"][i].startswith(DATE)
+    ]
+    result = generate_risk_timeline(forecast)
+    decision = derive_planning_decision(result["risk_timeline"], "school")
+    return result, decision
+
+
+def columnar_request(window: HourlyForecast) -> tuple:
+    forecast = window.for_date(DATE)
+    result = generate_risk_timeline_columnar(
+        forecast.times,
+        forecast.temperature,
+        forecast.humidity
+    )
+    decision = derive_planning_decision_columnar(
+        forecast.times,
+        forecast.temperature,
+        "school"
+    )
+    return result, decision
+
+
+def scalar_columns_request(window: HourlyForecast) -> tuple:
+    forecast = window.for_date(DATE)
+    result = generate_risk_timeline_from_columns(
+        forecast.times,
+        forecast.temperature,
+        forecast.humidity
+    )
+    decision = derive_planning_decision(result["risk_timeline"], "school")
+    return result, decision
+
+
+def main():
+    # Warm up imports/caches so they don't count towards the first run
+    hourly = synthetic_open_meteo_hourly()
+    columnar_request(HourlyForecast.from_open_meteo(hourly))
+    scalar_columns_request(HourlyForecast.from_open_meteo(hourly))
+
+    dict_window, dict_held, _ = _measure(synthetic_open_meteo_hourly)
+    col_window, col_held, _ = _measure(
+        lambda: HourlyForecast.from_open_meteo(synthetic_open_meteo_hourly())
+    )
+
+    pipelines = [
+        ("dict pipeline", dict_request, dict_window, dict_held),
+        ("numpy", columnar_request, col_window, col_held),
+        ("scalar cols", scalar_columns_request, col_window, col_held)
+    ]
+
+    rows = {"window": [], "request": [], "time": []}
+    expected = None
+
+    for _, request, window, held in pipelines:
+        results, _, peak = _measure(lambda: [request(window) for _ in range(REQUESTS)])
+
+        expected = expected or results
+        assert results == expected, "engines disagree"
+
+        rows["window"].append(held)
+        rows["request"].append(peak // REQUESTS)
+        rows["time"].append(
+            timeit.timeit(lambda: request(window), number=REQUESTS) / REQUESTS * 1e6
+        )
+
+    labels = {
+        "window": "cached 16-day window (bytes)",
+        "request": "per request, peak alloc (bytes)",
+        "time": "per request, time (us)"
+    }
+
+    print(f"{'':34}" + "".join(f"{name:>15}" for name, *_ in pipelines))
+    for row, values in rows.items():
+        cells = "".join(
+            f"{value:>15.1f}" if row == "time" else f"{value:>15,}"
+            for value in values
+        )
+        print(f"{labels[row]:34}{cells}")
+
+
+if __name__ == "__main__":
+    main()
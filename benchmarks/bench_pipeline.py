@@ -0,0 +1,134 @@
+"""
+bench_pipeline.py
+
+Micro-benchmarks for each CPU stage of the planning pipeline:
+risk timeline, planning decision, intent detection, explanation and
+PDF rendering, on a realistic input (one 24-hour day) and a large one
+(a 16-day forecast window, a year of hours, or many activity texts).
+
+Run from the repository root:
+    python benchmarks/bench_pipeline.py [--baseline results/xxx.json] [--no-save]
+"""
+
+import argparse
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.results import compare_results, load_results, save_results
+from benchmarks.synthetic import synthetic_open_meteo_hourly
+from hourly_forecast import HourlyForecast
+from risk_engine import generate_risk_timeline, derive_planning_decision
+from risk_engine_vectorized import (
+    generate_risk_timeline_columnar,
+    derive_planning_decision_columnar
+)
+from nlp.intent_detector import detect_intent
+import llm_client
+from llm_client import generate_planning_explanation
+
+
+REPEATS = 5
+
+ACTIVITIES = (
+    "School picnic with students in the afternoon",
+    "Construction site concrete pouring shift",
+    "Just going out for a long drive",
+    "Outdoor wedding reception in the garden",
+    "Morning football practice for the college team",
+    "Road repair crew working near the highway",
+)
+
+
+def _time_per_call(fn) -> float:
+    """
+    Best-of-REPEATS microseconds per call, auto-scaling the loop count.
+    """
+    timer = timeit.Timer(fn)
+    number, _ = timer.autorange()
+    return min(timer.repeat(repeat=REPEATS, number=number)) / number * 1e6
+
+
+def _cases() -> dict:
+    window = HourlyForecast.from_open_meteo(synthetic_open_meteo_hourly(days=16))
+    year = HourlyForecast.from_open_meteo(synthetic_open_meteo_hourly(days=365))
+    day = window.for_date("2026-05-03")
+
+    inputs = {"24h": day, "16d": window, "365d": year}
+    cases = {}
+
+    for label, forecast in inputs.items():
+        dicts = forecast.to_dicts()
+        timeline = generate_risk_timeline(dicts)["risk_timeline"]
+
+        cases[f"risk_timeline/{label}"] = lambda dicts=dicts: generate_risk_timeline(dicts)
+        cases[f"risk_timeline_columnar/{label}"] = lambda f=forecast: generate_risk_timeline_columnar(
+            f.times, f.temperature, f.humidity
+        )
+        cases[f"planning_decision/{label}"] = lambda t=timeline: derive_planning_decision(t, "school")
+        cases[f"planning_decision_columnar/{label}"] = lambda f=forecast: derive_planning_decision_columnar(
+            f.times, f.temperature, "school"
+        )
+
+    texts = [f"{ACTIVITIES[i % len(ACTIVITIES)]} #{i}" for i in range(1000)]
+    cases["detect_intent/1"] = lambda: detect_intent(ACTIVITIES[0])
+    cases["detect_intent/1000_distinct"] = lambda: [detect_intent(t) for t in texts]
+
+    day_result = generate_risk_timeline(day.to_dicts())
+    facts = day_result["summary_facts"]
+    hour = day_result["risk_timeline"][14]
+
+    def explanation_cold():
+        llm_client._render_explanation.cache_clear()
+        return generate_planning_explanation(facts, "school", ACTIVITIES[0], hour)
+
+    cases["planning_explanation/warm"] = lambda: generate_planning_explanation(
+        facts, "school", ACTIVITIES[0], hour
+    )
+    cases["planning_explanation/cold"] = explanation_cold
+
+    try:
+        from pdf_generator import render_planning_pdf
+    except ImportError:
+        print("reportlab not installed; skipping PDF benchmark\n")
+    else:
+        explanation = generate_planning_explanation(facts, "school", ACTIVITIES[0], hour)
+        cases["planning_pdf/render"] = lambda: render_planning_pdf(
+            location="Pune, Maharashtra, India",
+            date="2026-05-03",
+            summary_facts=facts,
+            decision=derive_planning_decision(day_result["risk_timeline"], "school"),
+            explanation=explanation,
+            intent="school"
+        )
+
+    return cases
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--baseline", help="previous results file to compare against")
+    parser.add_argument("--no-save", action="store_true", help="don't write a results file")
+    args = parser.parse_args()
+
+    cases = _cases()
+    results = {}
+
+    print(f"{'case':36}{'us / call':>12}")
+    for name, fn in cases.items():
+        us = _time_per_call(fn)
+        results[name] = {"us_per_call": round(us, 3)}
+        print(f"{name:36}{us:>12.2f}")
+
+    if not args.no_save:
+        print(f"\nsaved {save_results('pipeline', results)}")
+
+    if args.baseline:
+        print("\nchange vs baseline:")
+        print("\n".join(compare_results(load_results(args.baseline), results)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""
+bench_risk_engines.py
+
+Per-hour classification cost of each risk engine over large
+synthetic timelines:
+  - scalar threshold chain (risk_engine.classify_heat_risk)
+  - vectorized threshold chain (production default)
+  - heat index / WBGT computed directly from their formulas
+  - heat index / WBGT through the precomputed lookup tables
+
+Timed over the whole timeline and per 24-hour planning request
+(where fixed per-call overhead dominates). Also reports how the
+engines distribute the same hours over risk levels.
+
+Run from the repository root:
+    python benchmarks/bench_risk_engines.py [days]
+"""
+
+import os
+import sys
+import timeit
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.synthetic import synthetic_open_meteo_hourly
+from heat_stress import (
+    HEAT_INDEX_MODERATE_C,
+    HEAT_INDEX_HIGH_C,
+    HEAT_INDEX_EXTREME_C,
+    WBGT_MODERATE_C,
+    WBGT_HIGH_C,
+    WBGT_EXTREME_C,
+    heat_index_c,
+    heat_index_table,
+    wbgt_estimate_c,
+    wbgt_table
+)
+from risk_engine import RISK_LEVELS, classify_heat_risk
+from risk_engine_vectorized import RISK_ENGINES, classify_heat_risk_array, risk_codes
+
+
+DAYS = 4000        # 96,000 hours
+REPEATS = 5
+DAY_CALLS = 2000
+
+
+def _bounded(values, moderate, high, extreme):
+    codes = (values >= moderate).astype(np.int8)
+    codes += values >= high
+    codes += values >= extreme
+    return codes
+
+
+def _best_ns_per_hour(fn, hours: int) -> float:
+    return min(timeit.repeat(fn, number=1, repeat=REPEATS)) / hours * 1e9
+
+
+def _us_per_day(fn, temps, hums) -> float:
+    return min(timeit.repeat(lambda: fn(temps, hums), number=DAY_CALLS, repeat=REPEATS)) / DAY_CALLS * 1e6
+
+
+def main():
+    days = int(sys.argv[1]) if len(sys.argv) > 1 else DAYS
+
+    hourly = synthetic_open_meteo_hourly(days=days)
+    temps_list = hourly["temperature_2m"]
+    hums_list = hourly["relativehumidity_2m"]
+    temps = np.asarray(temps_list, dtype=np.float64)
+    hums = np.asarray(hums_list, dtype=np.float64)
+    hours = len(temps_list)
+
+    # (name, fn(temperatures, humidities)); the scalar case takes lists
+    cases = [
+        ("threshold, scalar", lambda ts, hs: [classify_heat_risk(t, h) for t, h in zip(ts, hs)]),
+        ("threshold, vectorized", lambda ts, hs: classify_heat_risk_array(ts)),
+        ("heat index, formula", lambda ts, hs: _bounded(
+            heat_index_c(ts, hs),
+            HEAT_INDEX_MODERATE_C, HEAT_INDEX_HIGH_C, HEAT_INDEX_EXTREME_C
+        )),
+        ("heat index, lookup table", heat_index_table().classify),
+        ("WBGT, formula", lambda ts, hs: _bounded(
+            wbgt_estimate_c(ts, hs),
+            WBGT_MODERATE_C, WBGT_HIGH_C, WBGT_EXTREME_C
+        )),
+        ("WBGT, lookup table", wbgt_table().classify),
+    ]
+
+    # Tables must agree with the formulas on Open-Meteo's 0.1 °C grid
+    formula_hi, table_hi, formula_wbgt, table_wbgt = (
+        fn(temps, hums) for _, fn in cases[2:]
+    )
+    assert (formula_hi == table_hi).all(), "heat index table disagrees"
+    assert (formula_wbgt == table_wbgt).all(), "WBGT table disagrees"
+
+    print(f"{hours:,} hours\n")
+    print(f"{'engine':28}{'ns / hour':>12}{'us / 24 h':>12}")
+    for i, (name, fn) in enumerate(cases):
+        ts, hs = (temps_list, hums_list) if i == 0 else (temps, hums)
+        per_hour = _best_ns_per_hour(lambda: fn(ts, hs), hours)
+        per_day = _us_per_day(fn, ts[:24], hs[:24])
+        print(f"{name:28}{per_hour:>12.1f}{per_day:>12.1f}")
+
+    print(f"\n{'hours per level':28}" + "".join(f"{level:>10}" for level in RISK_LEVELS))
+    for engine in RISK_ENGINES:
+        counts = np.bincount(risk_codes(temps, hums, engine), minlength=len(RISK_LEVELS))
+        print(f"{engine:28}" + "".join(f"{count:>10,}" for count in counts.tolist()))
+
+
+if __name__ == "__main__":
+    main()
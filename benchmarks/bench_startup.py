@@ -0,0 +1,190 @@
+"""
+bench_startup.py
+
+Cold-start cost of the service:
+  1. import time of main (fresh interpreter), with the slowest modules
+  2. time to first response: from launching uvicorn until GET /
+     answers, then the latency of the first planning request and the
+     first PDF (against the fake upstream, so no network is needed)
+
+Each measurement is the median over --runs fresh processes.
+
+Run from the repository root:
+    python benchmarks/bench_startup.py [--runs 5] [--warmup]
+                                       [--baseline results/xxx.json] [--no-save]
+"""
+
+import argparse
+import json
+import os
+import re
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+from datetime import date as Date
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks.fake_upstream import FakeUpstream
+from benchmarks.results import compare_results, load_results, save_results
+
+
+_IMPORTTIME = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|(\s*)(\S+)")
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def measure_import() -> tuple:
+    """
+    (total ms to import main, [(cumulative ms, module), ...] top-level slowest)
+    """
+
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import main"],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        check=True
+    )
+
+    total = 0.0
+    top_level = []
+    for line in result.stderr.splitlines():
+        match = _IMPORTTIME.match(line)
+        if not match:
+            continue
+        cumulative_ms = int(match.group(2)) / 1000
+        module = match.group(4)
+        if module == "main":
+            total = cumulative_ms
+        # One space per line, plus two per nesting level: keep the
+        # modules main imports directly
+        elif len(match.group(3)) == 3:
+            top_level.append((cumulative_ms, module))
+
+    top_level.sort(reverse=True)
+    return total, top_level[:8]
+
+
+def _request(url: str, payload: dict | None = None) -> int:
+    data = None if payload is None else json.dumps(payload).encode("utf-8")
+    request = urllib.request.Request(
+        url,
+        data=data,
+        headers={"Content-Type": "application/json"}
+    )
+    try:
+        with urllib.request.urlopen(request, timeout=30) as response:
+            response.read()
+            return response.status
+    except urllib.error.HTTPError as exc:
+        return exc.code
+
+
+def measure_first_response(fake: FakeUpstream, warmup: bool) -> dict:
+    port = _free_port()
+    base = f"http://127.0.0.1:{port}"
+
+    env = dict(
+        os.environ,
+        NOMINATIM_URL=fake.nominatim_url,
+        OPEN_METEO_URL=fake.open_meteo_url,
+        GEOCODE_CACHE_PATH="",
+        WARMUP_ENABLED="1" if warmup else "0",
+        WARMUP_SNAPSHOT_PATH=""
+    )
+
+    started = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=ROOT,
+        env=env
+    )
+
+    try:
+        while True:
+            try:
+                if _request(base + "/") == 200:
+                    break
+            except (urllib.error.URLError, ConnectionError):
+                pass
+            if process.poll() is not None:
+                raise RuntimeError("uvicorn exited during startup")
+            time.sleep(0.01)
+        ready = time.perf_counter() - started
+
+        payload = {
+            "location": "Startup Bench City",
+            "date": Date.today().isoformat(),
+            "activity_description": "School sports day"
+        }
+
+        t = time.perf_counter()
+        status = _request(base + "/heatwave/planning", payload)
+        first_plan = time.perf_counter() - t
+        if status != 200:
+            raise RuntimeError(f"planning request failed: {status}")
+
+        t = time.perf_counter()
+        _request(base + "/heatwave/planning/pdf", payload)
+        first_pdf = time.perf_counter() - t
+    finally:
+        process.terminate()
+        process.wait()
+
+    return {
+        "ready_ms": ready * 1000,
+        "first_plan_ms": first_plan * 1000,
+        "first_pdf_ms": first_pdf * 1000
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--warmup", action="store_true", help="start with WARMUP_ENABLED=1")
+    parser.add_argument("--baseline", help="previous results file to compare against")
+    parser.add_argument("--no-save", action="store_true", help="don't write a results file")
+    args = parser.parse_args()
+
+    imports = [measure_import() for _ in range(args.runs)]
+    import_ms = statistics.median(total for total, _ in imports)
+
+    print(f"import main: {import_ms:.1f} ms (median of {args.runs})")
+    for cumulative_ms, module in imports[-1][1]:
+        print(f"  {module:32}{cumulative_ms:>10.1f} ms")
+
+    results = {"import/main": {"ms": round(import_ms, 2)}}
+
+    with FakeUpstream() as fake:
+        runs = [measure_first_response(fake, args.warmup) for _ in range(args.runs)]
+
+    first = {
+        metric: round(statistics.median(run[metric] for run in runs), 2)
+        for metric in runs[0]
+    }
+    results["startup/first_response"] = first
+
+    print()
+    for metric, value in first.items():
+        print(f"{metric:32}{value:>10.1f}")
+
+    if not args.no_save:
+        print(f"\nsaved {save_results('startup', results)}")
+
+    if args.baseline:
+        print("\nchange vs baseline:")
+        print("\n".join(compare_results(load_results(args.baseline), results)))
+
+
+if __name__ == "__main__":
+    main()
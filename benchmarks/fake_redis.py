@@ -0,0 +1,169 @@
+"""
+fake_redis.py
+
+Local stand-in for a Redis server, for exercising the redis cache
+backend (cache_backends.RedisBackend) without installing Redis.
+
+Speaks RESP and implements the commands the backend uses, with
+millisecond expiry: PING, AUTH, SELECT, GET, SET [EX|PX], DEL, SCAN
+[MATCH] [COUNT], DBSIZE, FLUSHDB. Single keyspace, no persistence.
+
+Serve standalone, then point the service at it:
+    python benchmarks/fake_redis.py --port 6390
+    CACHE_BACKEND=redis CACHE_REDIS_URL=redis://127.0.0.1:6390/0 uvicorn main:app --workers 4
+
+or in-process:
+    with FakeRedis() as fake:
+        fake.url
+"""
+
+import argparse
+import fnmatch
+import os
+import socketserver
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from cache_backends import _read_reply
+
+
+def _bulk(value: bytes | None) -> bytes:
+    if value is None:
+        return b"$-1\r\n"
+    return b"$%d\r\n%s\r\n" % (len(value), value)
+
+
+def _array(items: list) -> bytes:
+    return b"*%d\r\n" % len(items) + b"".join(items)
+
+
+class FakeRedis:
+    """
+    In-memory RESP server on a background thread.
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, latency: float = 0.0):
+        self.latency = latency
+
+        self._data = {}             # key -> (value, expires_at or None)
+        self._lock = threading.Lock()
+        self.commands = 0
+
+        self.server = socketserver.ThreadingTCPServer((host, port), self._handler_class())
+        self.server.daemon_threads = True
+        self.host, self.port = self.server.server_address[:2]
+        self.url = f"redis://{self.host}:{self.port}/0"
+
+        self._thread = None
+
+    # -------- Keyspace --------
+    def _live(self, key: bytes):
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        value, expires_at = entry
+        if expires_at is not None and expires_at <= time.time():
+            del self._data[key]
+            return None
+        return value
+
+    def execute(self, args: list) -> bytes:
+        """
+        Run one command; returns the encoded reply.
+        """
+
+        name = args[0].upper()
+        self.commands += 1
+
+        with self._lock:
+            if name in (b"PING", b"AUTH", b"SELECT", b"FLUSHDB"):
+                if name == b"FLUSHDB":
+                    self._data.clear()
+                return b"+PONG\r\n" if name == b"PING" else b"+OK\r\n"
+
+            if name == b"GET":
+                return _bulk(self._live(args[1]))
+
+            if name == b"SET":
+                expires_at = None
+                options = [arg.upper() for arg in args[3:]]
+                if b"PX" in options:
+                    expires_at = time.time() + int(args[3 + options.index(b"PX") + 1]) / 1000
+                elif b"EX" in options:
+                    expires_at = time.time() + int(args[3 + options.index(b"EX") + 1])
+                self._data[args[1]] = (args[2], expires_at)
+                return b"+OK\r\n"
+
+            if name == b"DEL":
+                removed = sum(self._data.pop(key, None) is not None for key in args[1:])
+                return b":%d\r\n" % removed
+
+            if name == b"DBSIZE":
+                return b":%d\r\n" % sum(self._live(key) is not None for key in list(self._data))
+
+            if name == b"SCAN":
+                # One pass over the whole keyspace; cursor is always 0
+                options = [arg.upper() for arg in args[2:]]
+                pattern = args[2 + options.index(b"MATCH") + 1] if b"MATCH" in options else b"*"
+                keys = [
+                    key for key in list(self._data)
+                    if self._live(key) is not None and fnmatch.fnmatchcase(key, pattern)
+                ]
+                return _array([_bulk(b"0"), _array([_bulk(key) for key in keys])])
+
+        return b"-ERR unknown command '%s'\r\n" % name
+
+    # -------- Server --------
+    def _handler_class(self):
+        fake = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def handle(self):
+                while True:
+                    try:
+                        args = _read_reply(self.rfile)
+                    except (ConnectionError, OSError):
+                        return
+                    if fake.latency:
+                        time.sleep(fake.latency)
+                    self.wfile.write(fake.execute(args))
+
+        return Handler
+
+    def start(self) -> "FakeRedis":
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=6390)
+    parser.add_argument("--latency", type=float, default=0.0,
+                        help="seconds added to every command")
+    args = parser.parse_args()
+
+    fake = FakeRedis(args.host, args.port, args.latency)
+    print(f"fake redis on {fake.url}")
+    try:
+        fake.server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,357 @@
+"""
+fake_upstream.py
+
+Local stand-in for Nominatim and Open-Meteo, for offline and
+deterministic performance testing.
+
+Replays fixture responses from a fixtures directory
+(benchmarks/fixtures by default):
+    <fixtures>/nominatim.json    normalized query -> Nominatim body
+    <fixtures>/open_meteo.json   "lat,lon" (grid cell) -> Open-Meteo body
+Fixture forecasts are replayed with their hours moved to start today.
+Other requests get deterministic synthetic data (any place name
+geocodes to a stable point; forecasts are a synthetic 16-day window),
+or 404 with --miss=404. With --record, misses are fetched from the
+real services and added to the fixtures.
+
+The shipped fixtures (five hot-climate cities) are synthetic: real
+coordinates in the services' response format, with generated
+forecast values, not recordings of the live APIs. Record real ones
+with --record into an empty --fixtures directory.
+
+Every response can be delayed (latency + uniform jitter), failed
+(error rate, status) or stalled past client timeouts (hang rate).
+GET /_stats returns per-endpoint request counts, so cache hits and
+request coalescing can be checked from the outside.
+
+Serve standalone, then point the service at it:
+    python benchmarks/fake_upstream.py --port 8090 --latency 0.05 --jitter 0.02
+    NOMINATIM_URL=http://127.0.0.1:8090/search \\
+    OPEN_METEO_URL=http://127.0.0.1:8090/v1/forecast uvicorn main:app
+
+or in-process:
+    with FakeUpstream(latency=0.02) as fake:
+        fake.nominatim_url, fake.open_meteo_url
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import random
+import sys
+import threading
+import time
+from datetime import date as Date, datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+from urllib.request import Request, urlopen
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.synthetic import synthetic_open_meteo_hourly
+from cache import normalize_query
+
+
+DEFAULT_FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+NOMINATIM_PATH = "/search"
+OPEN_METEO_PATH = "/v1/forecast"
+
+FIXTURE_FILES = {
+    NOMINATIM_PATH: "nominatim.json",
+    OPEN_METEO_PATH: "open_meteo.json"
+}
+
+DEFAULT_RECORD_URLS = {
+    NOMINATIM_PATH: "https://nominatim.openstreetmap.org/search",
+    OPEN_METEO_PATH: "https://api.open-meteo.com/v1/forecast"
+}
+
+
+def _stable_fraction(text: str) -> float:
+    digest = hashlib.sha256(text.encode("utf-8")).digest()
+    return int.from_bytes(digest[:4], "big") / 2 ** 32
+
+
+def _fixture_key(path: str, query: dict) -> str:
+    if path == NOMINATIM_PATH:
+        return normalize_query(query.get("q", [""])[0])
+
+    latitude = float(query.get("latitude", ["0"])[0])
+    longitude = float(query.get("longitude", ["0"])[0])
+    return f"{latitude:.4f},{longitude:.4f}"
+
+
+def _synthetic(path: str, key: str):
+    if path == NOMINATIM_PATH:
+        return [{
+            "lat": str(round(-40 + 80 * _stable_fraction(key), 4)),
+            "lon": str(round(-170 + 340 * _stable_fraction(key[::-1]), 4)),
+            "display_name": f"{key} (fake)"
+        }]
+
+    return {
+        "hourly": synthetic_open_meteo_hourly(
+            start=time.strftime("%Y-%m-%d"),
+            seed=int(_stable_fraction(key) * 1000)
+        )
+    }
+
+
+def _rebase_forecast(body: dict, start: str) -> dict:
+    """
+    Fixture Open-Meteo body with its hourly times moved so the
+    first day is `start`, keeping the fixture usable as it ages.
+    """
+
+    hourly = body.get("hourly") or {}
+    times = hourly.get("time")
+    if not times:
+        return body
+
+    offset = Date.fromisoformat(start) - Date.fromisoformat(times[0][:10])
+    if not offset:
+        return body
+
+    shifted = [
+        (datetime.fromisoformat(t) + offset).isoformat(timespec="minutes")
+        for t in times
+    ]
+    return dict(body, hourly=dict(hourly, time=shifted))
+
+
+class FakeUpstream:
+    """
+    Fake Nominatim + Open-Meteo on one local port, served from a
+    background thread (use as a context manager, or serve_forever()).
+    """
+
+    def __init__(
+        self,
+        fixtures_dir: str | None = DEFAULT_FIXTURES_DIR,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        error_rate: float = 0.0,
+        error_status: int = 503,
+        hang_rate: float = 0.0,
+        hang: float = 30.0,
+        miss: str = "synthetic",
+        record: bool = False,
+        seed: int = 0,
+        host: str = "127.0.0.1",
+        port: int = 0
+    ):
+        self.fixtures_dir = fixtures_dir
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.hang_rate = hang_rate
+        self.hang = hang
+        self.miss = miss
+        self.record = record
+
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self.fixtures = {path: self._load(path) for path in FIXTURE_FILES}
+        self._rebased = {}          # (key, start date) -> rebased forecast body
+        self.counts = {}
+
+        self.server = ThreadingHTTPServer((host, port), self._handler_class())
+        self.server.daemon_threads = True
+
+        base = f"http://{host}:{self.server.server_address[1]}"
+        self.nominatim_url = base + NOMINATIM_PATH
+        self.open_meteo_url = base + OPEN_METEO_PATH
+
+        self._thread = None
+
+    # -------- Fixtures --------
+    def _fixture_path(self, path: str) -> str | None:
+        if not self.fixtures_dir:
+            return None
+        return os.path.join(self.fixtures_dir, FIXTURE_FILES[path])
+
+    def _load(self, path: str) -> dict:
+        file_path = self._fixture_path(path)
+        if not file_path or not os.path.exists(file_path):
+            return {}
+        with open(file_path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def _save(self, path: str):
+        file_path = self._fixture_path(path)
+        if not file_path:
+            return
+        os.makedirs(self.fixtures_dir, exist_ok=True)
+        with open(file_path, "w", encoding="utf-8") as f:
+            json.dump(self.fixtures[path], f, sort_keys=True)
+
+    def _record(self, path: str, key: str, raw_query: str):
+        request = Request(
+            f"{DEFAULT_RECORD_URLS[path]}?{raw_query}",
+            headers={"User-Agent": "Heatwave-Decision-Support/1.0 (fixture recording)"}
+        )
+        with urlopen(request, timeout=30) as response:
+            body = json.load(response)
+
+        with self._lock:
+            self.fixtures[path][key] = body
+            self._save(path)
+        return body
+
+    # -------- Behaviour --------
+    def _count(self, name: str):
+        with self._lock:
+            self.counts[name] = self.counts.get(name, 0) + 1
+
+    def _draw(self) -> tuple:
+        """
+        (delay, fail, hang) for one request.
+        """
+        with self._lock:
+            delay = self.latency + self._rng.uniform(0, self.jitter)
+            fail = self._rng.random() < self.error_rate
+            hang = self._rng.random() < self.hang_rate
+        return delay, fail, hang
+
+    def respond(self, path: str, raw_query: str) -> tuple:
+        """
+        (status, body) for one upstream request.
+        """
+
+        if path not in FIXTURE_FILES:
+            return 404, {"error": "unknown endpoint"}
+
+        self._count(path)
+        delay, fail, hang = self._draw()
+
+        time.sleep(self.hang if hang else delay)
+
+        if fail:
+            self._count("injected_errors")
+            return self.error_status, {"error": "injected failure"}
+
+        key = _fixture_key(path, parse_qs(raw_query))
+        body = self.fixtures[path].get(key)
+        if body is not None:
+            self._count("fixture_hits")
+            if path == OPEN_METEO_PATH:
+                body = self._rebased_forecast(key, body)
+            return 200, body
+
+        self._count("fixture_misses")
+        if self.record:
+            return 200, self._record(path, key, raw_query)
+        if self.miss == "synthetic":
+            return 200, _synthetic(path, key)
+        return 404, {"error": "no fixture response"}
+
+    def _rebased_forecast(self, key: str, body: dict) -> dict:
+        start = time.strftime("%Y-%m-%d")
+        with self._lock:
+            rebased = self._rebased.get((key, start))
+        if rebased is None:
+            rebased = _rebase_forecast(body, start)
+            with self._lock:
+                self._rebased[(key, start)] = rebased
+        return rebased
+
+    def place_names(self) -> list:
+        """
+        Queries with a fixture Nominatim response.
+        """
+        return sorted(self.fixtures[NOMINATIM_PATH])
+
+    def stats(self) -> dict:
+        with self._lock:
+            return dict(self.counts)
+
+    def _handler_class(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, format, *args):
+                pass
+
+            def do_GET(self):
+                url = urlparse(self.path)
+                if url.path == "/_stats":
+                    status, body = 200, fake.stats()
+                else:
+                    status, body = fake.respond(url.path, url.query)
+
+                payload = json.dumps(body).encode("utf-8")
+                try:
+                    self.send_response(status)
+                    self.send_header("Content-Type", "application/json")
+                    self.send_header("Content-Length", str(len(payload)))
+                    self.end_headers()
+                    self.wfile.write(payload)
+                except (BrokenPipeError, ConnectionResetError):
+                    # Client gave up (e.g. timed out on a hang)
+                    pass
+
+        return Handler
+
+    # -------- Lifecycle --------
+    def __enter__(self):
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def serve_forever(self):
+        self.server.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8090)
+    parser.add_argument("--fixtures", default=DEFAULT_FIXTURES_DIR,
+                        help="fixtures directory ('' for none)")
+    parser.add_argument("--latency", type=float, default=0.0, help="base delay, seconds")
+    parser.add_argument("--jitter", type=float, default=0.0, help="extra uniform delay, seconds")
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--error-status", type=int, default=503)
+    parser.add_argument("--hang-rate", type=float, default=0.0)
+    parser.add_argument("--hang", type=float, default=30.0, help="seconds a hung response stalls")
+    parser.add_argument("--miss", choices=("synthetic", "404"), default="synthetic")
+    parser.add_argument("--record", action="store_true",
+                        help="fetch misses from the real services and save them as fixtures")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    if args.record and not args.fixtures:
+        parser.error("--record needs --fixtures")
+
+    fake = FakeUpstream(
+        fixtures_dir=args.fixtures,
+        latency=args.latency,
+        jitter=args.jitter,
+        error_rate=args.error_rate,
+        error_status=args.error_status,
+        hang_rate=args.hang_rate,
+        hang=args.hang,
+        miss=args.miss,
+        record=args.record,
+        seed=args.seed,
+        host=args.host,
+        port=args.port
+    )
+
+    print(f"NOMINATIM_URL={fake.nominatim_url}")
+    print(f"OPEN_METEO_URL={fake.open_meteo_url}")
+    try:
+        fake.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,259 @@
+"""
+load_test.py
+
+End-to-end load harness for POST /heatwave/planning.
+
+Starts the fake Nominatim/Open-Meteo server (fake_upstream.py) and
+the FastAPI app (uvicorn, in its own process with --workers workers),
+then sends requests from a pool of concurrent clients and reports
+latency percentiles, throughput and how many upstream calls the
+service made. Results files record these conditions; comparing
+against a baseline lists any that differ.
+The request mix draws from --locations places (the fixture places
+first, then made-up ones) x 7 dates x a few activities, so
+repeated requests exercise the caches the way real traffic does.
+
+Run from the repository root:
+    python benchmarks/load_test.py [--requests 2000] [--concurrency 32]
+                                   [--workers 1] [--locations 50]
+                                   [--upstream-latency 0.05]
+                                   [--upstream-jitter 0.02] [--upstream-error-rate 0]
+                                   [--fixtures DIR]
+                                   [--baseline results/xxx.json] [--no-save]
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import socket
+import subprocess
+import sys
+import time
+from datetime import date as Date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# The fake has no usage policy: lift the client-side rate limits,
+# and keep the geocode cache in memory so every run starts cold
+os.environ.setdefault("NOMINATIM_RATE_LIMIT", "100000")
+os.environ.setdefault("NOMINATIM_BURST", "1000")
+os.environ.setdefault("OPEN_METEO_RATE_LIMIT", "100000")
+os.environ.setdefault("OPEN_METEO_BURST", "1000")
+os.environ.setdefault("GEOCODE_CACHE_PATH", "")
+
+import httpx
+
+from benchmarks.results import (
+    compare_conditions,
+    compare_results,
+    load_conditions,
+    load_results,
+    save_results
+)
+from benchmarks.fake_upstream import DEFAULT_FIXTURES_DIR, FakeUpstream
+
+
+ACTIVITIES = (
+    "School picnic with students",
+    "Construction site shift",
+    "Going out for a drive",
+    "Community football match",
+)
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _percentile(sorted_values: list, pct: float) -> float:
+    index = min(len(sorted_values) - 1, int(round(pct / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def _start_app(fake: FakeUpstream, workers: int) -> tuple:
+    """
+    Run the app under uvicorn in a child process, so the load
+    generator and fake upstream don't share its interpreter (GIL,
+    event loop). Returns (process, base URL) once it answers.
+    """
+
+    port = _free_port()
+    env = {
+        **os.environ,
+        "NOMINATIM_URL": fake.nominatim_url,
+        "OPEN_METEO_URL": fake.open_meteo_url
+    }
+
+    process = subprocess.Popen(
+        [
+            sys.executable, "-m", "uvicorn", "main:app",
+            "--host", "127.0.0.1",
+            "--port", str(port),
+            "--workers", str(workers),
+            "--log-level", "warning",
+            "--no-access-log"
+        ],
+        cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+        env=env
+    )
+
+    base_url = f"http://127.0.0.1:{port}"
+    deadline = time.monotonic() + 60
+    while True:
+        if process.poll() is not None:
+            raise SystemExit(f"app exited with status {process.returncode} during startup")
+        try:
+            if httpx.get(base_url + "/", timeout=1).status_code == 200:
+                return process, base_url
+        except httpx.HTTPError:
+            pass
+        if time.monotonic() > deadline:
+            process.terminate()
+            raise SystemExit("app did not start within 60s")
+        time.sleep(0.1)
+
+
+def _stop_app(process: subprocess.Popen):
+    process.terminate()
+    try:
+        process.wait(timeout=15)
+    except subprocess.TimeoutExpired:
+        process.kill()
+        process.wait()
+
+
+def _payloads(args, fixture_places: list) -> list:
+    rng = random.Random(args.seed)
+    today = Date.today()
+    dates = [(today + timedelta(days=i)).isoformat() for i in range(7)]
+    locations = fixture_places[:args.locations] + [
+        f"Benchmark City {i}" for i in range(args.locations - len(fixture_places))
+    ]
+
+    return [
+        {
+            "location": rng.choice(locations),
+            "date": rng.choice(dates),
+            "time": f"{rng.randint(6, 18):02d}:00",
+            "activity_description": rng.choice(ACTIVITIES)
+        }
+        for _ in range(args.requests)
+    ]
+
+
+async def _run_load(base_url: str, payloads: list, concurrency: int) -> dict:
+    queue = list(reversed(payloads))
+    latencies = []
+    errors = 0
+
+    async def worker(client: httpx.AsyncClient):
+        nonlocal errors
+        while queue:
+            payload = queue.pop()
+            started = time.perf_counter()
+            try:
+                response = await client.post("/heatwave/planning", json=payload)
+                ok = response.status_code == 200
+            except httpx.HTTPError:
+                ok = False
+            latencies.append(time.perf_counter() - started)
+            errors += not ok
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60) as client:
+        started = time.perf_counter()
+        await asyncio.gather(*(worker(client) for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "seconds": round(elapsed, 3),
+        "rps": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(_percentile(latencies, 50) * 1000, 2),
+        "p95_ms": round(_percentile(latencies, 95) * 1000, 2),
+        "p99_ms": round(_percentile(latencies, 99) * 1000, 2),
+        "max_ms": round(latencies[-1] * 1000, 2)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--workers", type=int, default=1,
+                        help="uvicorn worker processes for the app")
+    parser.add_argument("--locations", type=int, default=50)
+    parser.add_argument("--upstream-latency", type=float, default=0.05,
+                        help="seconds added to every fake upstream response")
+    parser.add_argument("--upstream-jitter", type=float, default=0.02,
+                        help="extra uniform delay per upstream response, seconds")
+    parser.add_argument("--upstream-error-rate", type=float, default=0.0)
+    parser.add_argument("--fixtures", default=DEFAULT_FIXTURES_DIR,
+                        help="upstream fixtures directory ('' for none)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--baseline", help="previous results file to compare against")
+    parser.add_argument("--no-save", action="store_true", help="don't write a results file")
+    args = parser.parse_args()
+
+    fake = FakeUpstream(
+        fixtures_dir=args.fixtures,
+        latency=args.upstream_latency,
+        jitter=args.upstream_jitter,
+        error_rate=args.upstream_error_rate,
+        seed=args.seed
+    )
+
+    conditions = {
+        "app": "uvicorn subprocess",
+        "workers": args.workers,
+        "requests": args.requests,
+        "concurrency": args.concurrency,
+        "locations": args.locations,
+        "upstream_latency": args.upstream_latency,
+        "upstream_jitter": args.upstream_jitter,
+        "upstream_error_rate": args.upstream_error_rate,
+        "fixtures": os.path.basename(os.path.normpath(args.fixtures)) if args.fixtures else None,
+        "seed": args.seed,
+        "cache_backend": os.getenv("CACHE_BACKEND", "memory")
+    }
+
+    with fake:
+        process, base_url = _start_app(fake, args.workers)
+        try:
+            # Cold: caches empty; warm: same mix again, served from caches
+            results = {}
+            for run in ("planning/cold", "planning/warm"):
+                before = fake.stats()
+                results[run] = asyncio.run(_run_load(base_url, _payloads(args, fake.place_names()), args.concurrency))
+                after = fake.stats()
+                results[run]["upstream_calls"] = sum(
+                    after.get(path, 0) - before.get(path, 0)
+                    for path in ("/search", "/v1/forecast")
+                )
+        finally:
+            _stop_app(process)
+
+    print(f"{'run':16}" + "".join(f"{metric:>16}" for metric in results["planning/cold"]))
+    for name, metrics in results.items():
+        print(f"{name:16}" + "".join(f"{value:>16}" for value in metrics.values()))
+
+    if not args.no_save:
+        print(f"\nsaved {save_results('load', results, conditions=conditions)}")
+
+    if args.baseline:
+        differences = compare_conditions(load_conditions(args.baseline), conditions)
+        if differences:
+            print("\nbaseline ran under different conditions:")
+            print("\n".join(differences))
+
+        print("\nchange vs baseline:")
+        print("\n".join(compare_results(load_results(args.baseline), results)))
+
+
+if __name__ == "__main__":
+    main()
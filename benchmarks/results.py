@@ -0,0 +1,96 @@
+"""
+results.py
+
+Saving and comparing benchmark results.
+
+Each run is written as JSON to benchmarks/results/<suite>-<timestamp>.json,
+with the conditions it ran under; passing a previous file as the
+baseline prints the relative change of every metric that exists in
+both runs, and which conditions differ.
+"""
+
+import json
+import os
+import platform
+import sys
+import time
+
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+
+
+def save_results(
+    suite: str,
+    results: dict,
+    path: str | None = None,
+    conditions: dict | None = None
+) -> str:
+    """
+    Write results (name -> {metric: value}) with run metadata and the
+    run's conditions (options, process layout, ...). Returns the file
+    path.
+    """
+
+    if path is None:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        stamp = time.strftime("%Y%m%d-%H%M%S")
+        path = os.path.join(RESULTS_DIR, f"{suite}-{stamp}.json")
+
+    payload = {
+        "suite": suite,
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "conditions": conditions or {},
+        "results": results
+    }
+
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(payload, f, indent=2, sort_keys=True)
+
+    return path
+
+
+def load_results(path: str) -> dict:
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)["results"]
+
+
+def load_conditions(path: str) -> dict:
+    """
+    Conditions a results file was recorded under ({} if it predates them).
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f).get("conditions", {})
+
+
+def compare_conditions(baseline: dict, current: dict) -> list:
+    """
+    Lines naming each condition that differs between two runs.
+    """
+
+    return [
+        f"{key}: {baseline.get(key)!r} -> {current.get(key)!r}"
+        for key in sorted(set(baseline) | set(current))
+        if baseline.get(key) != current.get(key)
+    ]
+
+
+def compare_results(baseline: dict, current: dict) -> list:
+    """
+    Lines describing the change of each shared metric, e.g.
+    "risk_timeline/24h  us_per_call  12.10 -> 10.40  (-14.0%)".
+    """
+
+    lines = []
+    for name in sorted(set(baseline) & set(current)):
+        for metric in sorted(set(baseline[name]) & set(current[name])):
+            before, after = baseline[name][metric], current[name][metric]
+            if not isinstance(before, (int, float)) or not before:
+                continue
+            change = (after - before) / before * 100
+            lines.append(
+                f"{name:36}{metric:16}{before:>12.2f} -> {after:<12.2f}({change:+.1f}%)"
+            )
+    return lines
@@ -0,0 +1,45 @@
+"""
+synthetic.py
+
+Deterministic synthetic forecast data for benchmarks.
+Shapes match Open-Meteo's hourly response.
+"""
+
+import math
+import random
+from datetime import date as Date, timedelta
+
+
+def synthetic_open_meteo_hourly(
+    days: int = 16,
+    start: str = "2026-05-01",
+    seed: int = 0,
+    base_temperature: float = 30.0
+) -> dict:
+    """
+    Open-Meteo style "hourly" block with a diurnal temperature cycle.
+    Temperatures are 0.1 °C floats, humidity integral percent.
+    """
+
+    rng = random.Random(seed)
+    first = Date.fromisoformat(start)
+
+    times, temperatures, humidity, wind = [], [], [], []
+
+    for day in range(days):
+        current = (first + timedelta(days=day)).isoformat()
+        day_offset = rng.uniform(-4, 8)
+
+        for hour in range(24):
+            cycle = math.sin((hour - 9) / 24 * 2 * math.pi)
+            times.append(f"{current}T{hour:02d}:00")
+            temperatures.append(round(base_temperature + day_offset + 6 * cycle, 1))
+            humidity.append(int(max(10, min(100, 60 - 25 * cycle + rng.uniform(-5, 5)))))
+            wind.append(round(rng.uniform(0, 25), 1))
+
+    return {
+        "time": times,
+        "temperature_2m": temperatures,
+        "relativehumidity_2m": humidity,
+        "windspeed_10m": wind
+    }
@@ -0,0 +1,514 @@
+"""
+bulk_plan.py
+
+Offline bulk planning: run the planning pipeline over a table of
+requests (e.g. every school x every day of the next fortnight) and
+write one result row per request.
+
+Input is CSV or Parquet with columns location, date and optionally
+time, activity_description, risk_model. Output (CSV or Parquet, by
+extension) keeps the input order and adds the verdict, reason,
+summary facts and resolved coordinates; rows that could not be
+planned carry status "error" and the reason.
+
+Locations are geocoded and their forecast windows downloaded once
+each, by a bounded pool of fetcher threads (the upstream rate limits
+still apply). Plans are computed with the same compute_plan as the
+API, in a process pool, as soon as a location's forecast arrives.
+
+Finished rows are appended to <output>.checkpoint as they complete,
+so an interrupted run continues where it stopped when restarted with
+the same arguments. Rows that failed because an upstream was
+unavailable, or whose planning task was lost (e.g. a crashed worker
+process), are not checkpointed and are retried on the next run.
+Parquet needs pyarrow.
+
+Usage:
+    python bulk_plan.py schools_fortnight.csv plans.parquet
+                        [--workers N] [--fetch-concurrency 4]
+                        [--risk-model threshold] [--explain] [--restart]
+"""
+
+import argparse
+import csv
+import hashlib
+import json
+import os
+import sys
+import time
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    Future,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+    wait
+)
+
+from fastapi import HTTPException
+
+from cache import normalize_query
+from geocoding_client import geocode_location
+from weather_client import fetch_forecast_window
+from planning_service import compute_plan, find_hour_context
+from risk_engine_vectorized import RISK_ENGINES
+from schemas import PlanningRequest
+from upstream_guard import UpstreamUnavailable
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
+
+
+INPUT_COLUMNS = ("location", "date", "time", "activity_description", "risk_model")
+
+OUTPUT_COLUMNS = (
+    "row",
+    "location",
+    "date",
+    "time",
+    "activity_description",
+    "status",
+    "error",
+    "resolved_location",
+    "latitude",
+    "longitude",
+    "intent",
+    "risk_model",
+    "verdict",
+    "reason",
+    "max_temperature",
+    "peak_humidity",
+    "high_risk_hour_count",
+    "high_risk_hours",
+    "focused_risk_level",
+    "forecast_generation",
+)
+
+# Rows per process-pool task; a location's rows are split into tasks
+# of at most this size
+CHUNK_SIZE = 256
+
+# Attempts per location when an upstream is rate limited or failing
+FETCH_ATTEMPTS = 3
+
+PROGRESS_INTERVAL = 5.0
+
+
+# -------- Table I/O --------
+def _is_parquet(path: str) -> bool:
+    return path.lower().endswith((".parquet", ".pq"))
+
+
+def _require_pyarrow():
+    if pyarrow is None:
+        raise SystemExit("Parquet input/output needs pyarrow: pip install pyarrow")
+
+
+def read_requests(path: str) -> list:
+    """
+    Input rows as dicts with every INPUT_COLUMNS key (None if absent).
+    """
+
+    if _is_parquet(path):
+        _require_pyarrow()
+        records = pyarrow.parquet.read_table(path).to_pylist()
+    else:
+        with open(path, "r", encoding="utf-8", newline="") as f:
+            records = list(csv.DictReader(f))
+
+    if records:
+        missing = {"location", "date"} - set(records[0])
+        if missing:
+            raise SystemExit(f"{path}: missing column(s) {', '.join(sorted(missing))}")
+
+    return [
+        {
+            column: (str(record[column]).strip() or None) if record.get(column) is not None else None
+            for column in INPUT_COLUMNS
+        }
+        for record in records
+    ]
+
+
+def write_results(path: str, rows: list, columns: tuple):
+    """
+    Write result rows, in the given column order.
+    """
+
+    tmp_path = f"{path}.tmp"
+
+    if _is_parquet(path):
+        _require_pyarrow()
+        table = pyarrow.Table.from_pylist(
+            [{column: row.get(column) for column in columns} for row in rows]
+        )
+        pyarrow.parquet.write_table(table, tmp_path)
+    else:
+        with open(tmp_path, "w", encoding="utf-8", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=columns, extrasaction="ignore")
+            writer.writeheader()
+            writer.writerows(rows)
+
+    os.replace(tmp_path, path)
+
+
+# -------- Checkpoint --------
+def _fingerprint(input_path: str, options: dict) -> str:
+    digest = hashlib.sha256(json.dumps(options, sort_keys=True).encode("utf-8"))
+    with open(input_path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def load_checkpoint(path: str, fingerprint: str) -> dict:
+    """
+    {row index: result row} from a previous run over the same input.
+    Torn row lines (killed mid-write) are skipped; a torn or unreadable
+    header is an error, since the rows after it can't be trusted.
+    """
+
+    if not os.path.exists(path) or os.path.getsize(path) == 0:
+        return {}
+
+    done = {}
+    with open(path, "r", encoding="utf-8") as f:
+        header = f.readline()
+        try:
+            header = json.loads(header) if header.endswith("\n") else None
+        except ValueError:
+            header = None
+
+        if not isinstance(header, dict) or "fingerprint" not in header:
+            raise SystemExit(
+                f"{path}: unreadable checkpoint header; use --restart to discard it"
+            )
+        if header["fingerprint"] != fingerprint:
+            raise SystemExit(
+                f"{path} belongs to a different input or options; "
+                "use --restart to discard it"
+            )
+
+        for line in f:
+            try:
+                row = json.loads(line)
+            except ValueError:
+                continue
+            done[row["row"]] = row
+
+    return done
+
+
+class Checkpoint:
+    """
+    Append-only JSON-lines log of finished rows.
+    """
+
+    def __init__(self, path: str, fingerprint: str):
+        self.path = path
+        size = os.path.getsize(path) if os.path.exists(path) else 0
+
+        self._file = open(path, "a", encoding="utf-8")
+        if size == 0:
+            self._file.write(json.dumps({"fingerprint": fingerprint}) + "\n")
+        else:
+            # Terminate a torn last line so new rows start cleanly
+            with open(path, "rb") as f:
+                f.seek(size - 1)
+                if f.read(1) != b"\n":
+                    self._file.write("\n")
+        self._file.flush()
+
+    def append(self, rows: list):
+        self._file.write("".join(json.dumps(row) + "\n" for row in rows))
+        self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+
+# -------- Pipeline stages --------
+def _error_row(index: int, record: dict, detail: str) -> dict:
+    return {**record, "row": index, "status": "error", "error": detail}
+
+
+def fetch_location(location: str) -> tuple:
+    """
+    I/O stage: geocode one location and download its forecast window.
+
+    Returns:
+        (geo, window), geo None when the location is unknown
+
+    Raises:
+        UpstreamUnavailable after FETCH_ATTEMPTS failed attempts
+    """
+
+    for attempt in range(1, FETCH_ATTEMPTS + 1):
+        try:
+            geo = geocode_location(location)
+            if not geo:
+                return None, None
+            return geo, fetch_forecast_window(geo["latitude"], geo["longitude"])
+        except UpstreamUnavailable as exc:
+            if attempt == FETCH_ATTEMPTS:
+                raise
+            time.sleep(exc.retry_after or 1.0)
+
+
+def _plan_row(
+    geo: dict,
+    index: int,
+    record: dict,
+    forecast,
+    default_risk_model: str | None,
+    explain: bool
+) -> dict:
+    request = PlanningRequest(
+        location=record["location"],
+        date=record["date"],
+        time=record["time"],
+        activity_description=record["activity_description"] or "",
+        risk_model=record["risk_model"] or default_risk_model
+    )
+    plan = compute_plan(request, geo, forecast)
+
+    facts = plan["summary_facts"]
+    high_hours = [time_str[11:16] for time_str in facts["high_risk_hours"]]
+    hour_context = find_hour_context(plan["risk_timeline"], request.time)
+
+    row = {
+        **record,
+        "row": index,
+        "status": "ok",
+        "error": None,
+        "resolved_location": plan["location"],
+        "latitude": geo["latitude"],
+        "longitude": geo["longitude"],
+        "intent": plan["intent"],
+        "risk_model": plan["risk_model"],
+        "verdict": plan["decision"]["verdict"],
+        "reason": plan["decision"]["reason"],
+        "max_temperature": facts["max_temperature"],
+        "peak_humidity": facts["peak_humidity"],
+        "high_risk_hour_count": len(high_hours),
+        "high_risk_hours": " ".join(high_hours),
+        "focused_risk_level": hour_context["risk_level"] if hour_context else None,
+        "forecast_generation": plan["forecast_generation"]
+    }
+    if explain:
+        row["planning_explanation"] = plan["planning_explanation"]
+
+    return row
+
+
+def plan_rows(geo: dict, items: list, default_risk_model: str | None, explain: bool) -> list:
+    """
+    CPU stage (runs in a worker process): plan each
+    (row index, input record, forecast of its date). A row that
+    can't be planned becomes an error row; the others still run.
+    """
+
+    results = []
+
+    for index, record, forecast in items:
+        try:
+            row = _plan_row(geo, index, record, forecast, default_risk_model, explain)
+        except HTTPException as exc:
+            row = _error_row(index, record, exc.detail)
+        except ValueError as exc:
+            # Pydantic validation (e.g. unknown risk_model)
+            row = _error_row(index, record, str(exc).splitlines()[0])
+        except Exception as exc:
+            row = _error_row(index, record, f"planning failed: {exc!r}")
+
+        results.append(row)
+
+    return results
+
+
+def _run_inline(fn, *args):
+    """
+    Stand-in for pool.submit when --workers 0: run now, return a done future.
+    """
+
+    future = Future()
+    try:
+        future.set_result(fn(*args))
+    except Exception as exc:
+        future.set_exception(exc)
+    return future
+
+
+def run(
+    records: list,
+    done: dict,
+    checkpoint: Checkpoint,
+    workers: int,
+    fetch_concurrency: int,
+    risk_model: str | None,
+    explain: bool
+) -> tuple:
+    """
+    Plan every record not in done.
+
+    Returns:
+        ({row index: result row}, number of rows that failed on an
+        unavailable upstream or a lost planning task, to be retried)
+    """
+
+    results = dict(done)
+    unavailable = 0
+
+    # Rows still to plan, grouped by normalized location
+    groups = {}
+    for index, record in enumerate(records):
+        if index in done:
+            continue
+        if not record["location"] or not record["date"]:
+            row = _error_row(index, record, "location and date are required")
+            results[index] = row
+            checkpoint.append([row])
+            continue
+        groups.setdefault(normalize_query(record["location"]), []).append(index)
+
+    total = len(records)
+    last_report = time.monotonic()
+
+    fetcher = ThreadPoolExecutor(max_workers=fetch_concurrency)
+    pool = ProcessPoolExecutor(max_workers=workers) if workers > 0 else None
+
+    try:
+        pending = {}
+        for indices in groups.values():
+            future = fetcher.submit(fetch_location, records[indices[0]]["location"])
+            pending[future] = ("fetch", indices)
+
+        while pending:
+            finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+
+            for future in finished:
+                stage, indices = pending.pop(future)
+
+                if stage == "plan":
+                    try:
+                        rows = future.result()
+                    except Exception as exc:
+                        # Lost task (e.g. crashed worker process): not
+                        # checkpointed, retried when the run is repeated
+                        unavailable += len(indices)
+                        for index in indices:
+                            results[index] = _error_row(index, records[index], f"planning failed: {exc!r}")
+                        continue
+
+                    checkpoint.append(rows)
+                    results.update((row["row"], row) for row in rows)
+                    continue
+
+                try:
+                    geo, window = future.result()
+                except UpstreamUnavailable as exc:
+                    # Not checkpointed: retried when the run is repeated
+                    unavailable += len(indices)
+                    for index in indices:
+                        results[index] = _error_row(index, records[index], str(exc))
+                    continue
+
+                if geo is None:
+                    rows = [_error_row(index, records[index], "Location not found") for index in indices]
+                    checkpoint.append(rows)
+                    results.update((row["row"], row) for row in rows)
+                    continue
+
+                for start in range(0, len(indices), CHUNK_SIZE):
+                    chunk = indices[start:start + CHUNK_SIZE]
+                    items = [
+                        (index, records[index], window.for_date(records[index]["date"]))
+                        for index in chunk
+                    ]
+                    args = (plan_rows, geo, items, risk_model, explain)
+                    task = pool.submit(*args) if pool is not None else _run_inline(*args)
+                    pending[task] = ("plan", chunk)
+
+            if time.monotonic() - last_report >= PROGRESS_INTERVAL:
+                last_report = time.monotonic()
+                print(f"{len(results)}/{total} rows", file=sys.stderr)
+    finally:
+        fetcher.shutdown(cancel_futures=True)
+        if pool is not None:
+            pool.shutdown(cancel_futures=True)
+
+    return results, unavailable
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[1])
+    parser.add_argument("input", help="CSV or Parquet of requests")
+    parser.add_argument("output", help="CSV or Parquet file to write")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                        help="planning processes (0: plan in this process)")
+    parser.add_argument("--fetch-concurrency", type=int, default=4,
+                        help="concurrent geocode/forecast lookups")
+    parser.add_argument("--risk-model", choices=RISK_ENGINES,
+                        help="risk engine for rows without a risk_model")
+    parser.add_argument("--explain", action="store_true",
+                        help="add the planning_explanation column")
+    parser.add_argument("--restart", action="store_true",
+                        help="discard the checkpoint of a previous run")
+    args = parser.parse_args()
+
+    if (_is_parquet(args.input) or _is_parquet(args.output)) and pyarrow is None:
+        _require_pyarrow()
+
+    records = read_requests(args.input)
+
+    checkpoint_path = f"{args.output}.checkpoint"
+    fingerprint = _fingerprint(args.input, {"risk_model": args.risk_model, "explain": args.explain})
+
+    if args.restart and os.path.exists(checkpoint_path):
+        os.remove(checkpoint_path)
+
+    done = load_checkpoint(checkpoint_path, fingerprint)
+    if done:
+        print(f"resuming: {len(done)}/{len(records)} rows already planned", file=sys.stderr)
+
+    checkpoint = Checkpoint(checkpoint_path, fingerprint)
+    started = time.perf_counter()
+    try:
+        results, unavailable = run(
+            records,
+            done,
+            checkpoint,
+            args.workers,
+            args.fetch_concurrency,
+            args.risk_model,
+            args.explain
+        )
+    finally:
+        checkpoint.close()
+
+    columns = OUTPUT_COLUMNS + (("planning_explanation",) if args.explain else ())
+    write_results(args.output, [results[index] for index in range(len(records))], columns)
+
+    failed = sum(1 for row in results.values() if row["status"] == "error")
+
+    print(
+        f"{len(records)} rows in {time.perf_counter() - started:.1f}s: "
+        f"{len(records) - failed} planned, {failed} failed -> {args.output}",
+        file=sys.stderr
+    )
+
+    if unavailable:
+        print(
+            f"{unavailable} rows hit unavailable upstreams or lost planning tasks; "
+            "rerun to retry them",
+            file=sys.stderr
+        )
+        sys.exit(1)
+
+    os.remove(checkpoint_path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,321 @@
+"""
+cache.py
+
+Small TTL caches for upstream lookups.
+Bounded in-memory LRU, optionally backed by a shared store
+(cache_backends: SQLite file or Redis) so entries survive restarts
+and are shared between worker processes.
+"""
+
+import asyncio
+import os
+import pickle
+import tempfile
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+
+from cache_backends import CacheBackend, shared_backend, sqlite_backend
+
+
+# Sentinel distinguishing "not cached" from a cached None (negative result)
+MISSING = object()
+
+# name -> TTLCache, for process-wide snapshots
+_registry = {}
+
+
+def normalize_query(text: str) -> str:
+    """
+    Normalize a free-text lookup key.
+    Case-folds, strips diacritics and collapses whitespace,
+    so "  São  Paulo" and "sao paulo" share one cache entry.
+    """
+
+    if not text:
+        return ""
+
+    decomposed = unicodedata.normalize("NFKD", text)
+    stripped = "".join(
+        ch for ch in decomposed
+        if not unicodedata.combining(ch)
+    )
+
+    return " ".join(stripped.casefold().split())
+
+
+class TTLCache:
+    """
+    Thread-safe LRU cache with per-entry expiry.
+
+    Expired entries stay around (until evicted) so callers can fall
+    back to stale data when the upstream is unavailable.
+
+    Misses in memory fall through to the backend: the shared one
+    configured for this cache name (cache_backends.CACHE_SHARED),
+    else a private SQLite file when db_path is given. Backend values
+    must be picklable.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        maxsize: int = 1024,
+        ttl: float = 3600,
+        db_path: str | None = None,
+        backend: CacheBackend | None = None
+    ):
+        self.name = name
+        self.maxsize = maxsize
+        self.ttl = ttl
+
+        _registry[name] = self
+
+        self._entries = OrderedDict()      # key -> (expires_at, value)
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.stale_hits = 0
+        self.evictions = 0
+
+        if backend is None:
+            backend = shared_backend(name)
+        if backend is None and db_path:
+            backend = sqlite_backend(db_path)
+        self.backend = backend
+
+    # -------- Internal helpers --------
+    def _remember(self, key: str, expires_at: float, value):
+        self._entries[key] = (expires_at, value)
+        self._entries.move_to_end(key)
+
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def _get_memory(self, key: str, now: float):
+        with self._lock:
+            entry = self._entries.get(key)
+
+            if entry is not None and entry[0] > now:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+
+        return MISSING
+
+    def _adopt(self, key: str, entry, now: float | None):
+        """
+        Keep a backend entry in memory; now=None accepts expired entries.
+        """
+
+        if entry is None or (now is not None and entry[0] <= now):
+            return MISSING
+
+        with self._lock:
+            self._remember(key, *entry)
+            if now is not None:
+                self.hits += 1
+        return entry[1]
+
+    def _miss(self, default):
+        with self._lock:
+            self.misses += 1
+        return default
+
+    def _stale(self, value, default):
+        if value is MISSING:
+            return default
+
+        with self._lock:
+            self.stale_hits += 1
+        return value
+
+    def _memory_entry(self, key: str):
+        with self._lock:
+            entry = self._entries.get(key)
+        return MISSING if entry is None else entry[1]
+
+    def _remember_new(self, key: str, value, ttl: float | None) -> float:
+        expires_at = time.time() + (self.ttl if ttl is None else ttl)
+
+        with self._lock:
+            self._remember(key, expires_at, value)
+        return expires_at
+
+    # -------- Public API --------
+    # Backend calls block (SQLite, Redis round-trips): code running on
+    # the event loop uses the *_async variants, which run them in a
+    # worker thread. Memory-only caches never leave the calling thread.
+    def get(self, key: str, default=MISSING):
+        now = time.time()
+
+        value = self._get_memory(key, now)
+        if value is not MISSING:
+            return value
+
+        # Another worker may have a fresher entry than an expired local one
+        if self.backend is not None:
+            value = self._adopt(key, self.backend.get(self.name, key), now)
+            if value is not MISSING:
+                return value
+
+        return self._miss(default)
+
+    async def get_async(self, key: str, default=MISSING):
+        now = time.time()
+
+        value = self._get_memory(key, now)
+        if value is not MISSING:
+            return value
+
+        if self.backend is not None:
+            entry = await asyncio.to_thread(self.backend.get, self.name, key)
+            value = self._adopt(key, entry, now)
+            if value is not MISSING:
+                return value
+
+        return self._miss(default)
+
+    def get_stale(self, key: str, default=MISSING):
+        """
+        Return an entry even if it has expired (fallback during outages).
+        """
+
+        value = self._memory_entry(key)
+        if value is MISSING and self.backend is not None:
+            value = self._adopt(key, self.backend.get(self.name, key), None)
+
+        return self._stale(value, default)
+
+    async def get_stale_async(self, key: str, default=MISSING):
+        value = self._memory_entry(key)
+        if value is MISSING and self.backend is not None:
+            entry = await asyncio.to_thread(self.backend.get, self.name, key)
+            value = self._adopt(key, entry, None)
+
+        return self._stale(value, default)
+
+    def set(self, key: str, value, ttl: float | None = None):
+        expires_at = self._remember_new(key, value, ttl)
+
+        if self.backend is not None:
+            self.backend.set(self.name, key, value, expires_at)
+
+    async def set_async(self, key: str, value, ttl: float | None = None):
+        expires_at = self._remember_new(key, value, ttl)
+
+        if self.backend is not None:
+            await asyncio.to_thread(self.backend.set, self.name, key, value, expires_at)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+        if self.backend is not None:
+            self.backend.clear(self.name)
+
+    def snapshot(self) -> list:
+        """
+        Unexpired in-memory entries as (key, expires_at, value), LRU first.
+        """
+        now = time.time()
+        with self._lock:
+            return [
+                (key, expires_at, value)
+                for key, (expires_at, value) in self._entries.items()
+                if expires_at > now
+            ]
+
+    def restore(self, entries) -> int:
+        """
+        Load entries from snapshot() (e.g. of a previous process),
+        skipping expired ones and keys already present.
+        Returns the number of entries loaded.
+        """
+        now = time.time()
+        loaded = 0
+
+        with self._lock:
+            for key, expires_at, value in entries:
+                if expires_at > now and key not in self._entries:
+                    self._remember(key, expires_at, value)
+                    loaded += 1
+
+        return loaded
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "name": self.name,
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "stale_hits": self.stale_hits,
+                "evictions": self.evictions,
+                "hit_ratio": round(self.hits / lookups, 3) if lookups else None,
+                "persistent": self.backend is not None,
+                "backend": self.backend.kind if self.backend is not None else "memory"
+            }
+
+
+# -------- Snapshots --------
+def save_snapshot(path: str, names) -> dict:
+    """
+    Write the unexpired entries of the named caches to path
+    (pickle; values need not be JSON-serializable).
+
+    Returns:
+        {cache name: entries written}
+    """
+
+    snapshot = {
+        name: _registry[name].snapshot()
+        for name in names
+        if name in _registry
+    }
+
+    # Write-then-rename so a crash never leaves a truncated snapshot;
+    # the temporary name is unique, as several workers may save at once
+    with tempfile.NamedTemporaryFile(
+        dir=os.path.dirname(path) or ".",
+        prefix=f"{os.path.basename(path)}.",
+        suffix=".tmp",
+        delete=False
+    ) as f:
+        tmp_path = f.name
+        try:
+            pickle.dump(snapshot, f, protocol=pickle.HIGHEST_PROTOCOL)
+        except BaseException:
+            f.close()
+            os.unlink(tmp_path)
+            raise
+    os.replace(tmp_path, path)
+
+    return {name: len(entries) for name, entries in snapshot.items()}
+
+
+def load_snapshot(path: str) -> dict:
+    """
+    Restore caches from a save_snapshot file written by this service.
+    Missing file: nothing loaded.
+
+    Returns:
+        {cache name: entries loaded}
+    """
+
+    if not os.path.exists(path):
+        return {}
+
+    with open(path, "rb") as f:
+        snapshot = pickle.load(f)
+
+    return {
+        name: _registry[name].restore(entries)
+        for name, entries in snapshot.items()
+        if name in _registry
+    }
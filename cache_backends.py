@@ -0,0 +1,472 @@
+"""
+cache_backends.py
+
+Shared second tier for TTLCache, so several uvicorn workers (or
+restarts) reuse each other's geocodes, forecasts and plans:
+
+    memory  no shared tier, every process keeps its own LRU (default)
+    sqlite  one local SQLite file (WAL, memory-mapped) shared by all
+            worker processes on the host
+    redis   any server speaking the Redis protocol (RESP); the client
+            below needs no redis package
+
+Values are pickled, so a hit costs one unpickle rather than a JSON
+parse plus object rebuild. Only point backends at storage this
+service alone writes to.
+
+A failing backend never fails a request: errors count as misses and
+the backend is skipped for CACHE_BACKEND_RETRY seconds. Backend calls
+block; event-loop code goes through TTLCache's *_async methods, which
+run them in a worker thread.
+"""
+
+import logging
+import os
+import pickle
+import socket
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from urllib.parse import unquote, urlsplit
+
+
+logger = logging.getLogger(__name__)
+
+CACHE_BACKEND = os.getenv("CACHE_BACKEND", "memory")
+
+# Caches (TTLCache names) that use the shared backend
+CACHE_SHARED = tuple(
+    name.strip()
+    for name in os.getenv("CACHE_SHARED", "geocode,forecast,plan").split(",")
+    if name.strip()
+)
+
+CACHE_SQLITE_PATH = os.getenv("CACHE_SQLITE_PATH", "cache_shared.sqlite3")
+CACHE_SQLITE_MMAP = int(os.getenv("CACHE_SQLITE_MMAP", 64 * 1024 * 1024))
+
+# Milliseconds to wait for another worker's write lock before treating
+# the lookup as a miss (or skipping the write)
+CACHE_SQLITE_BUSY_TIMEOUT = float(os.getenv("CACHE_SQLITE_BUSY_TIMEOUT", 20))
+
+# Seconds between purges of rows past their stale grace
+CACHE_SQLITE_PURGE_INTERVAL = float(os.getenv("CACHE_SQLITE_PURGE_INTERVAL", 600))
+
+CACHE_REDIS_URL = os.getenv("CACHE_REDIS_URL", "redis://127.0.0.1:6379/0")
+CACHE_REDIS_PREFIX = os.getenv("CACHE_REDIS_PREFIX", "heatwave:")
+CACHE_REDIS_TIMEOUT = float(os.getenv("CACHE_REDIS_TIMEOUT", 0.25))
+
+# Shared entries are kept this long past expiry for stale fallback
+CACHE_STALE_GRACE = float(os.getenv("CACHE_STALE_GRACE", 24 * 3600))
+
+# Seconds to bypass a backend after an error
+CACHE_BACKEND_RETRY = float(os.getenv("CACHE_BACKEND_RETRY", 5))
+
+CACHE_BACKENDS = ("memory", "sqlite", "redis")
+
+if CACHE_BACKEND not in CACHE_BACKENDS:
+    raise ValueError(
+        f"CACHE_BACKEND must be one of {', '.join(CACHE_BACKENDS)}, got {CACHE_BACKEND!r}"
+    )
+
+
+class BackendBusy(Exception):
+    """
+    The store is momentarily locked by another process: the call is
+    skipped, but the backend is not bypassed.
+    """
+
+
+class CacheBackend(ABC):
+    """
+    Base class: timing, error handling and stats around the
+    storage-specific _get/_set/_clear.
+
+    Entries are (expires_at, value); get returns expired entries
+    too, so TTLCache can serve them stale.
+    """
+
+    kind = "base"
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+        self.busy = 0
+        self.calls = 0
+        self.total_seconds = 0.0
+        self.max_seconds = 0.0
+
+        self._down_until = 0.0
+        self._stats_lock = threading.Lock()
+
+    # -------- Storage (subclasses) --------
+    @abstractmethod
+    def _get(self, namespace: str, key: str):
+        """
+        (expires_at, value) or None.
+        """
+
+    @abstractmethod
+    def _set(self, namespace: str, key: str, value, expires_at: float):
+        pass
+
+    @abstractmethod
+    def _clear(self, namespace: str):
+        pass
+
+    # -------- Internal helpers --------
+    def _call(self, fn, *args):
+        if time.monotonic() < self._down_until:
+            return None
+
+        started = time.perf_counter()
+        try:
+            return fn(*args)
+        except BackendBusy:
+            with self._stats_lock:
+                self.busy += 1
+            return None
+        except Exception as exc:
+            self._down_until = time.monotonic() + CACHE_BACKEND_RETRY
+            with self._stats_lock:
+                self.errors += 1
+            logger.warning(
+                "cache backend %s failed (%s), bypassing it for %ss",
+                self.kind, exc, CACHE_BACKEND_RETRY
+            )
+            return None
+        finally:
+            elapsed = time.perf_counter() - started
+            with self._stats_lock:
+                self.calls += 1
+                self.total_seconds += elapsed
+                self.max_seconds = max(self.max_seconds, elapsed)
+
+    # -------- Public API --------
+    def get(self, namespace: str, key: str):
+        """
+        (expires_at, value), expired or not, or None.
+        """
+
+        entry = self._call(self._get, namespace, key)
+
+        with self._stats_lock:
+            if entry is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+
+        return entry
+
+    def set(self, namespace: str, key: str, value, expires_at: float):
+        self._call(self._set, namespace, key, value, expires_at)
+
+    def clear(self, namespace: str):
+        self._call(self._clear, namespace)
+
+    def stats(self) -> dict:
+        with self._stats_lock:
+            lookups = self.hits + self.misses
+            return {
+                "kind": self.kind,
+                "hits": self.hits,
+                "misses": self.misses,
+                "errors": self.errors,
+                "busy": self.busy,
+                "hit_ratio": round(self.hits / lookups, 3) if lookups else None,
+                "calls": self.calls,
+                "avg_latency_ms": round(self.total_seconds / self.calls * 1000, 3) if self.calls else None,
+                "max_latency_ms": round(self.max_seconds * 1000, 3),
+                "available": time.monotonic() >= self._down_until
+            }
+
+
+# -------- SQLite --------
+class SQLiteBackend(CacheBackend):
+    """
+    Local SQLite file, safe to share between processes: WAL lets
+    readers proceed during writes, and the file is memory-mapped so
+    hot reads skip read() syscalls.
+    """
+
+    kind = "sqlite"
+
+    def __init__(self, path: str):
+        super().__init__()
+        self.path = path
+        self.location = path
+
+        self._db = None
+        self._pid = None
+        self._purged_at = 0.0
+        self._lock = threading.Lock()
+
+    def _connection(self) -> sqlite3.Connection:
+        # Reconnect in forked children: connections can't cross a fork
+        if self._db is None or self._pid != os.getpid():
+            db = sqlite3.connect(
+                self.path,
+                timeout=CACHE_SQLITE_BUSY_TIMEOUT / 1000,
+                check_same_thread=False
+            )
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            db.execute(f"PRAGMA mmap_size={CACHE_SQLITE_MMAP}")
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS cache ("
+                "namespace TEXT NOT NULL, "
+                "key TEXT NOT NULL, "
+                "value BLOB NOT NULL, "
+                "expires_at REAL NOT NULL, "
+                "PRIMARY KEY (namespace, key))"
+            )
+            db.commit()
+            self._db, self._pid = db, os.getpid()
+
+        return self._db
+
+    def _execute(self, sql: str, params: tuple = (), commit: bool = False):
+        """
+        Run one statement; lock timeouts raise BackendBusy.
+        """
+
+        with self._lock:
+            try:
+                db = self._connection()
+                row = db.execute(sql, params).fetchone()
+                if commit:
+                    db.commit()
+                return row
+            except sqlite3.OperationalError as exc:
+                if self._db is not None and self._db.in_transaction:
+                    self._db.rollback()
+                if "locked" in str(exc) or "busy" in str(exc):
+                    raise BackendBusy(str(exc)) from exc
+                raise
+
+    def _get(self, namespace: str, key: str):
+        row = self._execute(
+            "SELECT value, expires_at FROM cache WHERE namespace = ? AND key = ?",
+            (namespace, key)
+        )
+
+        if row is None:
+            return None
+
+        value, expires_at = row
+        return expires_at, pickle.loads(value)
+
+    def _set(self, namespace: str, key: str, value, expires_at: float):
+        blob = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+
+        self._execute(
+            "INSERT OR REPLACE INTO cache (namespace, key, value, expires_at) "
+            "VALUES (?, ?, ?, ?)",
+            (namespace, key, blob, expires_at),
+            commit=True
+        )
+
+        # Drop rows past their stale grace; reads never delete, so
+        # without this the file only grows
+        now = time.time()
+        if now - self._purged_at >= CACHE_SQLITE_PURGE_INTERVAL:
+            self._purged_at = now
+            self._execute(
+                "DELETE FROM cache WHERE expires_at < ?",
+                (now - CACHE_STALE_GRACE,),
+                commit=True
+            )
+
+    def _clear(self, namespace: str):
+        self._execute("DELETE FROM cache WHERE namespace = ?", (namespace,), commit=True)
+
+
+# -------- Redis protocol --------
+class RedisError(Exception):
+    """
+    Error reply from the server, or a protocol violation.
+    """
+
+
+def _encode_command(args) -> bytes:
+    parts = [b"*%d\r\n" % len(args)]
+    for arg in args:
+        if isinstance(arg, str):
+            arg = arg.encode("utf-8")
+        elif isinstance(arg, int):
+            arg = str(arg).encode("ascii")
+        parts.append(b"$%d\r\n%s\r\n" % (len(arg), arg))
+    return b"".join(parts)
+
+
+def _read_reply(stream):
+    line = stream.readline()
+    if not line.endswith(b"\r\n"):
+        raise ConnectionError("connection closed by server")
+
+    kind, rest = line[:1], line[1:-2]
+
+    if kind == b"+":
+        return rest
+    if kind == b"-":
+        raise RedisError(rest.decode("utf-8", "replace"))
+    if kind == b":":
+        return int(rest)
+    if kind == b"$":
+        length = int(rest)
+        if length < 0:
+            return None
+        data = stream.read(length + 2)
+        if len(data) != length + 2:
+            raise ConnectionError("connection closed by server")
+        return data[:-2]
+    if kind == b"*":
+        length = int(rest)
+        if length < 0:
+            return None
+        return [_read_reply(stream) for _ in range(length)]
+
+    raise RedisError(f"unexpected reply type {kind!r}")
+
+
+class RedisBackend(CacheBackend):
+    """
+    Minimal blocking RESP client: one connection, one command at a
+    time (GET, SET PX, SCAN, DEL). Expired entries stay in Redis for
+    CACHE_STALE_GRACE, then Redis drops them itself.
+    """
+
+    kind = "redis"
+
+    def __init__(self, url: str, timeout: float = CACHE_REDIS_TIMEOUT, prefix: str = CACHE_REDIS_PREFIX):
+        super().__init__()
+
+        parts = urlsplit(url)
+        self.host = parts.hostname or "127.0.0.1"
+        self.port = parts.port or 6379
+        self.db = int(parts.path.lstrip("/") or 0)
+        self.username = unquote(parts.username) if parts.username else None
+        self.password = unquote(parts.password) if parts.password else None
+        self.timeout = timeout
+        self.prefix = prefix
+
+        # For stats: no credentials
+        self.location = f"{self.host}:{self.port}/{self.db}"
+
+        self._sock = None
+        self._stream = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def _connect(self):
+        sock = socket.create_connection((self.host, self.port), timeout=self.timeout)
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self._sock, self._stream, self._pid = sock, sock.makefile("rb"), os.getpid()
+
+        if self.password:
+            credentials = (self.username, self.password) if self.username else (self.password,)
+            self._roundtrip(("AUTH",) + credentials)
+        if self.db:
+            self._roundtrip(("SELECT", self.db))
+
+    def _close(self):
+        if self._sock is not None:
+            try:
+                self._sock.close()
+            except OSError:
+                pass
+        self._sock = self._stream = None
+
+    def _roundtrip(self, args):
+        self._sock.sendall(_encode_command(args))
+        return _read_reply(self._stream)
+
+    def command(self, *args):
+        """
+        Send one command and return its decoded reply.
+        """
+
+        with self._lock:
+            if self._sock is None or self._pid != os.getpid():
+                self._close()
+                self._connect()
+
+            try:
+                return self._roundtrip(args)
+            except (OSError, ConnectionError):
+                # Unknown stream position: start over on the next call
+                self._close()
+                raise
+
+    def _key(self, namespace: str, key: str) -> str:
+        return f"{self.prefix}{namespace}:{key}"
+
+    def _get(self, namespace: str, key: str):
+        blob = self.command("GET", self._key(namespace, key))
+        return None if blob is None else pickle.loads(blob)
+
+    def _set(self, namespace: str, key: str, value, expires_at: float):
+        blob = pickle.dumps((expires_at, value), protocol=pickle.HIGHEST_PROTOCOL)
+        keep_ms = max(1, int((expires_at - time.time() + CACHE_STALE_GRACE) * 1000))
+        self.command("SET", self._key(namespace, key), blob, "PX", keep_ms)
+
+    def _clear(self, namespace: str):
+        pattern = self._key(namespace, "*")
+        cursor = b"0"
+
+        while True:
+            cursor, keys = self.command("SCAN", cursor, "MATCH", pattern, "COUNT", 500)
+            if keys:
+                self.command("DEL", *keys)
+            if cursor == b"0":
+                break
+
+
+# -------- Registry --------
+_backends = {}
+_backends_lock = threading.Lock()
+
+
+def _backend(kind: str, location: str) -> CacheBackend:
+    with _backends_lock:
+        backend = _backends.get((kind, location))
+        if backend is None:
+            backend = SQLiteBackend(location) if kind == "sqlite" else RedisBackend(location)
+            _backends[(kind, location)] = backend
+        return backend
+
+
+def sqlite_backend(path: str) -> SQLiteBackend:
+    """
+    The process-wide backend for a SQLite file.
+    """
+    return _backend("sqlite", path)
+
+
+def shared_backend(name: str) -> CacheBackend | None:
+    """
+    The configured shared backend for cache `name`, or None when it
+    stays process-local.
+    """
+
+    if CACHE_BACKEND == "memory" or name not in CACHE_SHARED:
+        return None
+
+    if CACHE_BACKEND == "sqlite":
+        return _backend("sqlite", CACHE_SQLITE_PATH)
+    return _backend("redis", CACHE_REDIS_URL)
+
+
+def backend_stats() -> dict:
+    """
+    Hit/latency stats of every backend in use, keyed "kind:location".
+    """
+
+    with _backends_lock:
+        backends = list(_backends.values())
+
+    return {
+        f"{backend.kind}:{backend.location}": backend.stats()
+        for backend in backends
+    }
@@ -1,6 +1,102 @@
-import requests
+import os
 
-NOMINATIM_URL = "https://nominatim.openstreetmap.org/search"
+import httpx
+
+from cache import MISSING, TTLCache, normalize_query
+from http_client import HTTPX_TRANSIENT_ERRORS, HTTP_TIMEOUT, USER_AGENT, get_http_client
+from metrics import upstream_call
+from singleflight import SingleFlight, ThreadSingleFlight
+from upstream_guard import UpstreamGuard, UpstreamUnavailable, worker_share
+
+# Overridable, e.g. to point at benchmarks/fake_upstream.py
+NOMINATIM_URL = os.getenv("NOMINATIM_URL", "https://nominatim.openstreetmap.org/search")
+
+# Found locations rarely move; "not found" answers are kept briefly
+# so typos don't hammer Nominatim but new OSM edits still show up.
+GEOCODE_CACHE_TTL = float(os.getenv("GEOCODE_CACHE_TTL", 30 * 24 * 3600))
+GEOCODE_NEGATIVE_TTL = float(os.getenv("GEOCODE_NEGATIVE_TTL", 3600))
+
+_geocode_cache = TTLCache(
+    name="geocode",
+    maxsize=int(os.getenv("GEOCODE_CACHE_SIZE", 2048)),
+    ttl=GEOCODE_CACHE_TTL,
+    db_path=os.getenv("GEOCODE_CACHE_PATH", "geocode_cache.sqlite3") or None
+)
+
+# Nominatim usage policy: at most 1 request per second. The limit is
+# for the whole deployment; each worker process gets its share
+# (upstream_guard.worker_share, from WEB_CONCURRENCY). Workers started
+# some other way need NOMINATIM_RATE_LIMIT divided by hand.
+NOMINATIM_GUARD = UpstreamGuard(
+    "nominatim",
+    rate=worker_share(float(os.getenv("NOMINATIM_RATE_LIMIT", 1))),
+    burst=int(os.getenv("NOMINATIM_BURST", 1)),
+    max_wait=float(os.getenv("NOMINATIM_MAX_WAIT", 5)),
+    failure_threshold=int(os.getenv("NOMINATIM_FAILURE_THRESHOLD", 3)),
+    reset_timeout=float(os.getenv("NOMINATIM_RESET_TIMEOUT", 60))
+)
+
+# Concurrent lookups of the same normalized query share one request
+_geocode_flight = ThreadSingleFlight("geocode")
+_geocode_flight_async = SingleFlight("geocode_async")
+
+
+def _query_params(location: str) -> dict:
+    return {
+        "q": location,
+        "format": "json",
+        "limit": 1
+    }
+
+
+def _serve_stale(key: str, exc: UpstreamUnavailable):
+    """
+    Fall back to an expired cache entry, or re-raise the outage.
+    """
+    stale = _geocode_cache.get_stale(key)
+    if stale is not MISSING:
+        return stale
+    raise exc
+
+
+async def _serve_stale_async(key: str, exc: UpstreamUnavailable):
+    stale = await _geocode_cache.get_stale_async(key)
+    if stale is not MISSING:
+        return stale
+    raise exc
+
+
+def _parse_result(data: list) -> tuple:
+    """
+    Convert a Nominatim response body into (geo dict or None, cache TTL).
+    """
+
+    if not data:
+        return None, GEOCODE_NEGATIVE_TTL
+
+    geo = {
+        "latitude": float(data[0]["lat"]),
+        "longitude": float(data[0]["lon"]),
+        "display_name": data[0]["display_name"]
+    }
+
+    return geo, GEOCODE_CACHE_TTL
+
+
+def _store_result(key: str, data: list):
+    """
+    Convert a Nominatim response body into our geo dict and cache it.
+    """
+
+    geo, ttl = _parse_result(data)
+    _geocode_cache.set(key, geo, ttl=ttl)
+    return geo
+
+
+async def _store_result_async(key: str, data: list):
+    geo, ttl = _parse_result(data)
+    await _geocode_cache.set_async(key, geo, ttl=ttl)
+    return geo
 
 
 def geocode_location(location: str):
@@ -8,39 +104,121 @@ def geocode_location(location: str):
     Convert a human-readable location name into latitude and longitude
     using OpenStreetMap Nominatim.
 
+    Results (including "not found") are cached by normalized query.
+    While Nominatim is unavailable, stale cached results are served.
+
     Returns:
         dict with keys: latitude, longitude, display_name
         or None if location not found
+
+    Raises:
+        UpstreamUnavailable if Nominatim cannot answer and nothing is cached
     """
 
-    params = {
-        "q": location,
-        "format": "json",
-        "limit": 1
-    }
+    key = normalize_query(location)
+
+    cached = _geocode_cache.get(key)
+    if cached is not MISSING:
+        return cached
+
+    return _geocode_flight.do(key, lambda: _fetch_geocode(location, key))
+
+
+def _fetch_geocode(location: str, key: str):
+    # Sync client is only used by scripts; keep requests out of app startup
+    import requests
 
     headers = {
-        "User-Agent": "Heatwave-Decision-Support/1.0"
+        "User-Agent": USER_AGENT
     }
 
     try:
-        response = requests.get(
-            NOMINATIM_URL,
-            params=params,
-            headers=headers,
-            timeout=10
+        ticket = NOMINATIM_GUARD.before_call()
+    except UpstreamUnavailable as exc:
+        return _serve_stale(key, exc)
+
+    try:
+        with upstream_call("nominatim"):
+            response = requests.get(
+                NOMINATIM_URL,
+                params=_query_params(location),
+                headers=headers,
+                timeout=HTTP_TIMEOUT
+            )
+            response.raise_for_status()
+            data = response.json()
+    except (requests.RequestException, ValueError) as exc:
+        # Transient failure: don't cache it as "not found"
+        NOMINATIM_GUARD.record_error(exc, (requests.Timeout, requests.ConnectionError))
+        return _serve_stale(
+            key,
+            UpstreamUnavailable("nominatim", type(exc).__name__)
         )
-        response.raise_for_status()
-    except requests.RequestException:
-        return None
+    else:
+        NOMINATIM_GUARD.record_success()
+    finally:
+        # A probe that raised something unexpected must not leave
+        # the breaker stuck half-open
+        NOMINATIM_GUARD.release_probe(ticket)
 
-    data = response.json()
+    return _store_result(key, data)
 
-    if not data:
-        return None
 
-    return {
-        "latitude": float(data[0]["lat"]),
-        "longitude": float(data[0]["lon"]),
-        "display_name": data[0]["display_name"]
-    }
+async def geocode_location_async(location: str, max_wait: float | None = None):
+    """
+    Async variant of geocode_location using the shared pooled client.
+    Same cache, same return and error contract; cache backend I/O runs
+    off the event loop.
+
+    max_wait: how long to queue for a rate-limit token (default
+    NOMINATIM_MAX_WAIT; WAIT_FOR_TOKEN for batch and background work)
+    """
+
+    key = normalize_query(location)
+
+    cached = await _geocode_cache.get_async(key)
+    if cached is not MISSING:
+        return cached
+
+    return await _geocode_flight_async.do(
+        key,
+        lambda: _fetch_geocode_async(location, key, max_wait)
+    )
+
+
+async def _fetch_geocode_async(location: str, key: str, max_wait: float | None):
+    try:
+        ticket = await NOMINATIM_GUARD.before_call_async(max_wait)
+    except UpstreamUnavailable as exc:
+        return await _serve_stale_async(key, exc)
+
+    try:
+        with upstream_call("nominatim"):
+            response = await get_http_client().get(
+                NOMINATIM_URL,
+                params=_query_params(location)
+            )
+            response.raise_for_status()
+            data = response.json()
+    except (httpx.HTTPError, ValueError) as exc:
+        # Transient failure: don't cache it as "not found"
+        NOMINATIM_GUARD.record_error(exc, HTTPX_TRANSIENT_ERRORS)
+        return await _serve_stale_async(
+            key,
+            UpstreamUnavailable("nominatim", type(exc).__name__)
+        )
+    else:
+        NOMINATIM_GUARD.record_success()
+    finally:
+        # A probe that raised something unexpected must not leave
+        # the breaker stuck half-open
+        NOMINATIM_GUARD.release_probe(ticket)
+
+    return await _store_result_async(key, data)
+
+
+def geocode_cache_stats() -> dict:
+    """
+    Hit/miss counters for the geocoding cache.
+    """
+    return _geocode_cache.stats()
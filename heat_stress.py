@@ -0,0 +1,170 @@
+"""
+heat_stress.py
+
+Physically grounded heat-stress indices for the risk engine:
+- NWS heat index (Rothfusz regression with the NWS adjustments)
+- estimated WBGT (Australian Bureau of Meteorology approximation)
+
+Both depend only on air temperature and relative humidity, so each
+is precomputed once, on first use, into a 2-D table over a 0.1 °C x 1 %RH
+grid (Open-Meteo's own resolution). Classifying an hour is then one
+table lookup instead of evaluating the regression.
+"""
+
+from functools import lru_cache
+
+import numpy as np
+
+
+# Lookup grid: temperature (°C) rows, relative humidity (%) columns
+LUT_TEMP_MIN_C = -10.0
+LUT_TEMP_MAX_C = 60.0
+LUT_TEMP_STEP_C = 0.1
+LUT_HUMIDITY_MAX = 100
+
+# Heat index category bounds (°C); NWS "Extreme Caution" (90 °F),
+# "Danger" (103 °F) and "Extreme Danger" (125 °F)
+HEAT_INDEX_MODERATE_C = 32.2
+HEAT_INDEX_HIGH_C = 39.4
+HEAT_INDEX_EXTREME_C = 51.7
+
+# WBGT category bounds (°C); work/rest guidance for acclimatized
+# moderate activity (ISO 7243 / ACSM flag levels)
+WBGT_MODERATE_C = 28.0
+WBGT_HIGH_C = 31.0
+WBGT_EXTREME_C = 33.0
+
+# Added to the explanation of plans made with the wbgt engine: the
+# estimate takes no wind or radiation input, though forecasts have wind
+WBGT_ASSUMPTION = (
+    "WBGT is estimated from temperature and humidity only, assuming "
+    "full sun and light wind; wind or shade lowers the actual value."
+)
+
+
+# -------- Index formulas (vectorized) --------
+def heat_index_c(temperatures, humidities) -> np.ndarray:
+    """
+    NWS heat index, in °C.
+    https://www.wpc.ncep.noaa.gov/html/heatindex_equation.shtml
+    """
+
+    t = np.asarray(temperatures, dtype=np.float64) * 9 / 5 + 32
+    rh = np.asarray(humidities, dtype=np.float64)
+
+    # Steadman's simple form, used below 80 °F
+    simple = 0.5 * (t + 61.0 + (t - 68.0) * 1.2 + rh * 0.094)
+
+    hi = (
+        -42.379
+        + 2.04901523 * t
+        + 10.14333127 * rh
+        - 0.22475541 * t * rh
+        - 6.83783e-3 * t * t
+        - 5.481717e-2 * rh * rh
+        + 1.22874e-3 * t * t * rh
+        + 8.5282e-4 * t * rh * rh
+        - 1.99e-6 * t * t * rh * rh
+    )
+
+    # Dry-air and humid-air adjustments
+    dry = (rh < 13) & (t >= 80) & (t <= 112)
+    hi = np.where(
+        dry,
+        hi - (13 - rh) / 4 * np.sqrt(np.clip(17 - np.abs(t - 95), 0, None) / 17),
+        hi
+    )
+    humid = (rh > 85) & (t >= 80) & (t <= 87)
+    hi = np.where(humid, hi + (rh - 85) / 10 * (87 - t) / 5, hi)
+
+    hi = np.where((simple + t) / 2 < 80, simple, hi)
+
+    return (hi - 32) * 5 / 9
+
+
+def wbgt_estimate_c(temperatures, humidities) -> np.ndarray:
+    """
+    Estimated outdoor WBGT, in °C (Bureau of Meteorology approximation,
+    for moderately high radiation and light wind). Wind is not an
+    input, so breezy hours are overestimated (WBGT_ASSUMPTION).
+    http://www.bom.gov.au/info/thermal_stress/
+    """
+
+    t = np.asarray(temperatures, dtype=np.float64)
+    rh = np.asarray(humidities, dtype=np.float64)
+
+    # Water vapour pressure (hPa)
+    e = rh / 100 * 6.105 * np.exp(17.27 * t / (237.7 + t))
+
+    return 0.567 * t + 0.393 * e + 3.94
+
+
+def _codes_from_bounds(values: np.ndarray, moderate: float, high: float, extreme: float) -> np.ndarray:
+    codes = (values >= moderate).astype(np.int8)
+    codes += values >= high
+    codes += values >= extreme
+    return codes
+
+
+# -------- Lookup tables --------
+class HeatStressTable:
+    """
+    Risk codes (indexes into risk_engine.RISK_LEVELS) for one index,
+    precomputed over the temperature x humidity grid.
+    """
+
+    def __init__(self, index_fn, moderate: float, high: float, extreme: float):
+        rows = int(round((LUT_TEMP_MAX_C - LUT_TEMP_MIN_C) / LUT_TEMP_STEP_C)) + 1
+        temps = LUT_TEMP_MIN_C + np.arange(rows) * LUT_TEMP_STEP_C
+        hums = np.arange(LUT_HUMIDITY_MAX + 1)
+
+        values = index_fn(temps[:, None], hums[None, :])
+        self.codes = _codes_from_bounds(values, moderate, high, extreme)
+        self.values = values.astype(np.float32)
+
+        # Row-major flat view, indexed as row * width + humidity
+        self._flat_codes = self.codes.ravel()
+        self._width = LUT_HUMIDITY_MAX + 1
+
+    def classify(self, temperatures, humidities) -> np.ndarray:
+        """
+        Risk codes for temperature/humidity arrays of any (equal) shape.
+        Values outside the grid are clamped to its edges; missing
+        readings (NaN) classify as Safe, as in the threshold engine.
+        """
+
+        t = np.asarray(temperatures, dtype=np.float64)
+        h = np.asarray(humidities, dtype=np.float64)
+
+        missing = np.isnan(t) | np.isnan(h)
+        if missing.any():
+            t = np.where(missing, LUT_TEMP_MIN_C, t)
+            h = np.where(missing, 0, h)
+
+        index = np.rint((t - LUT_TEMP_MIN_C) / LUT_TEMP_STEP_C)
+        np.clip(index, 0, self.codes.shape[0] - 1, out=index)
+        index *= self._width
+        index += np.clip(np.rint(h), 0, LUT_HUMIDITY_MAX)
+
+        return self._flat_codes.take(index.astype(np.intp))
+
+
+# Built on first use; the default threshold engine never needs them
+@lru_cache(maxsize=None)
+def heat_index_table() -> HeatStressTable:
+    return HeatStressTable(
+        heat_index_c,
+        HEAT_INDEX_MODERATE_C,
+        HEAT_INDEX_HIGH_C,
+        HEAT_INDEX_EXTREME_C
+    )
+
+
+@lru_cache(maxsize=None)
+def wbgt_table() -> HeatStressTable:
+    return HeatStressTable(
+        wbgt_estimate_c,
+        WBGT_MODERATE_C,
+        WBGT_HIGH_C,
+        WBGT_EXTREME_C
+    )
@@ -0,0 +1,163 @@
+"""
+hourly_forecast.py
+
+Compact columnar container for hourly forecast data.
+Keeps Open-Meteo's column layout in typed arrays from download
+through risk analysis; per-hour dicts are only built at the
+response boundary (to_dicts).
+
+Missing hours (null in the upstream response) are stored as NaN and
+turned back into None on the way out (missing_as_none), since NaN
+is not valid JSON.
+
+Values leaving the arrays are boxed once per distinct value and
+shared (_shared_values), so per-request results built from a cached
+window hold no new floats, as with the raw upstream lists.
+"""
+
+from array import array
+from bisect import bisect_left, bisect_right
+
+
+def _typed_column(values: list) -> array:
+    """
+    Pack a column into a typed array.
+    Integral columns (e.g. humidity) stay integral so values
+    render exactly as Open-Meteo sent them.
+    """
+
+    if all(type(v) is int for v in values):
+        return array("l", values)
+
+    return array("d", (float("nan") if v is None else v for v in values))
+
+
+# Forecast values repeat (0.1 resolution), so a few hundred shared
+# floats cover every window; past the limit values are boxed afresh
+_shared_values = {}
+_SHARED_VALUES_LIMIT = 4096
+
+
+def missing_as_none(values) -> list:
+    """
+    Column values as a list, with missing hours (NaN) as None.
+    Returns the input unchanged if it is a list without gaps.
+    Floats from arrays are the shared objects in _shared_values.
+    """
+
+    if isinstance(values, list):
+        # NaN is the only value not equal to itself
+        if any(v != v for v in values):
+            return [None if v != v else v for v in values]
+        return values
+
+    values = values.tolist() if hasattr(values, "tolist") else list(values)
+    if not values or type(values[0]) is not float:
+        return values
+
+    if len(_shared_values) < _SHARED_VALUES_LIMIT:
+        share = _shared_values.setdefault
+    else:
+        share = _shared_values.get
+
+    return [None if v != v else share(v, v) for v in values]
+
+
+def max_present(values: list):
+    """
+    Largest non-missing value rounded to 0.1, or None if there is none.
+    """
+    if None in values:
+        values = [v for v in values if v is not None]
+    return round(max(values), 1) if values else None
+
+
+class HourlyForecast:
+    """
+    Hourly forecast columns for one grid cell.
+
+    times are ISO local times ("YYYY-MM-DDTHH:MM"), sorted ascending.
+    generation is the Unix time of the upstream model run the data
+    comes from (None when unknown).
+    """
+
+    __slots__ = ("times", "temperature", "humidity", "wind_speed", "generation")
+
+    def __init__(
+        self,
+        times: list,
+        temperature: array,
+        humidity: array,
+        wind_speed: array,
+        generation: float | None = None
+    ):
+        self.times = times
+        self.temperature = temperature
+        self.humidity = humidity
+        self.wind_speed = wind_speed
+        self.generation = generation
+
+    @classmethod
+    def from_open_meteo(cls, hourly: dict, generation: float | None = None) -> "HourlyForecast":
+        """
+        Build from an Open-Meteo "hourly" response block.
+        """
+        return cls(
+            times=list(hourly.get("time", [])),
+            temperature=_typed_column(hourly.get("temperature_2m", [])),
+            humidity=_typed_column(hourly.get("relativehumidity_2m", [])),
+            wind_speed=_typed_column(hourly.get("windspeed_10m", [])),
+            generation=generation
+        )
+
+    def __len__(self) -> int:
+        return len(self.times)
+
+    def __getstate__(self):
+        return (self.times, self.temperature, self.humidity, self.wind_speed, self.generation)
+
+    def __setstate__(self, state):
+        self.times, self.temperature, self.humidity, self.wind_speed, self.generation = state
+
+    def _slice(self, start: int, end: int) -> "HourlyForecast":
+        return HourlyForecast(
+            self.times[start:end],
+            self.temperature[start:end],
+            self.humidity[start:end],
+            self.wind_speed[start:end],
+            self.generation
+        )
+
+    def for_date(self, date: str) -> "HourlyForecast":
+        """
+        Hours of one date (YYYY-MM-DD); empty if outside the window.
+        """
+        start = bisect_left(self.times, date)
+        end = bisect_right(self.times, f"{date}T99:99")
+        return self._slice(start, end)
+
+    def dates(self) -> list:
+        """
+        Distinct dates covered, in order.
+        """
+        return list(dict.fromkeys(t[:10] for t in self.times))
+
+    def to_dicts(self) -> list:
+        """
+        Per-hour dicts, as returned by fetch_hourly_forecast.
+        Missing hours are None.
+        """
+        return [
+            {
+                "time": time,
+                "temperature": temperature,
+                "humidity": humidity,
+                "wind_speed": wind_speed
+            }
+            for time, temperature, humidity, wind_speed in zip(
+                self.times,
+                missing_as_none(self.temperature),
+                missing_as_none(self.humidity),
+                missing_as_none(self.wind_speed)
+            )
+        ]
@@ -0,0 +1,68 @@
+"""
+http_client.py
+
+Shared async HTTP client for upstream calls (Nominatim, Open-Meteo).
+One pooled, keep-alive client per process, opened at app startup
+and closed on shutdown.
+"""
+
+import os
+
+import httpx
+
+
+USER_AGENT = "Heatwave-Decision-Support/1.0"
+
+HTTP_TIMEOUT = float(os.getenv("HTTP_TIMEOUT", 10))
+HTTP_MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", 100))
+HTTP_MAX_KEEPALIVE = int(os.getenv("HTTP_MAX_KEEPALIVE", 20))
+
+# Errors that mean the upstream itself is unreachable or too slow
+HTTPX_TRANSIENT_ERRORS = (
+    httpx.TimeoutException,
+    httpx.NetworkError,
+    httpx.RemoteProtocolError
+)
+
+_client: httpx.AsyncClient | None = None
+
+
+def _create_client() -> httpx.AsyncClient:
+    return httpx.AsyncClient(
+        timeout=HTTP_TIMEOUT,
+        headers={"User-Agent": USER_AGENT},
+        limits=httpx.Limits(
+            max_connections=HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=HTTP_MAX_KEEPALIVE
+        )
+    )
+
+
+async def start_http_client():
+    """
+    Open the shared client. Called from the app lifespan.
+    """
+    global _client
+    if _client is None:
+        _client = _create_client()
+
+
+async def close_http_client():
+    """
+    Close the shared client and its pooled connections.
+    """
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """
+    Return the shared client, creating it lazily outside the app
+    (e.g. from scripts running their own event loop).
+    """
+    global _client
+    if _client is None:
+        _client = _create_client()
+    return _client
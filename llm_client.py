@@ -4,11 +4,135 @@ llm_client.py
 Deterministic planning explanation engine.
 Context-aware, time-aware, and tone-safe.
 No external LLMs. No randomness.
+
+The explanation is a pure function of a few reduced inputs
+(framing, max temp, humidity, high-risk flag, safe-window bucket,
+focused hour), so it is assembled from precompiled fragments and
+memoized on those inputs.
 """
 
+import os
+from functools import lru_cache
+
 from nlp.confidence_guard import is_vague_activity
 
 
+EXPLANATION_CACHE_SIZE = int(os.getenv("EXPLANATION_CACHE_SIZE", 4096))
+
+# --- Context framing (LANGUAGE ONLY) ---
+_FRAMING = {
+    "vague": (
+        "This summary provides general heat-risk context for the selected "
+        "location and date based on available forecast data."
+    ),
+    "school": (
+        "This planning summary considers outdoor activities involving students, "
+        "where supervision, hydration, and heat exposure management are important."
+    ),
+    "construction": (
+        "This planning summary considers outdoor work conditions, "
+        "with attention to prolonged physical activity and heat stress."
+    ),
+    # General / work / unspecified activity
+    "general": (
+        "This planning summary considers general outdoor activity and work conditions, "
+        "with attention to comfort, hydration, and heat exposure."
+    )
+}
+
+# --- Time-focused context (OPTIONAL, FACTUAL ONLY) ---
+_HOUR_TEMPLATE = (
+    "Around {time}, forecast conditions indicate a temperature "
+    "of approximately {temp}°C with {risk_level} heat risk."
+)
+
+# --- Core forecast highlights ---
+_MAX_TEMP_TEMPLATE = (
+    "The maximum forecast temperature for the day is approximately {max_temp}°C."
+)
+_HUMIDITY_TEMPLATE = (
+    "Peak humidity levels are expected to reach around {peak_humidity}%."
+)
+
+# --- Risk interpretation (DAY-LEVEL) ---
+_HIGH_RISK_LINES = (
+    "Elevated heat risk is identified during certain periods of the day.",
+    "Activities during these hours may warrant additional heat mitigation planning."
+)
+_NO_HIGH_RISK_LINES = (
+    "No high-risk heat periods are identified across the day.",
+)
+
+# --- Safe window summarization ---
+_SAFE_WINDOW_LINES = {
+    "none": (),
+    "most": ("Lower-risk conditions are expected throughout most of the day.",),
+    "specific": ("Lower-risk conditions are more likely during specific time windows.",)
+}
+
+# --- Institutional disclaimer ---
+_DISCLAIMER = (
+    "This summary is intended to support planning decisions and does not "
+    "replace official weather advisories or institutional safety protocols."
+)
+
+
+def _safe_window_bucket(safe_window_count: int) -> str:
+    if not safe_window_count:
+        return "none"
+    if safe_window_count >= 20:
+        return "most"
+    return "specific"
+
+
+@lru_cache(maxsize=EXPLANATION_CACHE_SIZE)
+def _render_explanation(
+    framing: str,
+    max_temp: str | None,
+    peak_humidity: str | None,
+    has_high_risk: bool,
+    safe_bucket: str,
+    hour: tuple | None
+) -> str:
+    """
+    Assemble the explanation from its reduced inputs.
+    Numbers arrive pre-formatted so 38 and 38.0 never share an entry.
+    """
+
+    explanation_lines = [_FRAMING[framing], ""]
+
+    if hour is not None:
+        time_label, temp, risk_level = hour
+        explanation_lines.append(
+            _HOUR_TEMPLATE.format(time=time_label, temp=temp, risk_level=risk_level)
+        )
+        explanation_lines.append("")
+
+    if max_temp is not None:
+        explanation_lines.append(_MAX_TEMP_TEMPLATE.format(max_temp=max_temp))
+
+    if peak_humidity is not None:
+        explanation_lines.append(_HUMIDITY_TEMPLATE.format(peak_humidity=peak_humidity))
+
+    explanation_lines.append("")
+
+    explanation_lines.extend(
+        _HIGH_RISK_LINES if has_high_risk else _NO_HIGH_RISK_LINES
+    )
+    explanation_lines.append("")
+
+    explanation_lines.extend(_SAFE_WINDOW_LINES[safe_bucket])
+    explanation_lines.append("")
+
+    explanation_lines.append(_DISCLAIMER)
+
+    return "\n".join(explanation_lines)
+
+
+def _format_value(value) -> str | None:
+    return None if value is None else f"{value}"
+
+
 def generate_planning_explanation(
     summary_facts: dict,
     intent: str,
@@ -23,101 +147,51 @@ def generate_planning_explanation(
     - optional focused time context
     """
 
-    # --- Extract normalized summary facts ---
-    max_temp = summary_facts.get("max_temperature")
-    peak_humidity = summary_facts.get("peak_humidity")
-    high_risk_hours = summary_facts.get("high_risk_hours", [])
-    safe_windows = summary_facts.get("safe_windows", [])
-
     # --- Confidence guard ---
-    vague_input = is_vague_activity(activity_description)
-
-    explanation_lines = []
-
-    # --- Context framing (LANGUAGE ONLY) ---
-    if vague_input:
-        explanation_lines.append(
-            "This summary provides general heat-risk context for the selected "
-            "location and date based on available forecast data."
-        )
+    if is_vague_activity(activity_description):
+        framing = "vague"
+    elif intent in ("school", "construction"):
+        framing = intent
     else:
-        if intent == "school":
-            explanation_lines.append(
-                "This planning summary considers outdoor activities involving students, "
-                "where supervision, hydration, and heat exposure management are important."
-            )
-        elif intent == "construction":
-            explanation_lines.append(
-                "This planning summary considers outdoor work conditions, "
-                "with attention to prolonged physical activity and heat stress."
-            )
-        else:
-            # General / work / unspecified activity
-            explanation_lines.append(
-                "This planning summary considers general outdoor activity and work conditions, "
-                "with attention to comfort, hydration, and heat exposure."
-            )
-
-    explanation_lines.append("")
+        framing = "general"
 
-    # --- Time-focused context (OPTIONAL, FACTUAL ONLY) ---
+    hour = None
     if hour_context:
-        time_label = hour_context.get("time")
-        temp = hour_context.get("temperature")
-        risk_level = hour_context.get("risk_level")
-
-        explanation_lines.append(
-            f"Around {time_label[-5:]}, forecast conditions indicate a temperature "
-            f"of approximately {temp}°C with {risk_level.lower()} heat risk."
-        )
-
-        explanation_lines.append("")
-
-    # --- Core forecast highlights ---
-    if max_temp is not None:
-        explanation_lines.append(
-            f"The maximum forecast temperature for the day is approximately {max_temp}°C."
-        )
-
-    if peak_humidity is not None:
-        explanation_lines.append(
-            f"Peak humidity levels are expected to reach around {peak_humidity}%."
+        hour = (
+            hour_context.get("time")[-5:],
+            _format_value(hour_context.get("temperature")),
+            hour_context.get("risk_level").lower()
         )
 
-    explanation_lines.append("")
+    return _render_explanation(
+        framing,
+        _format_value(summary_facts.get("max_temperature")),
+        _format_value(summary_facts.get("peak_humidity")),
+        bool(summary_facts.get("high_risk_hours", [])),
+        _safe_window_bucket(len(summary_facts.get("safe_windows", []))),
+        hour
+    )
 
-    # --- Risk interpretation (DAY-LEVEL) ---
-    if high_risk_hours:
-        explanation_lines.append(
-            "Elevated heat risk is identified during certain periods of the day."
-        )
-        explanation_lines.append(
-            "Activities during these hours may warrant additional heat mitigation planning."
-        )
-    else:
-        explanation_lines.append(
-            "No high-risk heat periods are identified across the day."
-        )
 
-    explanation_lines.append("")
+def generate_planning_explanations(plans) -> list:
+    """
+    Batch form: render explanations for many plans in one call.
 
-    # --- Safe window summarization ---
-    if safe_windows:
-        if len(safe_windows) >= 20:
-            explanation_lines.append(
-                "Lower-risk conditions are expected throughout most of the day."
-            )
-        else:
-            explanation_lines.append(
-                "Lower-risk conditions are more likely during specific time windows."
-            )
+    plans: iterable of dicts with the generate_planning_explanation
+           keyword arguments (summary_facts, intent, ...)
+    """
+    return [generate_planning_explanation(**plan) for plan in plans]
 
-    explanation_lines.append("")
 
-    # --- Institutional disclaimer ---
-    explanation_lines.append(
-        "This summary is intended to support planning decisions and does not "
-        "replace official weather advisories or institutional safety protocols."
-    )
+def explanation_cache_stats() -> dict:
+    info = _render_explanation.cache_info()
+    lookups = info.hits + info.misses
 
-    return "\n".join(explanation_lines)
+    return {
+        "name": "explanation",
+        "size": info.currsize,
+        "maxsize": info.maxsize,
+        "hits": info.hits,
+        "misses": info.misses,
+        "hit_ratio": round(info.hits / lookups, 3) if lookups else None
+    }
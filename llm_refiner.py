@@ -4,11 +4,25 @@ llm_refiner.py
 Optional LLM-based explanation elaboration using Bytez.
 LLM is strictly limited to language refinement.
 Fails safely to deterministic explanation.
+
+Refinement runs as a background stage: one long-lived model handle,
+refined text cached by content hash, and a strict latency budget
+after which callers get the deterministic text and can fetch the
+refined version later.
 """
 
+import asyncio
+import hashlib
+import json
+import logging
 import os
-from bytez import Bytez
+import threading
+import time
+
+from cache import MISSING, TTLCache
+
 
+logger = logging.getLogger(__name__)
 
 SYSTEM_PROMPT = (
     "You are a technical writing assistant.\n"
@@ -19,6 +33,122 @@ SYSTEM_PROMPT = (
     "If unsure, return the text unchanged."
 )
 
+REFINER_MODEL_NAME = os.getenv("LLM_REFINER_MODEL", "google/gemma-3-1b-it")
+
+# Opt-in for the API pipeline; refine_explanation_with_llm ignores it
+LLM_REFINEMENT_ENABLED = os.getenv("LLM_REFINEMENT_ENABLED", "0") == "1"
+
+# Seconds a request may wait for refinement before answering without it
+LLM_REFINEMENT_BUDGET = float(os.getenv("LLM_REFINEMENT_BUDGET", 0.25))
+
+_refined_cache = TTLCache(
+    name="refined",
+    maxsize=int(os.getenv("LLM_REFINEMENT_CACHE_SIZE", 1024)),
+    ttl=float(os.getenv("LLM_REFINEMENT_CACHE_TTL", 24 * 3600))
+)
+
+# Failed refinements are remembered this long (seconds) before retrying
+_failed_refinements = TTLCache(
+    name="refined_failed",
+    maxsize=int(os.getenv("LLM_REFINEMENT_CACHE_SIZE", 1024)),
+    ttl=float(os.getenv("LLM_REFINEMENT_RETRY_AFTER", 600))
+)
+
+_model = None
+_model_lock = threading.Lock()
+
+# Set once the Bytez SDK turned out not to be installed
+_sdk_missing = False
+
+# refinement key -> asyncio.Task still running in the background
+_inflight = {}
+
+
+class LocalStubModel:
+    """
+    Offline stand-in for the Bytez model handle, for tests and local runs.
+    Echoes the base explanation after an optional delay.
+    """
+
+    def __init__(self, delay: float = 0.0, prefix: str = "Refined: "):
+        self.delay = delay
+        self.prefix = prefix
+
+    class _Result:
+        def __init__(self, output, error=None):
+            self.output = output
+            self.error = error
+
+    def run(self, messages):
+        if self.delay:
+            time.sleep(self.delay)
+
+        base = messages[-1]["content"].split("Base explanation:\n", 1)[-1]
+        return self._Result(self.prefix + base)
+
+
+def set_refinement_model(model):
+    """
+    Install the model handle to use (e.g. LocalStubModel()),
+    or None to go back to the lazily created Bytez model.
+    """
+    global _model
+    with _model_lock:
+        _model = model
+
+
+def _get_model():
+    """
+    Long-lived model handle, created on first use.
+    Returns None when no API key is configured or the Bytez SDK is
+    not installed.
+    """
+    global _model, _sdk_missing
+
+    with _model_lock:
+        if _model is None:
+            api_key = os.getenv("BYTEZ_API_KEY")
+            if not api_key or _sdk_missing:
+                return None
+
+            # Imported lazily: the SDK is only needed once refinement is used
+            try:
+                from bytez import Bytez
+            except ImportError:
+                _sdk_missing = True
+                logger.warning("bytez is not installed; LLM refinement is unavailable")
+                return None
+
+            _model = Bytez(api_key).model(REFINER_MODEL_NAME)
+
+        return _model
+
+
+def refinement_key(base_explanation: str, decision: dict, summary_facts: dict) -> str:
+    payload = json.dumps(
+        [base_explanation, decision, summary_facts],
+        sort_keys=True,
+        default=str
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _build_messages(base_explanation: str, decision: dict, summary_facts: dict) -> list:
+    user_prompt = (
+        f"Decision verdict: {decision.get('verdict')}\n"
+        f"Decision reason: {decision.get('reason')}\n\n"
+        f"Summary facts:\n"
+        f"- Max temperature: {summary_facts.get('max_temperature')}°C\n"
+        f"- Peak humidity: {summary_facts.get('peak_humidity')}%\n"
+        f"- High-risk hours: {summary_facts.get('high_risk_hours')}\n\n"
+        f"Base explanation:\n{base_explanation}"
+    )
+
+    return [
+        {"role": "system", "content": SYSTEM_PROMPT},
+        {"role": "user", "content": user_prompt}
+    ]
+
 
 def refine_explanation_with_llm(
     base_explanation: str,
@@ -30,37 +160,122 @@ def refine_explanation_with_llm(
     Deterministic output remains the source of truth.
     """
 
-    api_key = os.getenv("BYTEZ_API_KEY")
-    if not api_key:
+    key = refinement_key(base_explanation, decision, summary_facts)
+
+    cached = _refined_cache.get(key)
+    if cached is not MISSING:
+        return cached
+
+    model = _get_model()
+    if model is None:
         return base_explanation
 
     try:
-        sdk = Bytez(api_key)
-        model = sdk.model("google/gemma-3-1b-it")
-
-
-        user_prompt = (
-            f"Decision verdict: {decision.get('verdict')}\n"
-            f"Decision reason: {decision.get('reason')}\n\n"
-            f"Summary facts:\n"
-            f"- Max temperature: {summary_facts.get('max_temperature')}°C\n"
-            f"- Peak humidity: {summary_facts.get('peak_humidity')}%\n"
-            f"- High-risk hours: {summary_facts.get('high_risk_hours')}\n\n"
-            f"Base explanation:\n{base_explanation}"
+        result = model.run(
+            _build_messages(base_explanation, decision, summary_facts)
         )
 
-        messages = [
-            {"role": "system", "content": SYSTEM_PROMPT},
-            {"role": "user", "content": user_prompt}
-        ]
-
-        result = model.run(messages)
-
         if result.error or not result.output:
+            _failed_refinements.set(key, True)
             return base_explanation
 
-        return result.output.strip() + "\n\n[LLM REFINEMENT ACTIVE]"
-
+        refined = result.output.strip() + "\n\n[LLM REFINEMENT ACTIVE]"
 
     except Exception:
+        _failed_refinements.set(key, True)
         return base_explanation
+
+    _refined_cache.set(key, refined)
+    return refined
+
+
+def refinement_available() -> bool:
+    return LLM_REFINEMENT_ENABLED and _get_model() is not None
+
+
+def get_refined_explanation(key: str) -> str | None:
+    """
+    Refined text for a refinement key, or None if not (yet) available.
+    """
+    cached = _refined_cache.get(key)
+    return None if cached is MISSING else cached
+
+
+def refinement_failed(key: str) -> bool:
+    """
+    True if refinement for this key failed recently; it is not
+    retried until LLM_REFINEMENT_RETRY_AFTER has passed.
+    """
+    return _failed_refinements.get(key) is not MISSING
+
+
+def start_refinement(
+    base_explanation: str,
+    decision: dict,
+    summary_facts: dict
+) -> asyncio.Task:
+    """
+    Start (or join) background refinement for this content.
+    The blocking SDK call runs in a worker thread.
+    """
+
+    key = refinement_key(base_explanation, decision, summary_facts)
+
+    task = _inflight.get(key)
+    if task is None:
+        task = asyncio.ensure_future(asyncio.to_thread(
+            refine_explanation_with_llm,
+            base_explanation,
+            decision,
+            summary_facts
+        ))
+        _inflight[key] = task
+        task.add_done_callback(lambda _: _inflight.pop(key, None))
+
+    return task
+
+
+async def refine_within_budget(
+    base_explanation: str,
+    decision: dict,
+    summary_facts: dict,
+    budget: float | None = None
+) -> str | None:
+    """
+    Refined text if it is cached or arrives within the latency budget,
+    otherwise None. Refinement keeps running in the background either way.
+    """
+
+    key = refinement_key(base_explanation, decision, summary_facts)
+
+    refined = get_refined_explanation(key)
+    if refined is not None or refinement_failed(key):
+        return refined
+
+    task = start_refinement(base_explanation, decision, summary_facts)
+    budget = LLM_REFINEMENT_BUDGET if budget is None else budget
+
+    try:
+        refined = await asyncio.wait_for(asyncio.shield(task), budget)
+    except asyncio.TimeoutError:
+        return None
+
+    # Failed refinements fall back to the base text; don't report those
+    return refined if refined != base_explanation else None
+
+
+def refinement_status(key: str) -> str:
+    """
+    "ready" | "pending" | "failed" | "unavailable"
+    """
+    if get_refined_explanation(key) is not None:
+        return "ready"
+    if key in _inflight:
+        return "pending"
+    if refinement_failed(key):
+        return "failed"
+    return "unavailable"
+
+
+def refinement_cache_stats() -> dict:
+    return _refined_cache.stats()
@@ -1,37 +1,113 @@
 # main.py
 
-from fastapi import FastAPI, HTTPException
+import json
+import math
+from contextlib import asynccontextmanager
+from typing import Annotated, Literal
+
+from fastapi import FastAPI, HTTPException, Path, Request
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse, HTMLResponse
+from starlette.convertors import Convertor, register_url_convertor
+from fastapi.responses import (
+    HTMLResponse,
+    JSONResponse,
+    PlainTextResponse,
+    Response,
+    StreamingResponse
+)
 
-from schemas import PlanningRequest
-from weather_client import fetch_hourly_forecast
-from geocoding_client import geocode_location
-from risk_engine import generate_risk_timeline, derive_planning_decision
-from llm_client import generate_planning_explanation
-from pdf_generator import generate_planning_pdf
-from nlp.intent_detector import detect_intent
+from schemas import (
+    PlanningRequest,
+    PlanningRangeRequest,
+    PlanningResponse,
+    BatchPlanningRequest,
+    BatchPlanningResponse
+)
+from responses import CompressionMiddleware, FastJSONResponse
+from static_assets import StaticAssets
+from cache_backends import backend_stats
+from weather_client import forecast_cache_stats, OPEN_METEO_GUARD
+from geocoding_client import geocode_cache_stats, NOMINATIM_GUARD
+from http_client import start_http_client, close_http_client
+from llm_client import explanation_cache_stats
+from llm_refiner import (
+    get_refined_explanation,
+    refinement_available,
+    refinement_cache_stats,
+    refinement_key,
+    refinement_status,
+    start_refinement
+)
+from prefetch import prefetch_status, start_prefetch, stop_prefetch, tile_cache_stats
+from singleflight import singleflight_stats
+from warmup import save_warm_state, warm_up
+from upstream_guard import UpstreamUnavailable
+from metrics import (
+    ServerTimingMiddleware,
+    SERVER_TIMING_ENABLED,
+    register_cache,
+    render_prometheus,
+    stage
+)
+from planning_service import (
+    PlanNotModified,
+    build_plan,
+    build_plans_batch,
+    check_not_modified,
+    get_cached_plan,
+    get_cached_plan_async,
+    plan_cache_headers,
+    plan_cache_stats,
+    shape_plan,
+    stream_range_plans,
+    BATCH_MAX_ITEMS,
+    PLAN_ID_PATTERN
+)
+from pdf_generator import render_planning_pdf_cached, pdf_cache_stats
 
 import os
 
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # One pooled keep-alive client for all upstream calls
+    await start_http_client()
+    # Optional: restore cache snapshot, open upstream connections
+    await warm_up()
+    # Background tile warm-up for PREFETCH_LOCATIONS (if configured)
+    start_prefetch()
+    yield
+    await stop_prefetch()
+    save_warm_state()
+    await close_http_client()
+
+
 app = FastAPI(
     title="Heatwave Decision Support API",
-    version="1.2.0"
+    version="1.2.0",
+    lifespan=lifespan,
+    default_response_class=FastJSONResponse
 )
 
+# ?view= for planning responses (see planning_service.shape_plan)
+PlanView = Literal["full", "compact", "verdict"]
+
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 
 
+# Responses at least this large are gzip-compressed (0 disables)
+GZIP_MIN_SIZE = int(os.getenv("GZIP_MIN_SIZE", 1000))
+
+
 # -------- UI SERVING --------
+# Loaded and precompressed once; STATIC_RELOAD=1 picks up edits
+STATIC_ASSETS = StaticAssets(os.path.join(BASE_DIR, "static"))
+
+
 @app.get("/ui", response_class=HTMLResponse)
-def serve_ui():
-    with open(
-        os.path.join(BASE_DIR, "static", "index.html"),
-        "r",
-        encoding="utf-8"
-    ) as f:
-        return f.read()
+def serve_ui(request: Request):
+    return STATIC_ASSETS.response("index.html", request)
 
 
 # -------- CORS --------
@@ -42,22 +118,54 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# -------- COMPRESSION --------
+if GZIP_MIN_SIZE:
+    app.add_middleware(
+        CompressionMiddleware,
+        minimum_size=GZIP_MIN_SIZE,
+        exclude_paths=("/ui", "/stream", "/pdf")
+    )
+
+# -------- METRICS --------
+if SERVER_TIMING_ENABLED:
+    app.add_middleware(ServerTimingMiddleware)
+
+register_cache("geocode", geocode_cache_stats)
+register_cache("forecast", forecast_cache_stats)
+register_cache("plan", plan_cache_stats)
+register_cache("pdf", pdf_cache_stats)
+register_cache("explanation", explanation_cache_stats)
+register_cache("refined", refinement_cache_stats)
+register_cache("tile", tile_cache_stats)
 
-def find_hour_context(risk_timeline: list, time_str: str | None):
-    """
-    Find the risk entry closest to the requested hour.
-    Expected time_str format: HH:MM
-    """
-    if not time_str:
-        return None
 
-    target_hour = time_str.split(":")[0]
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics_endpoint():
+    return PlainTextResponse(
+        render_prometheus(),
+        media_type="text/plain; version=0.0.4"
+    )
+
+
+# -------- UPSTREAM ERRORS --------
+@app.exception_handler(UpstreamUnavailable)
+async def upstream_unavailable_handler(request: Request, exc: UpstreamUnavailable):
+    # Distinct from 404 "not found": the answer is unknown, retry later
+    headers = {}
+    if exc.retry_after is not None:
+        headers["Retry-After"] = str(math.ceil(exc.retry_after))
+
+    return JSONResponse(
+        status_code=503,
+        content={"detail": str(exc)},
+        headers=headers
+    )
 
-    for entry in risk_timeline:
-        if entry["time"].endswith(f"{target_hour}:00"):
-            return entry
 
-    return None
+# -------- CONDITIONAL REQUESTS --------
+@app.exception_handler(PlanNotModified)
+async def plan_not_modified_handler(request: Request, exc: PlanNotModified):
+    return Response(status_code=304, headers=exc.headers)
 
 
 # -------- HEALTH CHECK --------
@@ -66,118 +174,214 @@ def health_check():
     return {"status": "ok"}
 
 
-# -------- MAIN JSON ENDPOINT --------
-@app.post("/heatwave/planning")
-def generate_planning_insight(request: PlanningRequest):
-    # --- Geocode location ---
-    geo = geocode_location(request.location)
-    if not geo:
-        raise HTTPException(status_code=404, detail="Location not found")
-
-    # --- Fetch forecast ---
-    forecast = fetch_hourly_forecast(
-        geo["latitude"],
-        geo["longitude"],
-        request.date
-    )
-    if not forecast:
-        raise HTTPException(status_code=404, detail="No forecast data available")
+# -------- CACHE STATS --------
+@app.get("/cache/stats")
+def cache_stats():
+    return {
+        "geocode": geocode_cache_stats(),
+        "forecast": forecast_cache_stats(),
+        "plan": plan_cache_stats(),
+        "pdf": pdf_cache_stats(),
+        "explanation": explanation_cache_stats(),
+        "refined": refinement_cache_stats(),
+        "tile": tile_cache_stats(),
+        "singleflight": singleflight_stats(),
+        "backends": backend_stats()
+    }
 
-    # --- NLP intent detection ---
-    intent = detect_intent(request.activity_description)
 
-    # --- Risk analysis ---
-    result = generate_risk_timeline(forecast)
+# -------- UPSTREAM STATUS --------
+@app.get("/upstream/status")
+def upstream_status():
+    return {
+        "nominatim": NOMINATIM_GUARD.stats(),
+        "open_meteo": OPEN_METEO_GUARD.stats()
+    }
+
+
+# -------- PREFETCH STATUS --------
+@app.get("/prefetch/status")
+def prefetch_status_endpoint():
+    return prefetch_status()
 
-    # --- Planning decision ---
-    decision = derive_planning_decision(
-        risk_timeline=result["risk_timeline"],
-        intent=intent
-    )
 
-    # --- Optional time focus ---
-    hour_context = find_hour_context(
-        result["risk_timeline"],
-        request.time
+# -------- MAIN JSON ENDPOINT --------
+# Plans are plain JSON-ready dicts: returning them as a FastJSONResponse
+# skips per-request model validation; response_model documents the shape.
+# Dashboards poll this: responses carry an ETag that only changes with
+# the forecast model run, and If-None-Match answers 304 without
+# recomputing the plan.
+@app.post("/heatwave/planning", response_model=PlanningResponse)
+async def generate_planning_insight(
+    request: PlanningRequest,
+    http_request: Request,
+    view: PlanView = "full"
+):
+    plan = await build_plan(
+        request,
+        view,
+        http_request.headers.get("if-none-match")
     )
 
-    # --- Deterministic explanation (SOURCE OF TRUTH) ---
-    explanation = generate_planning_explanation(
-        summary_facts=result["summary_facts"],
-        intent=intent,
-        activity_description=request.activity_description,
-        hour_context=hour_context
+    return FastJSONResponse(
+        shape_plan(plan, view),
+        headers=plan_cache_headers(plan["plan_id"], plan.get("forecast_generation"), view)
     )
 
-    return {
-        "location": geo["display_name"],
-        "intent": intent,
-        "decision": decision,
-        "focused_time": request.time,
-        "focused_hour_context": hour_context,
-        "risk_timeline": result["risk_timeline"],
-        "summary_facts": result["summary_facts"],
-        "planning_explanation": explanation
-    }
 
+# -------- BATCH ENDPOINT --------
+@app.post("/heatwave/planning/batch", response_model=BatchPlanningResponse)
+async def generate_planning_batch(batch: BatchPlanningRequest, view: PlanView = "full"):
+    if len(batch.requests) > BATCH_MAX_ITEMS:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Batch exceeds {BATCH_MAX_ITEMS} requests"
+        )
 
-# -------- PDF ENDPOINT --------
-@app.post("/heatwave/planning/pdf")
-def generate_planning_pdf_endpoint(request: PlanningRequest):
-    # --- Geocode location ---
-    geo = geocode_location(request.location)
-    if not geo:
-        raise HTTPException(status_code=404, detail="Location not found")
-
-    # --- Fetch forecast ---
-    forecast = fetch_hourly_forecast(
-        geo["latitude"],
-        geo["longitude"],
-        request.date
-    )
-    if not forecast:
-        raise HTTPException(status_code=404, detail="No forecast data available")
+    items = await build_plans_batch(batch.requests, view)
 
-    # --- NLP intent ---
-    intent = detect_intent(request.activity_description)
+    return FastJSONResponse({
+        "count": len(items),
+        "failed": sum(1 for item in items if item["error"]),
+        "items": items
+    })
 
-    # --- Risk analysis ---
-    result = generate_risk_timeline(forecast)
 
-    # --- Planning decision ---
-    decision = derive_planning_decision(
-        risk_timeline=result["risk_timeline"],
-        intent=intent
-    )
+# -------- STREAMING MULTI-DAY ENDPOINT --------
+@app.post("/heatwave/planning/stream")
+async def stream_planning_days(
+    request: PlanningRangeRequest,
+    format: Literal["ndjson", "sse"] = "ndjson"
+):
+    days = await stream_range_plans(request)
 
-    # --- Optional time focus ---
-    hour_context = find_hour_context(
-        result["risk_timeline"],
-        request.time
-    )
+    if format == "sse":
+        async def events():
+            async for day in days:
+                yield f"event: day\ndata: {json.dumps(day)}\n\n"
+            yield "event: end\ndata: {}\n\n"
+
+        return StreamingResponse(events(), media_type="text/event-stream")
+
+    async def lines():
+        async for day in days:
+            yield json.dumps(day) + "\n"
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+
+# -------- CACHED PLAN LOOKUP --------
+class PlanIdConvertor(Convertor):
+    """
+    {plan_id:plan_id} only matches real plan IDs, so GET on sibling
+    routes (/heatwave/planning/pdf, /batch, /stream) answers 405
+    instead of "Plan not found".
+    """
+
+    regex = PLAN_ID_PATTERN
+
+    def convert(self, value: str) -> str:
+        return value
+
+    def to_string(self, value: str) -> str:
+        return value
+
+
+register_url_convertor("plan_id", PlanIdConvertor())
+
+# Documents the format in the OpenAPI schema
+PlanId = Annotated[str, Path(pattern=f"^{PLAN_ID_PATTERN}$")]
+
+
+def _require_cached_plan(plan_id: str) -> dict:
+    record = get_cached_plan(plan_id)
+    if record is None:
+        raise HTTPException(status_code=404, detail="Plan not found or expired")
+    return record
 
-    # --- Deterministic explanation ---
-    explanation = generate_planning_explanation(
-        summary_facts=result["summary_facts"],
-        intent=intent,
-        activity_description=request.activity_description,
-        hour_context=hour_context
+
+async def _require_cached_plan_async(plan_id: str) -> dict:
+    record = await get_cached_plan_async(plan_id)
+    if record is None:
+        raise HTTPException(status_code=404, detail="Plan not found or expired")
+    return record
+
+
+@app.get("/heatwave/planning/{plan_id:plan_id}", response_model=PlanningResponse)
+def get_planning_insight(plan_id: PlanId, http_request: Request, view: PlanView = "full"):
+    plan = _require_cached_plan(plan_id)["plan"]
+    generation = plan.get("forecast_generation")
+
+    check_not_modified(plan_id, generation, view, http_request.headers.get("if-none-match"))
+
+    return FastJSONResponse(
+        shape_plan(plan, view),
+        headers=plan_cache_headers(plan_id, generation, view)
     )
 
-    file_path = "heatwave_planning_summary.pdf"
 
-    generate_planning_pdf(
-        file_path=file_path,
-        location=geo["display_name"],
-        date=request.date,
-        summary_facts=result["summary_facts"],
-        decision=decision,
-        explanation=explanation,
-        intent=intent
+@app.get("/heatwave/planning/{plan_id:plan_id}/refined")
+async def get_refined_planning_explanation(plan_id: PlanId):
+    plan = (await _require_cached_plan_async(plan_id))["plan"]
+
+    if not refinement_available():
+        return {"plan_id": plan_id, "status": "disabled", "refined_explanation": None}
+
+    key = refinement_key(
+        plan["planning_explanation"],
+        plan["decision"],
+        plan["summary_facts"]
     )
 
-    return FileResponse(
-        path=file_path,
+    status = refinement_status(key)
+    if status == "unavailable":
+        # Never run or expired: start it in the background. Recent
+        # failures are reported as "failed" until their retry delay ends.
+        start_refinement(
+            plan["planning_explanation"],
+            plan["decision"],
+            plan["summary_facts"]
+        )
+        status = "pending"
+
+    return {
+        "plan_id": plan_id,
+        "status": status,
+        "refined_explanation": get_refined_explanation(key)
+    }
+
+
+# -------- PDF ENDPOINTS --------
+async def _render_pdf_response(date: str, plan: dict):
+    # ReportLab is blocking; keep it off the event loop
+    with stage("pdf_render"):
+        pdf_bytes = await run_in_threadpool(
+            render_planning_pdf_cached,
+            location=plan["location"],
+            date=date,
+            summary_facts=plan["summary_facts"],
+            decision=plan["decision"],
+            explanation=plan["planning_explanation"],
+            intent=plan["intent"]
+        )
+
+    return Response(
+        content=pdf_bytes,
         media_type="application/pdf",
-        filename="heatwave_planning_summary.pdf"
+        headers={
+            "Content-Disposition":
+                'attachment; filename="heatwave_planning_summary.pdf"'
+        }
     )
+
+
+@app.post("/heatwave/planning/pdf")
+async def generate_planning_pdf_endpoint(request: PlanningRequest):
+    plan = await build_plan(request)
+    return await _render_pdf_response(request.date, plan)
+
+
+@app.get("/heatwave/planning/{plan_id:plan_id}/pdf")
+async def get_planning_pdf(plan_id: PlanId):
+    record = await _require_cached_plan_async(plan_id)
+    return await _render_pdf_response(record["date"], record["plan"])
@@ -0,0 +1,244 @@
+"""
+metrics.py
+
+Lightweight timing and counters for the planning pipeline,
+exported in Prometheus text format and optionally as a
+Server-Timing response header.
+
+Disabled (METRICS_ENABLED=0), every hook is a shared no-op.
+"""
+
+import contextvars
+import os
+import threading
+import time
+from contextlib import nullcontext
+
+
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "1") == "1"
+SERVER_TIMING_ENABLED = METRICS_ENABLED and os.getenv("SERVER_TIMING", "0") == "1"
+
+# Seconds; covers sub-millisecond CPU stages up to upstream timeouts
+DEFAULT_BUCKETS = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+    0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0
+)
+
+# Per-request (name, seconds) list, read by the Server-Timing middleware
+_request_timings = contextvars.ContextVar("request_timings", default=None)
+
+_NOOP = nullcontext()
+
+
+class Histogram:
+    """
+    Cumulative-bucket histogram keyed by one label.
+    """
+
+    def __init__(self, name: str, help_text: str, label: str, buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.label = label
+        self.buckets = buckets
+
+        self._series = {}       # label value -> [bucket counts..., sum, count]
+        self._lock = threading.Lock()
+
+    def observe(self, label_value: str, seconds: float):
+        with self._lock:
+            series = self._series.get(label_value)
+            if series is None:
+                series = [0] * len(self.buckets) + [0.0, 0]
+                self._series[label_value] = series
+
+            for i, bound in enumerate(self.buckets):
+                if seconds <= bound:
+                    series[i] += 1
+
+            series[-2] += seconds
+            series[-1] += 1
+
+    def render(self) -> list:
+        lines = [
+            f"# HELP {self.name} {self.help_text}",
+            f"# TYPE {self.name} histogram"
+        ]
+
+        with self._lock:
+            for value, series in sorted(self._series.items()):
+                label = f'{self.label}="{value}"'
+                for bound, count in zip(self.buckets, series):
+                    lines.append(f'{self.name}_bucket{{{label},le="{bound}"}} {count}')
+                lines.append(f'{self.name}_bucket{{{label},le="+Inf"}} {series[-1]}')
+                lines.append(f"{self.name}_sum{{{label}}} {series[-2]:.6f}")
+                lines.append(f"{self.name}_count{{{label}}} {series[-1]}")
+
+        return lines
+
+
+class Counter:
+    """
+    Monotonic counter keyed by one label.
+    """
+
+    def __init__(self, name: str, help_text: str, label: str):
+        self.name = name
+        self.help_text = help_text
+        self.label = label
+
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, label_value: str, amount: int = 1):
+        with self._lock:
+            self._values[label_value] = self._values.get(label_value, 0) + amount
+
+    def render(self) -> list:
+        lines = [
+            f"# HELP {self.name} {self.help_text}",
+            f"# TYPE {self.name} counter"
+        ]
+
+        with self._lock:
+            for value, count in sorted(self._values.items()):
+                lines.append(f'{self.name}{{{self.label}="{value}"}} {count}')
+
+        return lines
+
+
+STAGE_SECONDS = Histogram(
+    "heatwave_stage_duration_seconds",
+    "Duration of each planning pipeline stage.",
+    "stage"
+)
+UPSTREAM_SECONDS = Histogram(
+    "heatwave_upstream_request_duration_seconds",
+    "Latency of upstream HTTP calls.",
+    "upstream"
+)
+UPSTREAM_ERRORS = Counter(
+    "heatwave_upstream_errors_total",
+    "Failed upstream HTTP calls.",
+    "upstream"
+)
+
+# name -> zero-argument callable returning TTLCache.stats()-style dicts
+_cache_sources = {}
+
+
+# -------- Timing hooks --------
+class _Timer:
+    __slots__ = ("name", "histogram", "errors", "start")
+
+    def __init__(self, name: str, histogram: Histogram, errors: Counter | None = None):
+        self.name = name
+        self.histogram = histogram
+        self.errors = errors
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        elapsed = time.perf_counter() - self.start
+        self.histogram.observe(self.name, elapsed)
+
+        if exc_type is not None and self.errors is not None:
+            self.errors.inc(self.name)
+
+        timings = _request_timings.get()
+        if timings is not None:
+            timings.append((self.name, elapsed))
+
+        return False
+
+
+def stage(name: str):
+    """
+    Time one pipeline stage:  with stage("geocode"): ...
+    """
+    return _Timer(name, STAGE_SECONDS) if METRICS_ENABLED else _NOOP
+
+
+def upstream_call(upstream: str):
+    """
+    Time one upstream HTTP call; exceptions are counted as errors.
+    """
+    if not METRICS_ENABLED:
+        return _NOOP
+    return _Timer(upstream, UPSTREAM_SECONDS, UPSTREAM_ERRORS)
+
+
+def register_cache(name: str, stats_fn):
+    """
+    Expose a cache's hit/miss counters on /metrics.
+    """
+    _cache_sources[name] = stats_fn
+
+
+# -------- Export --------
+def _render_caches() -> list:
+    hits = [
+        "# HELP heatwave_cache_hits_total Cache lookups served from cache.",
+        "# TYPE heatwave_cache_hits_total counter"
+    ]
+    misses = [
+        "# HELP heatwave_cache_misses_total Cache lookups not found or expired.",
+        "# TYPE heatwave_cache_misses_total counter"
+    ]
+    ratio = [
+        "# HELP heatwave_cache_hit_ratio Share of lookups served from cache.",
+        "# TYPE heatwave_cache_hit_ratio gauge"
+    ]
+
+    for name, stats_fn in sorted(_cache_sources.items()):
+        stats = stats_fn()
+        hits.append(f'heatwave_cache_hits_total{{cache="{name}"}} {stats["hits"]}')
+        misses.append(f'heatwave_cache_misses_total{{cache="{name}"}} {stats["misses"]}')
+        if stats.get("hit_ratio") is not None:
+            ratio.append(f'heatwave_cache_hit_ratio{{cache="{name}"}} {stats["hit_ratio"]}')
+
+    return hits + misses + ratio
+
+
+def render_prometheus() -> str:
+    lines = []
+    for metric in (STAGE_SECONDS, UPSTREAM_SECONDS, UPSTREAM_ERRORS):
+        lines.extend(metric.render())
+    lines.extend(_render_caches())
+    return "\n".join(lines) + "\n"
+
+
+# -------- Server-Timing --------
+class ServerTimingMiddleware:
+    """
+    ASGI middleware adding a Server-Timing header with the stages
+    timed while handling the request.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        timings = []
+        token = _request_timings.set(timings)
+
+        async def send_with_timing(message):
+            if message["type"] == "http.response.start" and timings:
+                value = ", ".join(
+                    f"{name};dur={seconds * 1000:.2f}"
+                    for name, seconds in timings
+                )
+                headers = list(message.get("headers", []))
+                headers.append((b"server-timing", value.encode("latin-1")))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _request_timings.reset(token)
@@ -0,0 +1,42 @@
+"""
+activity_classifier.py
+
+Batch classification of activity descriptions (bulk imports).
+One matcher pass per text yields both the intent and the vagueness flag.
+"""
+
+from nlp.matcher import ACTIVITY_MATCHER
+from nlp.intent_detector import detect_intent
+from nlp.confidence_guard import is_vague_activity
+
+
+def classify_activity(text: str) -> dict:
+    """
+    Returns:
+        {"intent": "school" | "construction" | "general", "vague": bool}
+    """
+
+    categories = ACTIVITY_MATCHER.match(text)
+
+    return {
+        "intent": detect_intent(text, categories),
+        "vague": is_vague_activity(text, categories)
+    }
+
+
+def classify_activities(texts) -> list:
+    """
+    Classify many activity descriptions at once, in input order.
+    Repeated descriptions are only matched once.
+    """
+
+    seen = {}
+    results = []
+
+    for text in texts:
+        result = seen.get(text)
+        if result is None:
+            result = seen[text] = classify_activity(text)
+        results.append(result)
+
+    return results
@@ -5,10 +5,15 @@ Detects vague or low-information activity descriptions.
 Used to keep planning language neutral and non-assumptive.
 """
 
-def is_vague_activity(text: str) -> bool:
+from nlp.matcher import ACTIVITY_MATCHER
+
+
+def is_vague_activity(text: str, categories: set | None = None) -> bool:
     """
     Returns True if the activity description is too vague
     to justify confident or specific language.
+
+    categories: precomputed ACTIVITY_MATCHER.match(text), if available
     """
 
     if not text:
@@ -21,24 +26,7 @@ def is_vague_activity(text: str) -> bool:
         return True
 
     # Common vague phrases
-    vague_phrases = [
-        "going out",
-        "just going out",
-        "long drive",
-        "roaming",
-        "hanging out",
-        "traveling",
-        "travelling",
-        "outing",
-        "trip",
-        "drive",
-        "plan",
-        "plans",
-        "going somewhere"
-    ]
-
-    for phrase in vague_phrases:
-        if phrase in text:
-            return True
-
-    return False
+    if categories is None:
+        categories = ACTIVITY_MATCHER.match(text)
+
+    return "vague" in categories
@@ -5,10 +5,15 @@ Lightweight, deterministic intent classification for activity context.
 This module does NOT decide risk. It only influences explanation language.
 """
 
-def detect_intent(text: str) -> str:
+from nlp.matcher import ACTIVITY_MATCHER, intent_from_categories
+
+
+def detect_intent(text: str, categories: set | None = None) -> str:
     """
     Detect high-level activity context from user-provided text.
 
+    categories: precomputed ACTIVITY_MATCHER.match(text), if available
+
     Returns:
         "school" | "construction" | "general"
     """
@@ -16,46 +21,8 @@ def detect_intent(text: str) -> str:
     if not text:
         return "general"
 
-    text = text.lower()
-
-    # --- School-related keywords ---
-    school_keywords = [
-        "school",
-        "student",
-        "students",
-        "children",
-        "class",
-        "teacher",
-        "teachers",
-        "college",
-        "campus",
-        "picnic",
-        "field trip",
-        "annual trip",
-        "excursion"
-    ]
-
-    # --- Construction / labor-related keywords ---
-    construction_keywords = [
-        "construction",
-        "site",
-        "labour",
-        "labor",
-        "worker",
-        "workers",
-        "contractor",
-        "shift",
-        "worksite",
-        "building work"
-    ]
-
-    for keyword in school_keywords:
-        if keyword in text:
-            return "school"
-
-    for keyword in construction_keywords:
-        if keyword in text:
-            return "construction"
-
-    # --- Default fallback ---
-    return "general"
+    if categories is None:
+        categories = ACTIVITY_MATCHER.match(text)
+
+    # School keywords take precedence; default fallback is "general"
+    return intent_from_categories(categories)
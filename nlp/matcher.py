@@ -0,0 +1,160 @@
+"""
+matcher.py
+
+Shared keyword matching for activity descriptions.
+All keyword sets are compiled once, at import, into a single
+word-level phrase table, so one scan over the text returns every
+matched category (intent keywords and vague phrases alike).
+
+Matching is whole-word: "class" matches "class" and "class room",
+never "classic". Plural endings are stripped from both keywords and
+text, so "contractors" still matches "contractor" and "classes"
+matches "class". Closed compounds are different words ("classroom",
+"labourer"), so those that should match are keywords themselves.
+"""
+
+import re
+
+
+# --- School-related keywords ---
+SCHOOL_KEYWORDS = (
+    "school",
+    "student",
+    "students",
+    "children",
+    "class",
+    "classroom",
+    "classmate",
+    "schoolchildren",
+    "schoolkid",
+    "preschool",
+    "teacher",
+    "teachers",
+    "college",
+    "campus",
+    "picnic",
+    "field trip",
+    "annual trip",
+    "excursion"
+)
+
+# --- Construction / labor-related keywords ---
+CONSTRUCTION_KEYWORDS = (
+    "construction",
+    "site",
+    "labour",
+    "labor",
+    "labourer",
+    "laborer",
+    "worker",
+    "workers",
+    "contractor",
+    "shift",
+    "worksite",
+    "building work"
+)
+
+# --- Common vague phrases ---
+VAGUE_PHRASES = (
+    "going out",
+    "just going out",
+    "long drive",
+    "roaming",
+    "hanging out",
+    "traveling",
+    "travelling",
+    "outing",
+    "trip",
+    "drive",
+    "plan",
+    "plans",
+    "going somewhere"
+)
+
+# Checked in order; the first matched intent wins
+INTENT_PRIORITY = ("school", "construction")
+
+_WORD = re.compile(r"[a-z0-9]+")
+
+
+def stem(word: str) -> str:
+    """
+    Strip a plural ending: "workers" -> "worker", "classes" -> "class",
+    "duties" -> "duty". Words ending in -ss, -us or -is are left alone.
+    """
+
+    if len(word) <= 3 or word[-1] != "s" or word.endswith(("ss", "us", "is")):
+        return word
+    if word.endswith("ies"):
+        return word[:-3] + "y"
+    if word.endswith(("sses", "xes", "ches", "shes")):
+        return word[:-2]
+    return word[:-1]
+
+
+def tokenize(text: str) -> list:
+    return [stem(word) for word in _WORD.findall(text.lower())]
+
+
+class KeywordMatcher:
+    """
+    Multi-pattern matcher over word sequences.
+
+    Phrases are stored by their token tuple; for each position in the
+    text only phrases starting with that word are looked up, so the
+    cost is one pass over the tokens regardless of keyword count.
+    """
+
+    def __init__(self, categories: dict):
+        self._phrases = {}          # token tuple -> frozenset of categories
+        self._longest_from = {}     # first token -> longest phrase length
+
+        for category, phrases in categories.items():
+            for phrase in phrases:
+                tokens = tuple(tokenize(phrase))
+                self._phrases[tokens] = self._phrases.get(tokens, frozenset()) | {category}
+                self._longest_from[tokens[0]] = max(
+                    self._longest_from.get(tokens[0], 0),
+                    len(tokens)
+                )
+
+    def match(self, text: str) -> set:
+        """
+        Return every category with at least one phrase in text.
+        """
+
+        if not text:
+            return set()
+
+        tokens = tokenize(text)
+        found = set()
+
+        for i, token in enumerate(tokens):
+            longest = self._longest_from.get(token)
+            if not longest:
+                continue
+
+            for length in range(1, longest + 1):
+                categories = self._phrases.get(tuple(tokens[i:i + length]))
+                if categories:
+                    found |= categories
+
+        return found
+
+    def match_many(self, texts) -> list:
+        match = self.match
+        return [match(text) for text in texts]
+
+
+ACTIVITY_MATCHER = KeywordMatcher({
+    "school": SCHOOL_KEYWORDS,
+    "construction": CONSTRUCTION_KEYWORDS,
+    "vague": VAGUE_PHRASES
+})
+
+
+def intent_from_categories(categories: set) -> str:
+    for intent in INTENT_PRIORITY:
+        if intent in categories:
+            return intent
+    return "general"
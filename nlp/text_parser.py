@@ -9,6 +9,20 @@ No guessing. No ML. No training.
 import re
 
 
+# Common patterns indicating destination (compiled once, tried in order)
+_LOCATION_PATTERNS = tuple(
+    re.compile(pattern, re.IGNORECASE)
+    for pattern in (
+        r"\bto\s+([A-Za-z\s]+)",
+        r"\bvisit\s+([A-Za-z\s]+)",
+        r"\bvisiting\s+([A-Za-z\s]+)",
+        r"\bgoing\s+to\s+([A-Za-z\s]+)",
+        r"\btrip\s+to\s+([A-Za-z\s]+)",
+        r"\bexcursion\s+to\s+([A-Za-z\s]+)"
+    )
+)
+
+
 def extract_location_hint(text: str) -> str | None:
     """
     Attempt to extract a location hint from free text.
@@ -26,18 +40,8 @@ def extract_location_hint(text: str) -> str | None:
 
     text = text.strip()
 
-    # Common patterns indicating destination
-    patterns = [
-        r"\bto\s+([A-Za-z\s]+)",
-        r"\bvisit\s+([A-Za-z\s]+)",
-        r"\bvisiting\s+([A-Za-z\s]+)",
-        r"\bgoing\s+to\s+([A-Za-z\s]+)",
-        r"\btrip\s+to\s+([A-Za-z\s]+)",
-        r"\bexcursion\s+to\s+([A-Za-z\s]+)"
-    ]
-
-    for pattern in patterns:
-        match = re.search(pattern, text, re.IGNORECASE)
+    for pattern in _LOCATION_PATTERNS:
+        match = pattern.search(text)
         if match:
             location = match.group(1).strip()
 
@@ -3,13 +3,29 @@ pdf_generator.py
 
 Formatted, institution-grade PDF generation.
 Text wrapping, spacing, and visual hierarchy handled explicitly.
+Rendered in memory; optionally cached by plan content hash.
+ReportLab is imported on first render, not at startup.
 """
 
-from reportlab.lib.pagesizes import A4
-from reportlab.pdfgen import canvas
-from reportlab.lib.units import cm
+import hashlib
+import json
+import os
+from io import BytesIO
+
 from textwrap import wrap
 
+from cache import MISSING, TTLCache
+
+
+# Rendered PDFs by content hash (PDF_CACHE_SIZE=0 disables)
+PDF_CACHE_SIZE = int(os.getenv("PDF_CACHE_SIZE", 128))
+
+_pdf_cache = TTLCache(
+    name="pdf",
+    maxsize=PDF_CACHE_SIZE,
+    ttl=float(os.getenv("PDF_CACHE_TTL", 900))
+)
+
 
 def draw_paragraph(c, text, x, y, max_width_chars=90, line_height=14):
     """
@@ -22,15 +38,24 @@ def draw_paragraph(c, text, x, y, max_width_chars=90, line_height=14):
     return y
 
 
-def generate_planning_pdf(
-    file_path: str,
+def render_planning_pdf(
     location: str,
     date: str,
     summary_facts: dict,
     decision: dict,
     explanation: str,
     intent: str
-):
+) -> bytes:
+    """
+    Render the planning summary PDF into memory and return its bytes.
+    """
+
+    # Imported lazily: ReportLab is slow to import and only PDF
+    # endpoints need it
+    from reportlab.lib.pagesizes import A4
+    from reportlab.lib.units import cm
+    from reportlab.pdfgen import canvas
+
     # ---- Context-aware title ----
     if intent == "school":
         title = "School Outdoor Heat Risk Planning Summary"
@@ -39,7 +64,8 @@ def generate_planning_pdf(
     else:
         title = "Outdoor Heat Risk Planning Summary"
 
-    c = canvas.Canvas(file_path, pagesize=A4)
+    buffer = BytesIO()
+    c = canvas.Canvas(buffer, pagesize=A4)
     width, height = A4
 
     x_margin = 2 * cm
@@ -128,3 +154,61 @@ def generate_planning_pdf(
     draw_paragraph(c, disclaimer, x_margin, y, max_width_chars=100, line_height=12)
 
     c.save()
+    return buffer.getvalue()
+
+
+def pdf_content_hash(**plan_fields) -> str:
+    """
+    Hash of everything that ends up in the rendered document.
+    """
+    payload = json.dumps(plan_fields, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def render_planning_pdf_cached(**plan_fields) -> bytes:
+    """
+    render_planning_pdf, reusing a previous rendering of identical content.
+    """
+
+    if not PDF_CACHE_SIZE:
+        return render_planning_pdf(**plan_fields)
+
+    key = pdf_content_hash(**plan_fields)
+
+    cached = _pdf_cache.get(key)
+    if cached is not MISSING:
+        return cached
+
+    pdf_bytes = render_planning_pdf(**plan_fields)
+    _pdf_cache.set(key, pdf_bytes)
+    return pdf_bytes
+
+
+def generate_planning_pdf(
+    file_path: str,
+    location: str,
+    date: str,
+    summary_facts: dict,
+    decision: dict,
+    explanation: str,
+    intent: str
+):
+    """
+    Render the planning summary and write it to file_path (for scripts).
+    """
+
+    pdf_bytes = render_planning_pdf(
+        location=location,
+        date=date,
+        summary_facts=summary_facts,
+        decision=decision,
+        explanation=explanation,
+        intent=intent
+    )
+
+    with open(file_path, "wb") as f:
+        f.write(pdf_bytes)
+
+
+def pdf_cache_stats() -> dict:
+    return _pdf_cache.stats()
@@ -0,0 +1,546 @@
+"""
+planning_service.py
+
+Async planning pipeline shared by the API endpoints:
+geocode -> forecast -> intent -> risk timeline -> decision -> explanation.
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import time
+from datetime import date as Date, timedelta
+
+from fastapi import HTTPException
+
+from cache import MISSING, TTLCache, normalize_query
+from schemas import PlanningRequest, PlanningRangeRequest
+from hourly_forecast import HourlyForecast
+from weather_client import FORECAST_UPDATE_INTERVAL, fetch_forecast_window_async
+from geocoding_client import geocode_location_async
+from risk_engine import derive_planning_decision, generate_risk_timeline_from_columns
+from risk_engine_vectorized import (
+    RISK_ENGINE,
+    generate_risk_timeline_columnar,
+    derive_planning_decision_columnar
+)
+from heat_stress import WBGT_ASSUMPTION
+from prefetch import get_tile_async
+from llm_client import generate_planning_explanation
+from llm_refiner import refinement_available, refine_within_budget
+from nlp.intent_detector import detect_intent
+from upstream_guard import WAIT_FOR_TOKEN, UpstreamUnavailable
+from metrics import stage
+from responses import etag_matches
+
+
+logger = logging.getLogger(__name__)
+
+# Upper bound on concurrent upstream lookups per batch
+BATCH_CONCURRENCY = int(os.getenv("BATCH_CONCURRENCY", 8))
+BATCH_MAX_ITEMS = int(os.getenv("BATCH_MAX_ITEMS", 500))
+
+# Seconds a batch lookup may queue for an upstream rate-limit token.
+# Unbounded by default: a cold batch of N new locations takes about
+# N seconds at Nominatim's 1 request/s instead of failing fast like
+# an interactive request (NOMINATIM_MAX_WAIT).
+BATCH_UPSTREAM_MAX_WAIT = float(os.getenv("BATCH_UPSTREAM_MAX_WAIT", WAIT_FOR_TOKEN))
+
+# Open-Meteo serves at most 16 days per forecast download
+RANGE_MAX_DAYS = 16
+
+# Response views: full timeline, columnar timeline, or verdict only
+PLAN_VIEWS = ("full", "compact", "verdict")
+
+# Computed plans are kept briefly so exports (PDF, ...) and repeated
+# submissions of the same request skip all upstream I/O.
+_plan_cache = TTLCache(
+    name="plan",
+    maxsize=int(os.getenv("PLAN_CACHE_SIZE", 1024)),
+    ttl=float(os.getenv("PLAN_CACHE_TTL", 900))
+)
+
+
+# Plan IDs are the first 16 hex digits of a SHA-256 (plan_id_for)
+PLAN_ID_PATTERN = "[0-9a-f]{16}"
+
+
+def plan_id_for(request: PlanningRequest) -> str:
+    """
+    Stable plan ID: hash of the request fields that influence the plan,
+    normalized the same way the pipeline reads them.
+    """
+
+    normalized = {
+        "location": normalize_query(request.location),
+        "date": request.date.strip(),
+        "time": request.time.strip() if request.time else None,
+        # Intent and vagueness checks are case-insensitive
+        "activity": (request.activity_description or "").lower().strip(),
+        "risk_model": request.risk_model or RISK_ENGINE
+    }
+
+    digest = hashlib.sha256(
+        json.dumps(normalized, sort_keys=True).encode("utf-8")
+    ).hexdigest()
+
+    return digest[:16]
+
+
+async def _remember_plan_async(request: PlanningRequest, plan: dict) -> dict:
+    plan_id = plan_id_for(request)
+    plan["plan_id"] = plan_id
+
+    await _plan_cache.set_async(plan_id, {"date": request.date, "plan": plan})
+    return plan
+
+
+def get_cached_plan(plan_id: str):
+    """
+    Look up a previously computed plan.
+
+    Returns:
+        {"date", "plan"} or None if unknown or expired
+    """
+    record = _plan_cache.get(plan_id)
+    return None if record is MISSING else record
+
+
+async def get_cached_plan_async(plan_id: str):
+    """
+    get_cached_plan for the event loop (shared backends block).
+    """
+    record = await _plan_cache.get_async(plan_id)
+    return None if record is MISSING else record
+
+
+def plan_cache_stats() -> dict:
+    return _plan_cache.stats()
+
+
+# -------- Conditional requests --------
+class PlanNotModified(Exception):
+    """
+    Raised by build_plan when the client's copy (If-None-Match) is
+    still current; carries the headers for the 304 response.
+    """
+
+    def __init__(self, headers: dict):
+        super().__init__("plan not modified")
+        self.headers = headers
+
+
+def plan_etag(plan_id: str, generation: float | None, view: str = "full") -> str | None:
+    """
+    ETag of a plan response. A plan only changes with the request
+    (plan_id) and the forecast model run it was computed from; without
+    a known model run there is nothing to validate against (None).
+
+    Weak, because the same tag is sent with gzip and identity bodies
+    (compression happens in middleware, after the tag is set).
+    """
+
+    if generation is None:
+        return None
+    return f'W/"{plan_id}-{int(generation)}-{view}"'
+
+
+def plan_cache_headers(plan_id: str, generation: float | None, view: str = "full") -> dict:
+    """
+    ETag, Cache-Control and Vary for a plan response (and its 304);
+    max-age runs until the next model run is expected to replace the
+    plan's forecast.
+    """
+
+    headers = {"Vary": "Accept-Encoding"}
+
+    etag = plan_etag(plan_id, generation, view)
+    if etag is None:
+        headers["Cache-Control"] = "private, max-age=0"
+        return headers
+
+    max_age = max(0, int(generation + FORECAST_UPDATE_INTERVAL - time.time()))
+    headers["ETag"] = etag
+    headers["Cache-Control"] = f"private, max-age={max_age}"
+    return headers
+
+
+def check_not_modified(
+    plan_id: str,
+    generation: float | None,
+    view: str,
+    if_none_match: str | None
+):
+    """
+    Raise PlanNotModified when if_none_match matches the plan's ETag.
+    """
+
+    etag = plan_etag(plan_id, generation, view)
+    if etag and if_none_match and etag_matches(if_none_match, etag):
+        raise PlanNotModified(plan_cache_headers(plan_id, generation, view))
+
+
+def find_hour_context(risk_timeline: list, time_str: str | None):
+    """
+    Find the risk entry closest to the requested hour.
+    Expected time_str format: HH:MM
+    """
+    if not time_str:
+        return None
+
+    target_hour = time_str.split(":")[0]
+
+    for entry in risk_timeline:
+        if entry["time"].endswith(f"{target_hour}:00"):
+            return entry
+
+    return None
+
+
+def compute_plan(
+    request: PlanningRequest,
+    geo: dict,
+    forecast: HourlyForecast | None,
+    tile: dict | None = None
+) -> dict:
+    """
+    CPU-only part of the pipeline, from a resolved location and
+    the forecast hours of the requested date.
+
+    Works on the forecast columns directly; per-hour dicts are only
+    built for the response's risk timeline. The threshold engine runs
+    the scalar code, which beats NumPy on a single day; the heat-stress
+    engines use the columnar one. With a prefetched tile
+    (prefetch.get_tile_async) the risk analysis is taken from it instead.
+    """
+
+    if tile is None and not forecast:
+        raise HTTPException(status_code=404, detail="No forecast data available")
+
+    # --- NLP intent detection ---
+    with stage("intent"):
+        intent = detect_intent(request.activity_description)
+
+    risk_model = request.risk_model or RISK_ENGINE
+
+    if tile is not None:
+        result = tile
+        decision = tile["decisions"][intent]
+        generation = tile.get("forecast_generation")
+    else:
+        generation = forecast.generation
+
+        if risk_model == "threshold":
+            # --- Risk analysis ---
+            with stage("risk_timeline"):
+                result = generate_risk_timeline_from_columns(
+                    forecast.times,
+                    forecast.temperature,
+                    forecast.humidity
+                )
+
+            # --- Planning decision ---
+            with stage("decision"):
+                decision = derive_planning_decision(result["risk_timeline"], intent)
+        else:
+            with stage("risk_timeline"):
+                result = generate_risk_timeline_columnar(
+                    forecast.times,
+                    forecast.temperature,
+                    forecast.humidity,
+                    risk_model
+                )
+
+            with stage("decision"):
+                decision = derive_planning_decision_columnar(
+                    forecast.times,
+                    forecast.temperature,
+                    intent,
+                    forecast.humidity,
+                    risk_model
+                )
+
+    # --- Optional time focus ---
+    hour_context = find_hour_context(
+        result["risk_timeline"],
+        request.time
+    )
+
+    # --- Deterministic explanation (SOURCE OF TRUTH) ---
+    with stage("explanation"):
+        explanation = generate_planning_explanation(
+            summary_facts=result["summary_facts"],
+            intent=intent,
+            activity_description=request.activity_description,
+            hour_context=hour_context
+        )
+
+    if risk_model == "wbgt":
+        explanation = f"{explanation} {WBGT_ASSUMPTION}"
+
+    return {
+        "location": geo["display_name"],
+        "intent": intent,
+        "risk_model": risk_model,
+        "forecast_generation": generation,
+        "decision": decision,
+        "focused_time": request.time,
+        "focused_hour_context": hour_context,
+        "risk_timeline": result["risk_timeline"],
+        "summary_facts": result["summary_facts"],
+        "planning_explanation": explanation
+    }
+
+
+async def build_plan(
+    request: PlanningRequest,
+    view: str = "full",
+    if_none_match: str | None = None
+) -> dict:
+    """
+    Run the full planning pipeline for one request.
+    Identical requests within the plan cache TTL are served from cache.
+    Raises HTTPException(404) when the location or forecast is missing,
+    UpstreamUnavailable when an upstream cannot answer.
+
+    With if_none_match, raises PlanNotModified as soon as the forecast
+    generation is known to match, before any risk analysis runs.
+    """
+
+    plan_id = plan_id_for(request)
+
+    record = await get_cached_plan_async(plan_id)
+    if record is not None:
+        plan = record["plan"]
+        check_not_modified(plan_id, plan.get("forecast_generation"), view, if_none_match)
+        return plan
+
+    # --- Geocode location ---
+    with stage("geocode"):
+        geo = await geocode_location_async(request.location)
+    if not geo:
+        raise HTTPException(status_code=404, detail="Location not found")
+
+    # --- Prefetched tile, else fetch forecast ---
+    tile = await get_tile_async(
+        geo["latitude"],
+        geo["longitude"],
+        request.date,
+        request.risk_model or RISK_ENGINE
+    )
+
+    if tile is not None:
+        check_not_modified(plan_id, tile.get("forecast_generation"), view, if_none_match)
+        plan = compute_plan(request, geo, None, tile)
+    else:
+        with stage("forecast"):
+            window = await fetch_forecast_window_async(
+                geo["latitude"],
+                geo["longitude"]
+            )
+
+        check_not_modified(plan_id, window.generation, view, if_none_match)
+        plan = compute_plan(request, geo, window.for_date(request.date))
+
+    # --- Optional LLM refinement (time-boxed, never blocks the answer) ---
+    if refinement_available():
+        with stage("refinement"):
+            plan["refined_explanation"] = await refine_within_budget(
+                plan["planning_explanation"],
+                plan["decision"],
+                plan["summary_facts"]
+            )
+
+    return await _remember_plan_async(request, plan)
+
+
+def shape_plan(plan: dict, view: str = "full") -> dict:
+    """
+    Trim a plan for clients that don't need the full 24-entry timeline.
+
+    full:    plan as computed
+    compact: timeline as parallel arrays; the hour lists in
+             summary_facts are dropped (derivable from risk_level)
+    verdict: no timeline and no hour lists
+
+    Always returns a new dict, never the cached plan itself.
+    """
+
+    if view == "full":
+        return dict(plan)
+
+    shaped = {
+        key: value
+        for key, value in plan.items()
+        if key not in ("risk_timeline", "summary_facts")
+    }
+
+    facts = plan["summary_facts"]
+    shaped["summary_facts"] = {
+        "max_temperature": facts["max_temperature"],
+        "peak_humidity": facts["peak_humidity"]
+    }
+
+    if view == "compact":
+        timeline = plan["risk_timeline"]
+        shaped["risk_timeline_columns"] = {
+            field: [entry[field] for entry in timeline]
+            for field in ("time", "risk_level", "temperature", "humidity")
+        }
+
+    return shaped
+
+
+def _item_error(index: int, status_code: int, detail: str) -> dict:
+    return {
+        "index": index,
+        "result": None,
+        "error": {"status_code": status_code, "detail": detail}
+    }
+
+
+async def build_plans_batch(requests: list, view: str = "full") -> list:
+    """
+    Plan many requests at once.
+
+    Requests are grouped by normalized location so each location is
+    geocoded and its forecast window downloaded once; groups run
+    concurrently up to BATCH_CONCURRENCY. Failures are reported per
+    item and never fail the whole batch.
+
+    Returns:
+        list of {"index", "result", "error"} in request order,
+        results shaped for the given view
+    """
+
+    groups = {}
+    for index, request in enumerate(requests):
+        groups.setdefault(normalize_query(request.location), []).append(index)
+
+    items = [None] * len(requests)
+    semaphore = asyncio.Semaphore(BATCH_CONCURRENCY)
+
+    async def run_group(indices: list):
+        first = requests[indices[0]]
+
+        try:
+            async with semaphore:
+                geo = await geocode_location_async(first.location, BATCH_UPSTREAM_MAX_WAIT)
+                if not geo:
+                    raise HTTPException(status_code=404, detail="Location not found")
+
+                window = await fetch_forecast_window_async(
+                    geo["latitude"],
+                    geo["longitude"],
+                    BATCH_UPSTREAM_MAX_WAIT
+                )
+        except HTTPException as exc:
+            for index in indices:
+                items[index] = _item_error(index, exc.status_code, exc.detail)
+            return
+        except UpstreamUnavailable as exc:
+            for index in indices:
+                items[index] = _item_error(index, 503, str(exc))
+            return
+        except Exception:
+            logger.exception("batch: lookup failed for %r", first.location)
+            for index in indices:
+                items[index] = _item_error(index, 500, "Internal error")
+            return
+
+        for index in indices:
+            request = requests[index]
+            try:
+                forecast = window.for_date(request.date)
+                plan = await _remember_plan_async(
+                    request,
+                    compute_plan(request, geo, forecast)
+                )
+                items[index] = {
+                    "index": index,
+                    "result": shape_plan(plan, view),
+                    "error": None
+                }
+            except HTTPException as exc:
+                items[index] = _item_error(index, exc.status_code, exc.detail)
+            except Exception:
+                # One bad item must not fail the whole batch
+                logger.exception("batch: planning failed for item %d", index)
+                items[index] = _item_error(index, 500, "Internal error")
+
+    await asyncio.gather(*(run_group(indices) for indices in groups.values()))
+    return items
+
+
+def dates_in_range(start_date: str, end_date: str) -> list:
+    """
+    Inclusive list of ISO dates; raises HTTPException(422) if invalid.
+    """
+
+    try:
+        start = Date.fromisoformat(start_date)
+        end = Date.fromisoformat(end_date)
+    except ValueError:
+        raise HTTPException(status_code=422, detail="Dates must be YYYY-MM-DD")
+
+    days = (end - start).days + 1
+    if days < 1 or days > RANGE_MAX_DAYS:
+        raise HTTPException(
+            status_code=422,
+            detail=f"Date range must cover 1 to {RANGE_MAX_DAYS} days"
+        )
+
+    return [(start + timedelta(days=i)).isoformat() for i in range(days)]
+
+
+async def stream_range_plans(request: PlanningRangeRequest):
+    """
+    Resolve location and forecast once, then return an async iterator
+    yielding one result per day as it is computed.
+
+    Upstream errors are raised here, before streaming starts, so they
+    still map to proper HTTP status codes.
+    """
+
+    dates = dates_in_range(request.start_date, request.end_date)
+
+    with stage("geocode"):
+        geo = await geocode_location_async(request.location)
+    if not geo:
+        raise HTTPException(status_code=404, detail="Location not found")
+
+    with stage("forecast"):
+        window = await fetch_forecast_window_async(
+            geo["latitude"],
+            geo["longitude"]
+        )
+
+    async def days():
+        for date in dates:
+            day_request = PlanningRequest(
+                location=request.location,
+                date=date,
+                time=request.time,
+                activity_description=request.activity_description,
+                risk_model=request.risk_model
+            )
+
+            try:
+                plan = await _remember_plan_async(
+                    day_request,
+                    compute_plan(day_request, geo, window.for_date(date))
+                )
+                yield {"date": date, "result": plan, "error": None}
+            except HTTPException as exc:
+                yield {
+                    "date": date,
+                    "result": None,
+                    "error": {"status_code": exc.status_code, "detail": exc.detail}
+                }
+
+            # Let the server flush this day before computing the next
+            await asyncio.sleep(0)
+
+    return days()
@@ -0,0 +1,352 @@
+"""
+prefetch.py
+
+Background warm-up of risk tiles for frequently requested locations.
+
+After each upstream model run, the scheduler refreshes the forecast
+window of every configured location and precomputes a tile per
+(grid cell, date): the risk timeline, summary facts and the decision
+for every intent. /heatwave/planning requests that geocode into a
+warm cell are then answered without any forecast download or risk
+computation.
+
+Locations come from PREFETCH_LOCATIONS (";"-separated) and/or
+PREFETCH_LOCATIONS_FILE (one per line, "#" comments). An entry is
+either a place name (geocoded) or "lat,lon" (a grid point used as is).
+"""
+
+import asyncio
+import logging
+import os
+import re
+import time
+from functools import partial
+
+from cache import MISSING, TTLCache
+from geocoding_client import NOMINATIM_GUARD, geocode_location_async
+from nlp.matcher import INTENT_PRIORITY
+from risk_engine_vectorized import (
+    RISK_ENGINE,
+    generate_risk_timeline_columnar,
+    derive_planning_decision_columnar
+)
+from upstream_guard import WAIT_FOR_TOKEN, TokenBucket, UpstreamUnavailable
+from weather_client import (
+    FORECAST_UPDATE_INTERVAL,
+    fetch_forecast_window_async,
+    seconds_until_next_model_run,
+    snap_to_grid
+)
+
+
+logger = logging.getLogger(__name__)
+
+PREFETCH_LOCATIONS = os.getenv("PREFETCH_LOCATIONS", "")
+PREFETCH_LOCATIONS_FILE = os.getenv("PREFETCH_LOCATIONS_FILE")
+
+# Days from the start of each forecast window to precompute
+PREFETCH_DAYS = int(os.getenv("PREFETCH_DAYS", 7))
+
+# Locations refreshed concurrently, and the pace of their forecast
+# downloads (per second; Open-Meteo's guard allows 10)
+PREFETCH_CONCURRENCY = int(os.getenv("PREFETCH_CONCURRENCY", 4))
+PREFETCH_RATE = float(os.getenv("PREFETCH_RATE", 2))
+
+# Share of the Nominatim guard's rate that place-name lookups may use,
+# so live requests keep most of the 1 request/s geocode budget
+PREFETCH_GEOCODE_SHARE = float(os.getenv("PREFETCH_GEOCODE_SHARE", 0.25))
+
+# Seconds after a model-run boundary before refreshing, giving the
+# upstream time to publish the new run
+PREFETCH_DELAY = float(os.getenv("PREFETCH_DELAY", 120))
+
+# Attempts per location when an upstream is rate limited or down
+PREFETCH_MAX_ATTEMPTS = int(os.getenv("PREFETCH_MAX_ATTEMPTS", 3))
+
+# Every intent the NLP layer can produce
+PREFETCH_INTENTS = INTENT_PRIORITY + ("general",)
+
+_COORDINATES = re.compile(r"^\s*(-?\d+(?:\.\d+)?)\s*,\s*(-?\d+(?:\.\d+)?)\s*$")
+
+# Tiles outlive one model run, so a slow or failed refresh keeps
+# serving the previous run instead of falling back to live requests
+_tile_cache = TTLCache(
+    name="tile",
+    maxsize=int(os.getenv("PREFETCH_TILE_CACHE_SIZE", 65536)),
+    ttl=2 * FORECAST_UPDATE_INTERVAL
+)
+
+
+# -------- Warm store --------
+def _tile_key(latitude: float, longitude: float, date: str, engine: str) -> str:
+    latitude, longitude = snap_to_grid(latitude, longitude)
+    return f"{latitude:.4f},{longitude:.4f}|{date}|{engine}"
+
+
+def compute_tile(forecast, engine: str) -> dict:
+    """
+    Risk analysis of one day of forecast, for every intent.
+    """
+
+    result = generate_risk_timeline_columnar(
+        forecast.times,
+        forecast.temperature,
+        forecast.humidity,
+        engine
+    )
+
+    result["decisions"] = {
+        intent: derive_planning_decision_columnar(
+            forecast.times,
+            forecast.temperature,
+            intent,
+            forecast.humidity,
+            engine
+        )
+        for intent in PREFETCH_INTENTS
+    }
+    result["forecast_generation"] = forecast.generation
+
+    return result
+
+
+def get_tile(latitude: float, longitude: float, date: str, engine: str):
+    """
+    Precomputed tile for the grid cell and date, or None.
+    """
+    tile = _tile_cache.get(_tile_key(latitude, longitude, date, engine))
+    return None if tile is MISSING else tile
+
+
+async def get_tile_async(latitude: float, longitude: float, date: str, engine: str):
+    """
+    get_tile for the event loop (shared backends block).
+    """
+    tile = await _tile_cache.get_async(_tile_key(latitude, longitude, date, engine))
+    return None if tile is MISSING else tile
+
+
+def tile_cache_stats() -> dict:
+    return _tile_cache.stats()
+
+
+# -------- Location list --------
+def load_locations(spec: str = PREFETCH_LOCATIONS, path: str | None = PREFETCH_LOCATIONS_FILE) -> list:
+    """
+    Configured locations, de-duplicated, in order.
+    """
+
+    entries = spec.split(";")
+
+    if path:
+        with open(path, "r", encoding="utf-8") as f:
+            entries.extend(line.split("#", 1)[0] for line in f)
+
+    return list(dict.fromkeys(
+        entry.strip() for entry in entries if entry.strip()
+    ))
+
+
+# -------- Scheduler --------
+class PrefetchScheduler:
+    """
+    Periodically refreshes tiles for a list of locations.
+
+    geocode / fetch_window default to the real upstream clients
+    (queueing for their guards' tokens, as background work may) and
+    can be swapped for fakes (e.g. a local forecast server client).
+
+    Geocodes and forecast downloads are paced separately: geocodes at
+    geocode_rate, a share of Nominatim's limit, forecasts at rate.
+    Resolved coordinates are kept, so only the first run geocodes.
+    """
+
+    def __init__(
+        self,
+        locations: list,
+        engine: str = RISK_ENGINE,
+        days: int = PREFETCH_DAYS,
+        concurrency: int = PREFETCH_CONCURRENCY,
+        rate: float = PREFETCH_RATE,
+        geocode_rate: float | None = None,
+        geocode=None,
+        fetch_window=None
+    ):
+        self.locations = locations
+        self.engine = engine
+        self.days = days
+        self.concurrency = concurrency
+        self.bucket = TokenBucket(rate, burst=1)
+        self.geocode_bucket = TokenBucket(
+            geocode_rate or NOMINATIM_GUARD.bucket.rate * PREFETCH_GEOCODE_SHARE,
+            burst=1
+        )
+        self.geocode = geocode or partial(geocode_location_async, max_wait=WAIT_FOR_TOKEN)
+        self.fetch_window = fetch_window or partial(
+            fetch_forecast_window_async,
+            max_wait=WAIT_FOR_TOKEN
+        )
+
+        self._coordinates = {}      # location -> (latitude, longitude)
+
+        self._task = None
+
+        self.runs = 0
+        self.last_run_started = None
+        self.last_run_seconds = None
+        self.refreshed = 0
+        self.failed = 0
+        self.tiles = 0
+        self.next_run_at = None
+
+    async def _resolve(self, location: str):
+        match = _COORDINATES.match(location)
+        if match:
+            return float(match.group(1)), float(match.group(2))
+
+        coordinates = self._coordinates.get(location)
+        if coordinates is not None:
+            return coordinates
+
+        await self.geocode_bucket.acquire_async()
+        geo = await self.geocode(location)
+        if not geo:
+            return None
+
+        coordinates = self._coordinates[location] = geo["latitude"], geo["longitude"]
+        return coordinates
+
+    async def refresh_location(self, location: str) -> int:
+        """
+        Refresh one location's tiles; returns how many were stored.
+        Unavailable upstreams (open circuit, errors) are retried after
+        their Retry-After hint.
+        """
+
+        for attempt in range(1, PREFETCH_MAX_ATTEMPTS + 1):
+            try:
+                coordinates = await self._resolve(location)
+                if coordinates is None:
+                    logger.warning("prefetch: location not found: %s", location)
+                    return 0
+
+                await self.bucket.acquire_async()
+                window = await self.fetch_window(*coordinates)
+                break
+            except UpstreamUnavailable as exc:
+                if attempt == PREFETCH_MAX_ATTEMPTS:
+                    raise
+                await asyncio.sleep(exc.retry_after or 1.0)
+
+        ttl = seconds_until_next_model_run() + FORECAST_UPDATE_INTERVAL
+        stored = 0
+
+        for date in window.dates()[:self.days]:
+            tile = compute_tile(window.for_date(date), self.engine)
+            await _tile_cache.set_async(_tile_key(*coordinates, date, self.engine), tile, ttl=ttl)
+            stored += 1
+
+            # Keep the event loop responsive for live requests
+            await asyncio.sleep(0)
+
+        return stored
+
+    async def run_once(self):
+        """
+        Refresh every location once.
+        """
+
+        started = time.monotonic()
+        self.last_run_started = time.time()
+        refreshed = failed = tiles = 0
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def refresh(location: str):
+            nonlocal refreshed, failed, tiles
+            async with semaphore:
+                try:
+                    stored = await self.refresh_location(location)
+                except Exception:
+                    logger.exception("prefetch: refresh failed: %s", location)
+                    failed += 1
+                    return
+
+            refreshed += 1
+            tiles += stored
+
+        await asyncio.gather(*(refresh(location) for location in self.locations))
+
+        self.runs += 1
+        self.refreshed, self.failed, self.tiles = refreshed, failed, tiles
+        self.last_run_seconds = round(time.monotonic() - started, 3)
+
+    async def run_forever(self):
+        while True:
+            await self.run_once()
+
+            delay = seconds_until_next_model_run() + PREFETCH_DELAY
+            self.next_run_at = time.time() + delay
+            await asyncio.sleep(delay)
+
+    def start(self) -> asyncio.Task:
+        if self._task is None:
+            self._task = asyncio.ensure_future(self.run_forever())
+        return self._task
+
+    async def stop(self):
+        if self._task is None:
+            return
+
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    def stats(self) -> dict:
+        return {
+            "running": self._task is not None and not self._task.done(),
+            "locations": len(self.locations),
+            "engine": self.engine,
+            "days": self.days,
+            "runs": self.runs,
+            "last_run_started": self.last_run_started,
+            "last_run_seconds": self.last_run_seconds,
+            "refreshed": self.refreshed,
+            "failed": self.failed,
+            "tiles": self.tiles,
+            "next_run_at": self.next_run_at
+        }
+
+
+_scheduler = None
+
+
+def start_prefetch(locations: list | None = None):
+    """
+    Start the scheduler for the configured locations (no-op if none).
+    """
+    global _scheduler
+
+    locations = load_locations() if locations is None else locations
+    if not locations or _scheduler is not None:
+        return _scheduler
+
+    _scheduler = PrefetchScheduler(locations)
+    _scheduler.start()
+    return _scheduler
+
+
+async def stop_prefetch():
+    global _scheduler
+
+    if _scheduler is not None:
+        await _scheduler.stop()
+        _scheduler = None
+
+
+def prefetch_status() -> dict:
+    if _scheduler is None:
+        return {"running": False, "locations": 0}
+    return _scheduler.stats()
@@ -0,0 +1,91 @@
+"""
+responses.py
+
+Fast JSON response class.
+Serializes with orjson when installed (several times faster than the
+stdlib encoder on large plan payloads), falling back to json otherwise.
+
+Also the response compression middleware and conditional
+request (If-None-Match) matching.
+"""
+
+from fastapi.responses import JSONResponse
+from starlette.datastructures import MutableHeaders
+from starlette.middleware.gzip import GZipMiddleware
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    JSONResponse rendered with orjson.
+
+    Content is expected to be plain JSON types (as built by the
+    planning pipeline), so it is serialized as-is, without a
+    jsonable_encoder pass.
+    """
+
+    def render(self, content) -> bytes:
+        if orjson is None:
+            return super().render(content)
+
+        return orjson.dumps(
+            content,
+            option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+        )
+
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    """
+    Whether an If-None-Match header value matches etag.
+    """
+
+    if if_none_match.strip() == "*":
+        return True
+
+    # Weak comparison, as RFC 9110 requires for If-None-Match
+    opaque = etag[2:] if etag.startswith("W/") else etag
+    candidates = (tag.strip() for tag in if_none_match.split(","))
+    return opaque in (tag[2:] if tag.startswith("W/") else tag for tag in candidates)
+
+
+class CompressionMiddleware:
+    """
+    GZip for API responses (planning JSON is ~10x smaller compressed).
+
+    Paths ending in exclude_paths are passed through untouched:
+    streams, whose events must not wait in the compressor, and
+    bodies that are already compressed (UI assets, PDFs).
+
+    GZipMiddleware appends "Accept-Encoding" to Vary even when the
+    endpoint already set it; repeated Vary entries are merged.
+    """
+
+    def __init__(self, app, minimum_size: int = 1000, exclude_paths: tuple = ()):
+        self.app = app
+        self.gzip = GZipMiddleware(app, minimum_size=minimum_size)
+        self.exclude_paths = exclude_paths
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http" and not scope["path"].endswith(self.exclude_paths):
+            await self.gzip(scope, receive, _merging_vary(send))
+        else:
+            await self.app(scope, receive, send)
+
+
+def _merging_vary(send):
+    async def send_with_merged_vary(message):
+        if message["type"] == "http.response.start":
+            headers = MutableHeaders(scope=message)
+            vary = headers.get("vary")
+            if vary:
+                fields = {}
+                for field in vary.split(","):
+                    fields.setdefault(field.strip().lower(), field.strip())
+                headers["vary"] = ", ".join(field for field in fields.values() if field)
+        await send(message)
+
+    return send_with_merged_vary
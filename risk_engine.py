@@ -4,8 +4,32 @@ risk_engine.py
 Core deterministic heat-risk classification logic.
 Produces a per-hour risk timeline and normalized summary facts.
 Also derives a high-level planning decision.
+
+This is the scalar reference implementation; risk_engine_vectorized.py
+must produce identical results from the same thresholds.
 """
 
+from hourly_forecast import max_present, missing_as_none
+
+# Risk levels, ordered from lowest to highest
+RISK_LEVELS = ("Safe", "Moderate", "High", "Extreme")
+HIGH_RISK_LEVELS = ("High", "Extreme")
+
+# Temperature thresholds (°C)
+EXTREME_HEAT_C = 40
+HIGH_HEAT_C = 35
+MODERATE_HEAT_C = 32
+
+# Core activity hours for the moderate-heat rule (inclusive)
+DAYTIME_START_HOUR = 9
+DAYTIME_END_HOUR = 16
+
+# Decision thresholds (hour counts)
+AVOID_MIN_HIGH_HOURS = {"construction": 2}
+AVOID_MIN_HIGH_HOURS_DEFAULT = 1
+MODIFY_MIN_DAYTIME_MODERATE_HOURS = 3
+
+
 def classify_heat_risk(temperature: float, humidity: float) -> str:
     """
     Institution-oriented heat risk classification.
@@ -13,15 +37,15 @@ def classify_heat_risk(temperature: float, humidity: float) -> str:
     """
 
     # Extreme heat
-    if temperature >= 40:
+    if temperature >= EXTREME_HEAT_C:
         return "Extreme"
 
     # High heat
-    if temperature >= 35:
+    if temperature >= HIGH_HEAT_C:
         return "High"
 
     # Moderate heat (only when meaningfully warm)
-    if temperature >= 32:
+    if temperature >= MODERATE_HEAT_C:
         return "Moderate"
 
     # Otherwise, considered safe for planning
@@ -52,7 +76,7 @@ def generate_risk_timeline(hourly_forecast: list) -> dict:
         temperatures.append(temp)
         humidities.append(humidity)
 
-        if risk_level in ("High", "Extreme"):
+        if risk_level in HIGH_RISK_LEVELS:
             high_risk_hours.append(time)
         else:
             safe_windows.append(time)
@@ -70,25 +94,89 @@ def generate_risk_timeline(hourly_forecast: list) -> dict:
     }
 
 
+def generate_risk_timeline_from_columns(times, temperatures, humidities) -> dict:
+    """
+    generate_risk_timeline straight from forecast columns (e.g. one
+    day of an HourlyForecast), without building per-hour input dicts.
+    For a single day this is several times faster than the NumPy
+    engine, whose fixed per-call overhead only pays off on batches.
+
+    Missing hours (NaN) classify as Safe and are reported as None,
+    as in the columnar engine.
+    """
+
+    temperatures = missing_as_none(temperatures)
+    humidities = missing_as_none(humidities)
+
+    risk_timeline = []
+    high_risk_hours = []
+    safe_windows = []
+
+    for time, temp, humidity in zip(times, temperatures, humidities):
+        risk_level = "Safe" if temp is None else classify_heat_risk(temp, humidity)
+
+        risk_timeline.append({
+            "time": time,
+            "risk_level": risk_level,
+            "temperature": temp,
+            "humidity": humidity
+        })
+
+        if risk_level in HIGH_RISK_LEVELS:
+            high_risk_hours.append(time)
+        else:
+            safe_windows.append(time)
+
+    summary_facts = {
+        "max_temperature": max_present(temperatures),
+        "peak_humidity": max_present(humidities),
+        "high_risk_hours": high_risk_hours,
+        "safe_windows": safe_windows
+    }
+
+    return {
+        "risk_timeline": risk_timeline,
+        "summary_facts": summary_facts
+    }
+
+
 def _hour_to_int(time_str: str) -> int:
     return int(time_str[-5:-3])
 
 
 def derive_planning_decision(risk_timeline: list, intent: str) -> dict:
-    high_or_extreme = [
-        h for h in risk_timeline
-        if h["risk_level"] in ("High", "Extreme")
-    ]
+    high_or_extreme = 0
+    daytime_moderate = 0
+
+    # Single pass; the hour is only parsed for moderate entries
+    for h in risk_timeline:
+        risk_level = h["risk_level"]
+
+        if risk_level in HIGH_RISK_LEVELS:
+            high_or_extreme += 1
+        elif (
+            risk_level == "Moderate"
+            and DAYTIME_START_HOUR <= _hour_to_int(h["time"]) <= DAYTIME_END_HOUR
+        ):
+            daytime_moderate += 1
+
+    return decision_from_counts(high_or_extreme, daytime_moderate, intent)
+
+
+def decision_from_counts(
+    high_or_extreme: int,
+    daytime_moderate: int,
+    intent: str
+) -> dict:
+    """
+    Map hour counts to a verdict and its deterministic reason.
+    """
 
-    daytime_moderate = [
-        h for h in risk_timeline
-        if h["risk_level"] == "Moderate"
-        and 9 <= _hour_to_int(h["time"]) <= 16
-    ]
+    avoid_min = AVOID_MIN_HIGH_HOURS.get(intent, AVOID_MIN_HIGH_HOURS_DEFAULT)
 
     # ---------- CONSTRUCTION ----------
     if intent == "construction":
-        if len(high_or_extreme) >= 2:
+        if high_or_extreme >= avoid_min:
             return {
                 "verdict": "AVOID",
                 "reason": (
@@ -97,7 +185,7 @@ def derive_planning_decision(risk_timeline: list, intent: str) -> dict:
                 )
             }
 
-        if len(daytime_moderate) >= 3:
+        if daytime_moderate >= MODIFY_MIN_DAYTIME_MODERATE_HOURS:
             return {
                 "verdict": "MODIFY",
                 "reason": (
@@ -115,7 +203,7 @@ def derive_planning_decision(risk_timeline: list, intent: str) -> dict:
         }
 
     # ---------- SCHOOL / GENERAL ----------
-    if len(high_or_extreme) >= 1:
+    if high_or_extreme >= avoid_min:
         return {
             "verdict": "AVOID",
             "reason": (
@@ -124,7 +212,7 @@ def derive_planning_decision(risk_timeline: list, intent: str) -> dict:
             )
         }
 
-    if len(daytime_moderate) >= 3:
+    if daytime_moderate >= MODIFY_MIN_DAYTIME_MODERATE_HOURS:
         return {
             "verdict": "MODIFY",
             "reason": (
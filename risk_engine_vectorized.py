@@ -0,0 +1,284 @@
+"""
+risk_engine_vectorized.py
+
+Columnar (NumPy) heat-risk engine for batch workloads.
+Takes temperature/humidity arrays, or 2-D location x hour matrices,
+and computes risk levels, summary facts and verdicts without
+per-hour Python branching.
+
+With the default "threshold" engine, results are identical to the
+scalar reference in risk_engine.py. The "heat_index" and "wbgt"
+engines classify on heat-stress indices instead (heat_stress.py).
+"""
+
+import os
+from itertools import compress
+
+import numpy as np
+
+from risk_engine import (
+    RISK_LEVELS,
+    EXTREME_HEAT_C,
+    HIGH_HEAT_C,
+    MODERATE_HEAT_C,
+    DAYTIME_START_HOUR,
+    DAYTIME_END_HOUR,
+    AVOID_MIN_HIGH_HOURS,
+    AVOID_MIN_HIGH_HOURS_DEFAULT,
+    MODIFY_MIN_DAYTIME_MODERATE_HOURS,
+    decision_from_counts
+)
+from heat_stress import heat_index_table, wbgt_table
+from hourly_forecast import max_present, missing_as_none
+
+
+# Integer codes indexing RISK_LEVELS
+SAFE, MODERATE, HIGH, EXTREME = range(len(RISK_LEVELS))
+
+VERDICTS = ("PROCEED", "MODIFY", "AVOID")
+PROCEED, MODIFY, AVOID = range(len(VERDICTS))
+
+# Risk classification engines; the default applies when a request
+# doesn't choose one
+RISK_ENGINES = ("threshold", "heat_index", "wbgt")
+RISK_ENGINE = os.getenv("RISK_ENGINE", "threshold")
+
+if RISK_ENGINE not in RISK_ENGINES:
+    raise ValueError(f"RISK_ENGINE must be one of {', '.join(RISK_ENGINES)}")
+
+_HEAT_STRESS_TABLES = {
+    "heat_index": heat_index_table,
+    "wbgt": wbgt_table
+}
+
+
+def _as_list(values) -> list:
+    return values.tolist() if isinstance(values, np.ndarray) else list(values)
+
+
+def classify_heat_risk_array(temperatures) -> np.ndarray:
+    """
+    Vectorized classify_heat_risk.
+
+    Returns:
+        int8 array of risk codes (same shape as the input)
+    """
+
+    t = np.asarray(temperatures, dtype=np.float64)
+
+    codes = (t >= MODERATE_HEAT_C).astype(np.int8)
+    codes += t >= HIGH_HEAT_C
+    codes += t >= EXTREME_HEAT_C
+
+    return codes
+
+
+def risk_codes(temperatures, humidities, engine: str | None = None) -> np.ndarray:
+    """
+    Risk codes from the selected engine (RISK_ENGINE by default).
+    The threshold engine ignores humidity.
+    """
+
+    engine = engine or RISK_ENGINE
+    if engine == "threshold":
+        return classify_heat_risk_array(temperatures)
+
+    return _HEAT_STRESS_TABLES[engine]().classify(temperatures, humidities)
+
+
+def hours_from_times(times) -> np.ndarray:
+    """
+    Parse the hour of day from ISO "YYYY-MM-DDTHH:MM" strings.
+    """
+    return np.fromiter(
+        (int(t[-5:-3]) for t in times),
+        dtype=np.int8,
+        count=len(times)
+    )
+
+
+def generate_risk_timeline_columnar(
+    times,
+    temperatures,
+    humidities,
+    engine: str | None = None
+) -> dict:
+    """
+    Columnar generate_risk_timeline.
+    Same output structure as the scalar version (and the same values
+    with the threshold engine). Missing hours (NaN) classify as Safe
+    and are reported as None.
+    """
+
+    times = _as_list(times)
+    codes = risk_codes(temperatures, humidities, engine)
+    high_mask = (codes >= HIGH).tolist()
+
+    temperatures = missing_as_none(temperatures)
+    humidities = missing_as_none(humidities)
+
+    risk_timeline = [
+        {
+            "time": time,
+            "risk_level": RISK_LEVELS[code],
+            "temperature": temp,
+            "humidity": humidity
+        }
+        for time, code, temp, humidity
+        in zip(times, codes.tolist(), temperatures, humidities)
+    ]
+
+    summary_facts = {
+        "max_temperature": max_present(temperatures),
+        "peak_humidity": max_present(humidities),
+        "high_risk_hours": list(compress(times, high_mask)),
+        "safe_windows": list(compress(times, [not h for h in high_mask]))
+    }
+
+    return {
+        "risk_timeline": risk_timeline,
+        "summary_facts": summary_facts
+    }
+
+
+def derive_planning_decision_columnar(
+    times,
+    temperatures,
+    intent: str,
+    humidities=None,
+    engine: str | None = None
+) -> dict:
+    """
+    Columnar derive_planning_decision, straight from the forecast
+    columns instead of timeline dicts.
+    humidities are required by the heat-stress engines.
+    """
+
+    codes = risk_codes(temperatures, humidities, engine)
+    hours = hours_from_times(times)
+    daytime = (hours >= DAYTIME_START_HOUR) & (hours <= DAYTIME_END_HOUR)
+
+    return decision_from_counts(
+        int((codes >= HIGH).sum()),
+        int(((codes == MODERATE) & daytime).sum()),
+        intent
+    )
+
+
+def verdict_codes(high_or_extreme, daytime_moderate, intents) -> np.ndarray:
+    """
+    Vectorized decision_from_counts, returning indexes into VERDICTS.
+
+    intents may be a single intent or one per row.
+    """
+
+    high_or_extreme = np.asarray(high_or_extreme)
+    daytime_moderate = np.asarray(daytime_moderate)
+
+    if isinstance(intents, str):
+        avoid_min = AVOID_MIN_HIGH_HOURS.get(intents, AVOID_MIN_HIGH_HOURS_DEFAULT)
+    else:
+        avoid_min = np.array([
+            AVOID_MIN_HIGH_HOURS.get(intent, AVOID_MIN_HIGH_HOURS_DEFAULT)
+            for intent in intents
+        ])
+
+    return np.where(
+        high_or_extreme >= avoid_min,
+        AVOID,
+        np.where(
+            daytime_moderate >= MODIFY_MIN_DAYTIME_MODERATE_HOURS,
+            MODIFY,
+            PROCEED
+        )
+    ).astype(np.int8)
+
+
+def summarize_risk_matrix(
+    temperatures,
+    humidities,
+    hours,
+    intents="general",
+    engine: str | None = None
+) -> dict:
+    """
+    Risk summary for a 2-D (row x hour) temperature/humidity matrix,
+    e.g. locations x 24 hours or days x 24 hours.
+
+    Args:
+        temperatures, humidities: arrays of shape (rows, hours)
+        hours: hour of day per column, shape (hours,) or (rows, hours)
+        intents: one intent for all rows, or one per row
+        engine: one of RISK_ENGINES (RISK_ENGINE by default)
+
+    Returns:
+        dict of per-row arrays: risk_codes, max_temperature,
+        peak_humidity, high_risk_count, daytime_moderate_count, verdict
+    """
+
+    # Keep input dtypes so max values round like the scalar path
+    # (Open-Meteo humidity is integral)
+    t = np.atleast_2d(np.asarray(temperatures))
+    h = np.atleast_2d(np.asarray(humidities))
+    hours = np.asarray(hours)
+
+    codes = risk_codes(t, h, engine)
+    daytime = (hours >= DAYTIME_START_HOUR) & (hours <= DAYTIME_END_HOUR)
+
+    high_or_extreme = (codes >= HIGH).sum(axis=1)
+    daytime_moderate = ((codes == MODERATE) & daytime).sum(axis=1)
+
+    return {
+        "risk_codes": codes,
+        # fmax skips missing (NaN) hours; all-missing rows stay NaN
+        "max_temperature": np.fmax.reduce(t, axis=1),
+        "peak_humidity": np.fmax.reduce(h, axis=1),
+        "high_risk_count": high_or_extreme,
+        "daytime_moderate_count": daytime_moderate,
+        "verdict": verdict_codes(high_or_extreme, daytime_moderate, intents)
+    }
+
+
+def decisions_from_summary(summary: dict, intents="general") -> list:
+    """
+    Materialize decision dicts (verdict + reason) for each row of
+    a summarize_risk_matrix result.
+    """
+
+    rows = len(summary["high_risk_count"])
+    if isinstance(intents, str):
+        intents = [intents] * rows
+
+    return [
+        decision_from_counts(high, moderate, intent)
+        for high, moderate, intent in zip(
+            summary["high_risk_count"].tolist(),
+            summary["daytime_moderate_count"].tolist(),
+            intents
+        )
+    ]
+
+
+def summary_facts_from_matrix(summary: dict, times_matrix) -> list:
+    """
+    Materialize scalar-compatible summary_facts dicts for each row.
+
+    times_matrix: the time strings for each row, shape (rows, hours)
+    """
+
+    high_rows = (summary["risk_codes"] >= HIGH).tolist()
+
+    return [
+        {
+            "max_temperature": round(max_temp, 1) if max_temp == max_temp else None,
+            "peak_humidity": round(peak_humidity, 1) if peak_humidity == peak_humidity else None,
+            "high_risk_hours": list(compress(times, high_mask)),
+            "safe_windows": list(compress(times, [not m for m in high_mask]))
+        }
+        for max_temp, peak_humidity, times, high_mask in zip(
+            summary["max_temperature"].tolist(),
+            summary["peak_humidity"].tolist(),
+            times_matrix,
+            high_rows
+        )
+    ]
@@ -1,7 +1,10 @@
 # schemas.py
 
 from pydantic import BaseModel
-from typing import List, Dict, Optional
+from typing import List, Literal, Optional
+
+# See risk_engine_vectorized.RISK_ENGINES; None uses the server default
+RiskModel = Literal["threshold", "heat_index", "wbgt"]
 
 
 class PlanningRequest(BaseModel):
@@ -9,13 +12,42 @@ class PlanningRequest(BaseModel):
     date: str                          # YYYY-MM-DD
     time: Optional[str] = None         # HH:MM (optional)
     activity_description: str          # Free-text activity description
+    risk_model: Optional[RiskModel] = None     # Risk engine override
+
+
+class PlanningRangeRequest(BaseModel):
+    location: str                      # Human-readable location
+    start_date: str                    # YYYY-MM-DD
+    end_date: str                      # YYYY-MM-DD (inclusive)
+    time: Optional[str] = None         # HH:MM (optional)
+    activity_description: str          # Free-text activity description
+    risk_model: Optional[RiskModel] = None     # Risk engine override
+
+
+class BatchPlanningRequest(BaseModel):
+    requests: List[PlanningRequest]    # One entry per location/date check
 
 
 class RiskEntry(BaseModel):
     time: str
     risk_level: str
-    temperature: float
-    humidity: float
+    temperature: Optional[float]       # None for hours missing upstream
+    humidity: Optional[float]
+
+
+class RiskTimelineColumns(BaseModel):
+    # Same data as List[RiskEntry], one array per field
+    time: List[str]
+    risk_level: List[str]
+    temperature: List[Optional[float]]
+    humidity: List[Optional[float]]
+
+
+class SummaryFacts(BaseModel):
+    max_temperature: Optional[float]
+    peak_humidity: Optional[float]
+    high_risk_hours: Optional[List[str]] = None    # "full" view only
+    safe_windows: Optional[List[str]] = None       # "full" view only
 
 
 class DecisionSummary(BaseModel):
@@ -24,11 +56,33 @@ class DecisionSummary(BaseModel):
 
 
 class PlanningResponse(BaseModel):
+    plan_id: str
     location: str
     intent: str
+    risk_model: RiskModel
+    forecast_generation: Optional[float] = None   # Unix time of the model run used
     decision: DecisionSummary
     focused_time: Optional[str]
-    focused_hour_context: Optional[Dict]
-    risk_timeline: List[RiskEntry]
-    summary_facts: Dict
+    focused_hour_context: Optional[RiskEntry]
+    risk_timeline: Optional[List[RiskEntry]] = None                  # "full" view
+    risk_timeline_columns: Optional[RiskTimelineColumns] = None      # "compact" view
+    summary_facts: SummaryFacts
     planning_explanation: str
+    refined_explanation: Optional[str] = None     # Only with LLM refinement enabled
+
+
+class ItemError(BaseModel):
+    status_code: int
+    detail: str
+
+
+class BatchPlanningItem(BaseModel):
+    index: int
+    result: Optional[PlanningResponse]
+    error: Optional[ItemError]
+
+
+class BatchPlanningResponse(BaseModel):
+    count: int
+    failed: int
+    items: List[BatchPlanningItem]
@@ -0,0 +1,126 @@
+"""
+singleflight.py
+
+Request coalescing for upstream lookups.
+Concurrent callers asking for the same key share one in-flight call
+instead of each hitting the upstream before the cache is populated.
+"""
+
+import asyncio
+import threading
+
+
+_registry = {}
+
+
+class _Counters:
+    def __init__(self, name: str):
+        self.name = name
+        self.calls = 0
+        self.executions = 0
+        self.coalesced = 0
+
+        _registry[name] = self
+
+    def stats(self) -> dict:
+        return {
+            "calls": self.calls,
+            "executions": self.executions,
+            "coalesced": self.coalesced,
+            "in_flight": len(self._inflight)
+        }
+
+
+class SingleFlight(_Counters):
+    """
+    asyncio single-flight: one task per key, awaited by every caller.
+    """
+
+    def __init__(self, name: str):
+        super().__init__(name)
+        self._inflight = {}
+
+    async def do(self, key, fn):
+        """
+        Await fn() once per key across concurrent callers.
+
+        fn: zero-argument callable returning an awaitable
+        """
+
+        self.calls += 1
+        task = self._inflight.get(key)
+
+        if task is None:
+            self.executions += 1
+            task = asyncio.ensure_future(fn())
+            self._inflight[key] = task
+
+            def _forget(done, key=key):
+                if self._inflight.get(key) is done:
+                    del self._inflight[key]
+
+            task.add_done_callback(_forget)
+        else:
+            self.coalesced += 1
+
+        # A cancelled caller must not cancel the call others are waiting on
+        return await asyncio.shield(task)
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class ThreadSingleFlight(_Counters):
+    """
+    Thread-based single-flight for the blocking (requests) clients.
+    """
+
+    def __init__(self, name: str):
+        super().__init__(name)
+        self._inflight = {}
+        self._lock = threading.Lock()
+
+    def do(self, key, fn):
+        """
+        Call fn() once per key across concurrent threads.
+        """
+
+        with self._lock:
+            self.calls += 1
+            call = self._inflight.get(key)
+            leader = call is None
+
+            if leader:
+                self.executions += 1
+                call = _Call()
+                self._inflight[key] = call
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+            return call.result
+        except Exception as exc:
+            call.error = exc
+            raise
+        finally:
+            with self._lock:
+                del self._inflight[key]
+            call.done.set()
+
+
+def singleflight_stats() -> dict:
+    """
+    Coalescing counters for every single-flight group.
+    """
+    return {name: group.stats() for name, group in _registry.items()}
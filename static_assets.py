@@ -0,0 +1,151 @@
+"""
+static_assets.py
+
+In-memory static file serving for the UI.
+
+Files are read once, precompressed (gzip, and brotli when the brotli
+package is installed) and served with a strong ETag per encoding, so
+a page view is a dict lookup and revalidations answer 304 with no
+body. STATIC_RELOAD=1 re-reads files whose mtime changed (dev mode).
+"""
+
+import gzip
+import hashlib
+import mimetypes
+import os
+
+from fastapi import Request
+from fastapi.responses import Response
+
+from responses import etag_matches
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+STATIC_RELOAD = os.getenv("STATIC_RELOAD", "0") == "1"
+
+# HTML must revalidate so deploys show up at once; the 304 is cheap
+STATIC_CACHE_CONTROL = os.getenv("STATIC_CACHE_CONTROL", "no-cache")
+
+
+class StaticAsset:
+    """
+    One file with its precompressed bodies and ETags, keyed by
+    content coding ("identity", "gzip", "br").
+    """
+
+    __slots__ = ("path", "mtime", "media_type", "bodies", "etags")
+
+    def __init__(self, path: str):
+        self.path = path
+        self.mtime = os.stat(path).st_mtime
+
+        with open(path, "rb") as f:
+            raw = f.read()
+
+        media_type, _ = mimetypes.guess_type(path)
+        if media_type and media_type.startswith("text/"):
+            media_type += "; charset=utf-8"
+        self.media_type = media_type or "application/octet-stream"
+
+        # mtime=0 keeps gzip output (and so its ETag) reproducible
+        self.bodies = {
+            "identity": raw,
+            "gzip": gzip.compress(raw, compresslevel=9, mtime=0)
+        }
+        if brotli is not None:
+            self.bodies["br"] = brotli.compress(raw, quality=11)
+
+        digest = hashlib.sha256(raw).hexdigest()[:20]
+        self.etags = {
+            coding: f'"{digest}"' if coding == "identity" else f'"{digest}-{coding}"'
+            for coding in self.bodies
+        }
+
+
+def _accepted_codings(accept_encoding: str) -> set:
+    """
+    Content codings with a non-zero q-value.
+    """
+
+    accepted = set()
+    for item in accept_encoding.split(","):
+        coding, _, params = item.strip().partition(";")
+        coding = coding.strip().lower()
+        q = params.strip()
+
+        try:
+            weight = float(q[2:]) if q.startswith("q=") else 1.0
+        except ValueError:
+            weight = 1.0
+
+        if coding and weight > 0:
+            accepted.add(coding)
+    return accepted
+
+
+class StaticAssets:
+    """
+    All files of a directory, loaded at construction.
+    """
+
+    def __init__(self, directory: str, reload: bool = STATIC_RELOAD):
+        self.directory = directory
+        self.reload = reload
+        self._assets = {}
+
+        for name in os.listdir(directory):
+            path = os.path.join(directory, name)
+            if os.path.isfile(path):
+                self._assets[name] = StaticAsset(path)
+
+    def get(self, name: str) -> StaticAsset | None:
+        asset = self._assets.get(name)
+
+        if asset is not None and self.reload:
+            if os.stat(asset.path).st_mtime != asset.mtime:
+                asset = StaticAsset(asset.path)
+                self._assets[name] = asset
+
+        return asset
+
+    def response(self, name: str, request: Request) -> Response:
+        """
+        Serve an asset in the best encoding the client accepts,
+        or 304 when its If-None-Match is current.
+        """
+
+        asset = self.get(name)
+        if asset is None:
+            return Response(status_code=404)
+
+        accepted = _accepted_codings(request.headers.get("accept-encoding", ""))
+        coding = next(
+            (
+                c for c in ("br", "gzip")
+                if c in asset.bodies and (c in accepted or "*" in accepted)
+            ),
+            "identity"
+        )
+
+        headers = {
+            "ETag": asset.etags[coding],
+            "Cache-Control": STATIC_CACHE_CONTROL,
+            "Vary": "Accept-Encoding"
+        }
+
+        if_none_match = request.headers.get("if-none-match")
+        if if_none_match and etag_matches(if_none_match, asset.etags[coding]):
+            return Response(status_code=304, headers=headers)
+
+        if coding != "identity":
+            headers["Content-Encoding"] = coding
+
+        return Response(
+            content=asset.bodies[coding],
+            media_type=asset.media_type,
+            headers=headers
+        )
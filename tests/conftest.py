@@ -0,0 +1,69 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Keep the geocode cache in memory instead of writing a file into the checkout
+os.environ.setdefault("GEOCODE_CACHE_PATH", "")
+os.environ.setdefault("CACHE_BACKEND", "memory")
+
+# The fake upstream has no usage policy
+os.environ.setdefault("NOMINATIM_RATE_LIMIT", "100000")
+os.environ.setdefault("NOMINATIM_BURST", "1000")
+os.environ.setdefault("OPEN_METEO_RATE_LIMIT", "100000")
+os.environ.setdefault("OPEN_METEO_BURST", "1000")
+
+from benchmarks.fake_upstream import FakeUpstream
+
+# One fake Nominatim + Open-Meteo for the whole session; upstream URLs
+# are read when the client modules are first imported
+FAKE_UPSTREAM = FakeUpstream().__enter__()
+os.environ["NOMINATIM_URL"] = FAKE_UPSTREAM.nominatim_url
+os.environ["OPEN_METEO_URL"] = FAKE_UPSTREAM.open_meteo_url
+
+import pytest
+
+
+class UpstreamCalls:
+    """
+    Upstream requests made since the fixture was created.
+    """
+
+    def __init__(self, fake: FakeUpstream):
+        self.fake = fake
+        self._start = fake.stats()
+
+    def __getitem__(self, path: str) -> int:
+        return self.fake.stats().get(path, 0) - self._start.get(path, 0)
+
+    @property
+    def total(self) -> int:
+        return self["/search"] + self["/v1/forecast"]
+
+
+@pytest.fixture
+def fake_upstream():
+    return FAKE_UPSTREAM
+
+
+@pytest.fixture
+def upstream_calls():
+    return UpstreamCalls(FAKE_UPSTREAM)
+
+
+@pytest.fixture
+def clear_caches():
+    from cache import _registry
+
+    for cache in _registry.values():
+        cache.clear()
+    yield
+
+
+@pytest.fixture
+def client(clear_caches):
+    from fastapi.testclient import TestClient
+    from main import app
+
+    with TestClient(app) as test_client:
+        yield test_client
@@ -0,0 +1,68 @@
+from datetime import date, timedelta
+
+import geocoding_client
+import main
+from upstream_guard import UpstreamGuard
+
+TODAY = date.today().isoformat()
+
+
+def _item(location: str, day: str = TODAY) -> dict:
+    return {
+        "location": location,
+        "date": day,
+        "time": "14:00",
+        "activity_description": "School sports day for students"
+    }
+
+
+def test_batch_plans_every_item_in_order(client):
+    tomorrow = (date.today() + timedelta(days=1)).isoformat()
+    items = [_item("Batch Town"), _item("Batch Town", tomorrow), _item("Other Town")]
+
+    response = client.post("/heatwave/planning/batch", json={"requests": items})
+
+    body = response.json()
+    assert response.status_code == 200
+    assert body["count"] == 3 and body["failed"] == 0
+    assert [item["index"] for item in body["items"]] == [0, 1, 2]
+    assert body["items"][1]["result"]["decision"]["verdict"] in ("PROCEED", "MODIFY", "AVOID")
+
+
+def test_batch_shares_lookups_per_location(client, upstream_calls):
+    items = [_item("Shared Town", (date.today() + timedelta(days=i)).isoformat()) for i in range(5)]
+
+    client.post("/heatwave/planning/batch", json={"requests": items})
+
+    assert upstream_calls["/search"] == 1
+    assert upstream_calls["/v1/forecast"] == 1
+
+
+def test_batch_reports_failures_per_item(client):
+    items = [_item("Good Town"), _item("Good Town", "1999-01-01")]
+
+    body = client.post("/heatwave/planning/batch", json={"requests": items}).json()
+
+    assert body["failed"] == 1
+    assert body["items"][0]["error"] is None
+    assert body["items"][1]["error"]["status_code"] == 404
+
+
+def test_oversized_batch_is_rejected(client, monkeypatch):
+    monkeypatch.setattr(main, "BATCH_MAX_ITEMS", 2)
+
+    response = client.post("/heatwave/planning/batch", json={"requests": [_item("Big Town")] * 3})
+
+    assert response.status_code == 413
+
+
+def test_cold_batch_larger_than_the_burst_queues_for_tokens(client, monkeypatch):
+    # Interactive requests would give up after 10 ms; batches must wait
+    guard = UpstreamGuard("nominatim", rate=200, burst=2, max_wait=0.01)
+    monkeypatch.setattr(geocoding_client, "NOMINATIM_GUARD", guard)
+
+    items = [_item(f"Cold Town {i}") for i in range(20)]
+    body = client.post("/heatwave/planning/batch", json={"requests": items}).json()
+
+    assert body["failed"] == 0
+    assert guard.calls == 20 and guard.rejected == 0
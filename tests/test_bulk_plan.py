@@ -0,0 +1,94 @@
+import json
+from datetime import date, timedelta
+
+import pytest
+
+import bulk_plan
+from bulk_plan import Checkpoint, load_checkpoint, run
+
+FINGERPRINT = "test"
+
+
+def _records() -> list:
+    days = [(date.today() + timedelta(days=offset)).isoformat() for offset in range(3)]
+    return [
+        {
+            "location": location,
+            "date": day,
+            "time": "14:00",
+            "activity_description": "School sports day for students",
+            "risk_model": None
+        }
+        for location in ("Bulk Town A", "Bulk Town B", "Bulk Town C")
+        for day in days
+    ]
+
+
+class Interrupted(Exception):
+    pass
+
+
+class InterruptingCheckpoint(Checkpoint):
+    """
+    Checkpoint that dies before its second write, like a killed run.
+    """
+
+    def append(self, rows: list):
+        if getattr(self, "writes", 0) == 1:
+            raise Interrupted
+        self.writes = getattr(self, "writes", 0) + 1
+        super().append(rows)
+
+
+def _run(records: list, path: str, checkpoint_class=Checkpoint):
+    done = load_checkpoint(path, FINGERPRINT)
+    checkpoint = checkpoint_class(path, FINGERPRINT)
+    try:
+        return run(records, done, checkpoint, 0, 1, None, False)
+    finally:
+        checkpoint.close()
+
+
+def test_interrupted_run_resumes_without_duplicate_rows(clear_caches, tmp_path):
+    records = _records()
+    path = str(tmp_path / "plans.csv.checkpoint")
+
+    with pytest.raises(Interrupted):
+        _run(records, path, InterruptingCheckpoint)
+    assert len(load_checkpoint(path, FINGERPRINT)) == 3
+
+    results, unavailable = _run(records, path)
+
+    with open(path, encoding="utf-8") as f:
+        rows = [json.loads(line)["row"] for line in f.readlines()[1:]]
+
+    assert unavailable == 0
+    assert sorted(rows) == list(range(len(records)))
+    assert all(results[index]["status"] == "ok" for index in range(len(records)))
+
+
+def test_row_that_fails_planning_does_not_fail_its_chunk(clear_caches, tmp_path, monkeypatch):
+    records = _records()
+    plan_row = bulk_plan._plan_row
+
+    def flaky_plan_row(geo, index, *args):
+        if index == 1:
+            raise KeyError("summary_facts")
+        return plan_row(geo, index, *args)
+
+    monkeypatch.setattr(bulk_plan, "_plan_row", flaky_plan_row)
+
+    results, _ = _run(records, str(tmp_path / "plans.csv.checkpoint"))
+
+    assert results[1]["status"] == "error"
+    assert "planning failed" in results[1]["error"]
+    assert [results[index]["status"] for index in (0, 2)] == ["ok", "ok"]
+
+
+@pytest.mark.parametrize("header", ['{"fingerp', "not json\n", "[1, 2]\n"])
+def test_unreadable_checkpoint_header_is_an_error(tmp_path, header):
+    path = tmp_path / "plans.csv.checkpoint"
+    path.write_text(header + '{"row": 0, "status": "ok"}\n', encoding="utf-8")
+
+    with pytest.raises(SystemExit, match="unreadable checkpoint header"):
+        load_checkpoint(str(path), FINGERPRINT)
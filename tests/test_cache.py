@@ -0,0 +1,20 @@
+import os
+
+from cache import TTLCache, _registry, load_snapshot, save_snapshot
+
+
+def test_snapshot_round_trip_leaves_no_temporary_files(tmp_path):
+    path = str(tmp_path / "warm_state.pickle")
+    cache = TTLCache("test-snapshot")
+
+    try:
+        cache.set("key", {"value": 1})
+        assert save_snapshot(path, ["test-snapshot"]) == {"test-snapshot": 1}
+        assert save_snapshot(path, ["test-snapshot"]) == {"test-snapshot": 1}
+        assert os.listdir(tmp_path) == ["warm_state.pickle"]
+
+        cache.clear()
+        assert load_snapshot(path) == {"test-snapshot": 1}
+        assert cache.get("key") == {"value": 1}
+    finally:
+        _registry.pop("test-snapshot", None)
@@ -0,0 +1,69 @@
+import pytest
+
+from benchmarks.fake_redis import FakeRedis
+from cache import MISSING, TTLCache, _registry
+from cache_backends import RedisBackend, SQLiteBackend
+from hourly_forecast import HourlyForecast
+
+VALUE = {
+    "forecast": HourlyForecast.from_open_meteo({
+        "time": ["2026-05-01T00:00", "2026-05-01T01:00"],
+        "temperature_2m": [31.5, None],
+        "relativehumidity_2m": [40, 42],
+        "windspeed_10m": [3.2, 4.0]
+    }),
+    "plan": {"verdict": "Go", "hours": [1, 2]}
+}
+
+
+@pytest.fixture(params=["memory", "sqlite", "redis"])
+def caches(request, tmp_path):
+    """
+    Two caches over the same storage, as two workers would see it:
+    one cache for memory, two SQLite connections to one file, two
+    Redis connections to one server.
+    """
+
+    name = f"test-{request.param}"
+
+    if request.param == "memory":
+        cache = TTLCache(name)
+        yield cache, cache
+
+    elif request.param == "sqlite":
+        path = str(tmp_path / "cache.sqlite3")
+        yield (
+            TTLCache(name, backend=SQLiteBackend(path)),
+            TTLCache(name, backend=SQLiteBackend(path))
+        )
+
+    else:
+        with FakeRedis() as fake:
+            yield (
+                TTLCache(name, backend=RedisBackend(fake.url)),
+                TTLCache(name, backend=RedisBackend(fake.url))
+            )
+
+    _registry.pop(name, None)
+
+
+def _plain(value: dict) -> dict:
+    return {**value, "forecast": value["forecast"].to_dicts()}
+
+
+def test_values_round_trip(caches):
+    writer, reader = caches
+
+    writer.set("key", VALUE)
+
+    assert _plain(reader.get("key")) == _plain(VALUE)
+    assert reader.get("other") is MISSING
+
+
+def test_expired_entries_are_misses_but_served_stale(caches):
+    writer, reader = caches
+
+    writer.set("key", VALUE, ttl=0)
+
+    assert reader.get("key") is MISSING
+    assert _plain(reader.get_stale("key")) == _plain(VALUE)
@@ -0,0 +1,52 @@
+from datetime import date, timedelta
+
+import pytest
+
+DAYS = [(date.today() + timedelta(days=offset)).isoformat() for offset in range(4)]
+
+
+def _plan(client, location: str, day: str):
+    return client.post("/heatwave/planning", json={
+        "location": location,
+        "date": day,
+        "activity_description": "Construction site shift"
+    })
+
+
+def _place(fake_upstream, monkeypatch, name: str, latitude: float, longitude: float):
+    monkeypatch.setitem(fake_upstream.fixtures["/search"], name, [{
+        "lat": str(latitude),
+        "lon": str(longitude),
+        "display_name": name.title()
+    }])
+
+
+def test_dates_in_the_window_share_one_download(client, upstream_calls):
+    for day in DAYS:
+        assert _plan(client, "Window Town", day).status_code == 200
+
+    assert upstream_calls["/v1/forecast"] == 1
+
+
+def test_nearby_places_share_a_grid_cell(client, upstream_calls, fake_upstream, monkeypatch):
+    _place(fake_upstream, monkeypatch, "north gate", 25.2031, 55.2712)
+    _place(fake_upstream, monkeypatch, "south gate", 25.1987, 55.2689)
+    _place(fake_upstream, monkeypatch, "far town", 25.4012, 55.5101)
+
+    for location in ("North Gate", "South Gate", "Far Town"):
+        assert _plan(client, location, DAYS[0]).status_code == 200
+
+    # North and South Gate snap to the same 0.1° cell; Far Town doesn't
+    assert upstream_calls["/v1/forecast"] == 2
+
+
+def test_cached_window_expires_at_the_next_model_run(client):
+    import weather_client
+
+    assert _plan(client, "Window Town", DAYS[0]).status_code == 200
+
+    (expires_at, window), = weather_client._forecast_cache._entries.values()
+    interval = weather_client.FORECAST_UPDATE_INTERVAL
+
+    assert expires_at == pytest.approx(window.generation + interval)
+    assert window.generation % interval == 0
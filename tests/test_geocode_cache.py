@@ -0,0 +1,56 @@
+from datetime import date, timedelta
+
+import pytest
+
+DAYS = [(date.today() + timedelta(days=offset)).isoformat() for offset in range(3)]
+
+
+def _plan(client, location: str, day: str):
+    return client.post("/heatwave/planning", json={
+        "location": location,
+        "date": day,
+        "activity_description": "Community football match"
+    })
+
+
+def test_spellings_of_one_place_share_one_lookup(client, upstream_calls):
+    spellings = ["São Paulo Test", "  sao   paulo TEST ", "SAO PAULO test"]
+    before = client.get("/cache/stats").json()["geocode"]
+
+    # Different dates, so the plan cache can't answer for the geocoder
+    for spelling, day in zip(spellings, DAYS):
+        assert _plan(client, spelling, day).status_code == 200
+
+    assert upstream_calls["/search"] == 1
+
+    after = client.get("/cache/stats").json()["geocode"]
+    assert after["hits"] - before["hits"] == 2
+    assert after["misses"] - before["misses"] == 1
+
+
+def test_not_found_is_cached(client, upstream_calls, fake_upstream, monkeypatch):
+    monkeypatch.setitem(fake_upstream.fixtures["/search"], "atlantis nowhere", [])
+
+    for day in DAYS[:2]:
+        response = _plan(client, "Atlantis Nowhere", day)
+        assert response.status_code == 404
+        assert response.json()["detail"] == "Location not found"
+
+    assert upstream_calls["/search"] == 1
+    assert upstream_calls["/v1/forecast"] == 0
+
+
+def test_not_found_expires_sooner_than_found(client, fake_upstream, monkeypatch):
+    import geocoding_client
+
+    monkeypatch.setitem(fake_upstream.fixtures["/search"], "atlantis nowhere", [])
+    _plan(client, "Atlantis Nowhere", DAYS[0])
+    _plan(client, "Found Town", DAYS[0])
+
+    entries = geocoding_client._geocode_cache._entries
+    negative_ttl = entries["atlantis nowhere"][0] - entries["found town"][0]
+
+    assert negative_ttl == pytest.approx(
+        geocoding_client.GEOCODE_NEGATIVE_TTL - geocoding_client.GEOCODE_CACHE_TTL,
+        abs=5
+    )
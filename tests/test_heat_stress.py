@@ -0,0 +1,64 @@
+import pytest
+
+from benchmarks.synthetic import synthetic_open_meteo_hourly
+from heat_stress import (
+    WBGT_ASSUMPTION,
+    heat_index_c,
+    heat_index_table,
+    wbgt_estimate_c,
+    wbgt_table
+)
+from hourly_forecast import HourlyForecast
+from planning_service import compute_plan
+from schemas import PlanningRequest
+
+
+def _celsius(fahrenheit: float) -> float:
+    return (fahrenheit - 32) * 5 / 9
+
+
+# NWS heat index chart (°F): temperature, relative humidity, heat
+# index, and the risk code of that value (0 Safe ... 3 Extreme)
+@pytest.mark.parametrize("temperature_f, humidity, expected_f, code", [
+    (80, 40, 80, 0),
+    (90, 50, 95, 1),
+    (100, 40, 109, 2),
+    (86, 90, 105, 2),
+    (96, 65, 121, 2),
+    (110, 40, 136, 3),
+])
+def test_heat_index_matches_the_nws_chart(temperature_f, humidity, expected_f, code):
+    temperature = _celsius(temperature_f)
+
+    assert heat_index_c(temperature, humidity) == pytest.approx(_celsius(expected_f), abs=0.5)
+    assert heat_index_table().classify([temperature], [humidity]).tolist() == [code]
+
+
+# BoM approximation, WBGT = 0.567 T + 0.393 e + 3.94, evaluated by hand
+# from published saturation vapour pressures (hPa) at 20, 30 and 40 °C
+@pytest.mark.parametrize("temperature, humidity, vapour_pressure, code", [
+    (20, 100, 23.37, 0),
+    (30, 50, 42.43 / 2, 1),
+    (40, 25, 73.75 / 4, 3),
+])
+def test_wbgt_matches_the_bom_approximation(temperature, humidity, vapour_pressure, code):
+    expected = 0.567 * temperature + 0.393 * vapour_pressure + 3.94
+
+    assert wbgt_estimate_c(temperature, humidity) == pytest.approx(expected, abs=0.1)
+    assert wbgt_table().classify([temperature], [humidity]).tolist() == [code]
+
+
+@pytest.mark.parametrize("risk_model, stated", [("wbgt", True), ("heat_index", False), (None, False)])
+def test_wbgt_plans_state_the_no_wind_assumption(risk_model, stated):
+    request = PlanningRequest(
+        location="Test City",
+        date="2026-05-03",
+        activity_description="school picnic in the park",
+        risk_model=risk_model
+    )
+    window = HourlyForecast.from_open_meteo(synthetic_open_meteo_hourly(days=3))
+
+    plan = compute_plan(request, {"display_name": "Test City"}, window.for_date(request.date))
+    explanation = plan["planning_explanation"]
+
+    assert (WBGT_ASSUMPTION in explanation) is stated
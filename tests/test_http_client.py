@@ -0,0 +1,36 @@
+from datetime import date, timedelta
+
+from fastapi.testclient import TestClient
+
+import http_client
+
+
+def test_app_uses_one_pooled_client_for_its_lifetime(clear_caches, upstream_calls, monkeypatch):
+    from main import app
+
+    created = []
+    create = http_client._create_client
+
+    def counting_create():
+        created.append(create())
+        return created[-1]
+
+    monkeypatch.setattr(http_client, "_create_client", counting_create)
+
+    with TestClient(app) as client:
+        pooled = http_client.get_http_client()
+
+        for offset, location in enumerate(("Pool Town", "Other Pool Town")):
+            response = client.post("/heatwave/planning", json={
+                "location": location,
+                "date": (date.today() + timedelta(days=offset)).isoformat(),
+                "activity_description": "Community football match"
+            })
+            assert response.status_code == 200
+
+        assert http_client.get_http_client() is pooled
+
+    assert upstream_calls.total == 4
+    assert created == [pooled]
+    assert pooled.is_closed and http_client._client is None
+    assert pooled.headers["User-Agent"] == http_client.USER_AGENT
@@ -0,0 +1,64 @@
+import pytest
+
+from nlp.intent_detector import detect_intent
+from nlp.matcher import CONSTRUCTION_KEYWORDS, SCHOOL_KEYWORDS, stem
+
+
+def _substring_intent(text: str) -> str:
+    """
+    The classifier the matcher replaced: plain substring search.
+    """
+
+    text = text.lower()
+    if any(keyword in text for keyword in SCHOOL_KEYWORDS):
+        return "school"
+    if any(keyword in text for keyword in CONSTRUCTION_KEYWORDS):
+        return "construction"
+    return "general"
+
+
+@pytest.mark.parametrize("text", [
+    "contractors",
+    "picnics with kids",
+    "excursions for pupils",
+    "schools outing",
+    "classes in the park",
+    "teachers and students walk",
+    "workers on two shifts",
+    "building works near the station",
+    "worksites downtown",
+    "field trips",
+    "evening walk with friends",
+])
+def test_inflected_keywords_match_like_the_substring_classifier(text):
+    assert detect_intent(text) == _substring_intent(text)
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("labourers on the night shift", "construction"),
+    ("laborers' lunch break", "construction"),
+    ("hiring a laborer", "construction"),
+    ("classroom activities outdoors", "school"),
+    ("class-room games", "school"),
+    ("walk with classmates", "school"),
+    ("schoolchildren at the zoo", "school"),
+    ("preschool sports", "school"),
+    ("schoolkids parade", "school"),
+])
+def test_compound_keywords_the_substring_classifier_matched(text, expected):
+    assert detect_intent(text) == expected == _substring_intent(text)
+
+
+def test_whole_word_matching_still_rejects_embedded_keywords():
+    assert detect_intent("classic car show") == "general"
+
+
+@pytest.mark.parametrize("word, expected", [
+    ("workers", "worker"),
+    ("classes", "class"),
+    ("duties", "duty"),
+    ("campus", "campus"),
+    ("class", "class"),
+])
+def test_stem(word, expected):
+    assert stem(word) == expected
@@ -0,0 +1,71 @@
+import pytest
+
+from benchmarks.synthetic import synthetic_open_meteo_hourly
+from hourly_forecast import HourlyForecast
+from llm_client import _render_explanation, explanation_cache_stats, generate_planning_explanations
+from planning_service import compute_plan, find_hour_context
+from schemas import PlanningRequest
+
+ACTIVITIES = (
+    "school picnic in the park",
+    "construction site shift",
+    "just going out",
+    "community football match"
+)
+
+
+@pytest.fixture
+def plans():
+    """
+    compute_plan outputs (with their requests) over several dates,
+    activities and focus times, rendered with a cold template cache.
+    """
+
+    window = HourlyForecast.from_open_meteo(synthetic_open_meteo_hourly(days=3))
+    _render_explanation.cache_clear()
+
+    plans = []
+    for date in window.dates():
+        for activity in ACTIVITIES:
+            for time in (None, "06:00", "14:00"):
+                request = PlanningRequest(
+                    location="Test City",
+                    date=date,
+                    time=time,
+                    activity_description=activity
+                )
+                plan = compute_plan(request, {"display_name": "Test City"}, window.for_date(date))
+                plans.append((request, plan))
+    return plans
+
+
+def _explanation_inputs(request: PlanningRequest, plan: dict) -> dict:
+    return {
+        "summary_facts": plan["summary_facts"],
+        "intent": plan["intent"],
+        "activity_description": request.activity_description,
+        "hour_context": find_hour_context(plan["risk_timeline"], request.time)
+    }
+
+
+def test_memoized_explanations_match_fresh_renders(plans):
+    # compute_plan rendered through the cache; render again from empty
+    _render_explanation.cache_clear()
+
+    rendered = generate_planning_explanations(
+        _explanation_inputs(request, plan) for request, plan in plans
+    )
+
+    assert rendered == [plan["planning_explanation"] for _, plan in plans]
+
+
+def test_repeated_plans_hit_the_template_cache(plans):
+    before = explanation_cache_stats()
+
+    generate_planning_explanations(_explanation_inputs(request, plan) for request, plan in plans)
+
+    after = explanation_cache_stats()
+    assert after["misses"] == before["misses"]
+    assert after["hits"] - before["hits"] == len(plans)
+    assert after["size"] < len(plans)
+
@@ -0,0 +1,124 @@
+import asyncio
+import sys
+
+import pytest
+
+import llm_refiner
+from benchmarks.synthetic import synthetic_open_meteo_hourly
+from hourly_forecast import HourlyForecast
+from llm_refiner import (
+    LocalStubModel,
+    refine_explanation_with_llm,
+    refine_within_budget,
+    refinement_key,
+    refinement_status,
+    set_refinement_model
+)
+from planning_service import compute_plan
+from schemas import PlanningRequest
+
+
+def _plan_inputs(date: str) -> tuple:
+    """
+    (base explanation, decision, summary facts) as compute_plan
+    produces them for one date of the synthetic forecast.
+    """
+
+    request = PlanningRequest(
+        location="Test City",
+        date=date,
+        time="14:00",
+        activity_description="school picnic in the park"
+    )
+    window = HourlyForecast.from_open_meteo(synthetic_open_meteo_hourly(days=4))
+    plan = compute_plan(request, {"display_name": "Test City"}, window.for_date(date))
+
+    return plan["planning_explanation"], plan["decision"], plan["summary_facts"]
+
+
+# One plan per test, so refinement keys don't overlap between tests
+PLANS = [_plan_inputs(f"2026-05-0{day}") for day in range(1, 5)]
+
+
+class FailingModel:
+    def __init__(self):
+        self.calls = 0
+
+    def run(self, messages):
+        self.calls += 1
+        raise RuntimeError("upstream model error")
+
+
+@pytest.fixture(autouse=True)
+def clean_refiner():
+    llm_refiner._refined_cache.clear()
+    llm_refiner._failed_refinements.clear()
+    yield
+    set_refinement_model(None)
+
+
+def test_refinement_within_budget_is_returned():
+    set_refinement_model(LocalStubModel())
+    base, decision, facts = PLANS[0]
+
+    refined = asyncio.run(refine_within_budget(base, decision, facts, budget=2))
+
+    assert refined.startswith("Refined: " + base)
+
+
+def test_timeout_falls_back_to_deterministic_text():
+    set_refinement_model(LocalStubModel(delay=0.2))
+    base, decision, facts = PLANS[1]
+    key = refinement_key(base, decision, facts)
+
+    async def run():
+        refined = await refine_within_budget(base, decision, facts, budget=0.01)
+        status = refinement_status(key)
+        await llm_refiner._inflight[key]
+        return refined, status
+
+    refined, status = asyncio.run(run())
+
+    # None: the caller keeps the deterministic explanation
+    assert refined is None
+    assert status == "pending"
+    assert refinement_status(key) == "ready"
+
+
+def test_cached_refinement_skips_the_model():
+    set_refinement_model(LocalStubModel())
+    base, decision, facts = PLANS[2]
+    first = asyncio.run(refine_within_budget(base, decision, facts, budget=2))
+
+    failing = FailingModel()
+    set_refinement_model(failing)
+    second = asyncio.run(refine_within_budget(base, decision, facts, budget=0))
+
+    assert second == first
+    assert failing.calls == 0
+
+
+def test_failed_refinement_is_not_retried():
+    failing = FailingModel()
+    set_refinement_model(failing)
+    base, decision, facts = PLANS[3]
+    key = refinement_key(base, decision, facts)
+
+    assert asyncio.run(refine_within_budget(base, decision, facts, budget=2)) is None
+    assert refinement_status(key) == "failed"
+
+    assert asyncio.run(refine_within_budget(base, decision, facts, budget=2)) is None
+    assert failing.calls == 1
+
+
+def test_missing_sdk_makes_refinement_unavailable(monkeypatch, caplog):
+    monkeypatch.setenv("BYTEZ_API_KEY", "test-key")
+    monkeypatch.setitem(sys.modules, "bytez", None)
+    monkeypatch.setattr(llm_refiner, "_sdk_missing", False)
+
+    base, decision, facts = PLANS[0]
+
+    assert llm_refiner._get_model() is None
+    assert llm_refiner._get_model() is None
+    assert refine_explanation_with_llm(base, decision, facts) == base
+    assert len([r for r in caplog.records if "bytez" in r.getMessage()]) == 1
@@ -0,0 +1,58 @@
+from datetime import date
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from metrics import ServerTimingMiddleware, stage
+
+
+def _sample(text: str, name: str, labels: str) -> float:
+    prefix = f"{name}{{{labels}}} "
+    line = next((line for line in text.splitlines() if line.startswith(prefix)), None)
+    return float(line[len(prefix):]) if line else 0.0
+
+
+def test_planning_request_is_recorded_per_stage(client):
+    before = client.get("/metrics").text
+
+    client.post("/heatwave/planning", json={
+        "location": "Metrics Town",
+        "date": date.today().isoformat(),
+        "activity_description": "Construction site shift"
+    })
+
+    response = client.get("/metrics")
+    after = response.text
+
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    for stage_name in ("geocode", "forecast", "intent", "risk_timeline", "decision", "explanation"):
+        labels = f'stage="{stage_name}"'
+        count = "heatwave_stage_duration_seconds_count"
+        assert _sample(after, count, labels) - _sample(before, count, labels) == 1
+
+    for upstream in ("nominatim", "open-meteo"):
+        labels = f'upstream="{upstream}"'
+        count = "heatwave_upstream_request_duration_seconds_count"
+        assert _sample(after, count, labels) - _sample(before, count, labels) == 1
+
+    assert 'heatwave_cache_hits_total{cache="geocode"}' in after
+    assert 'heatwave_cache_misses_total{cache="plan"}' in after
+
+
+def test_server_timing_header_lists_the_timed_stages():
+    app = FastAPI()
+    app.add_middleware(ServerTimingMiddleware)
+
+    @app.get("/")
+    def timed():
+        with stage("geocode"):
+            pass
+        with stage("forecast"):
+            pass
+        return {}
+
+    response = TestClient(app).get("/")
+
+    names = [entry.split(";")[0] for entry in response.headers["server-timing"].split(", ")]
+    assert names == ["geocode", "forecast"]
+    assert "dur=" in response.headers["server-timing"]
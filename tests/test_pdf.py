@@ -0,0 +1,56 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+
+import pdf_generator
+
+TODAY = date.today().isoformat()
+
+
+def _request(location: str) -> dict:
+    return {
+        "location": location,
+        "date": TODAY,
+        "activity_description": "School sports day for students"
+    }
+
+
+def test_pdf_is_rendered_in_memory(client, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+
+    response = client.post("/heatwave/planning/pdf", json=_request("Pdf Town"))
+
+    assert response.status_code == 200
+    assert response.content.startswith(b"%PDF")
+    assert "attachment" in response.headers["content-disposition"]
+    assert os.listdir(tmp_path) == []
+
+
+def test_repeated_downloads_reuse_the_rendering(client, monkeypatch):
+    renders = []
+    render = pdf_generator.render_planning_pdf
+
+    def counting_render(**fields):
+        renders.append(fields["location"])
+        return render(**fields)
+
+    monkeypatch.setattr(pdf_generator, "render_planning_pdf", counting_render)
+
+    plan_id = client.post("/heatwave/planning", json=_request("Pdf Town")).json()["plan_id"]
+    downloads = [client.get(f"/heatwave/planning/{plan_id}/pdf").content for _ in range(3)]
+
+    assert len(renders) == 1
+    assert downloads[0] == downloads[1] == downloads[2]
+
+
+def test_concurrent_downloads_get_their_own_document(client):
+    locations = [f"Pdf Town {i}" for i in range(4)]
+
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        documents = list(pool.map(
+            lambda location: client.post("/heatwave/planning/pdf", json=_request(location)).content,
+            locations
+        ))
+
+    assert all(document.startswith(b"%PDF") for document in documents)
+    assert len(set(documents)) == len(locations)
@@ -0,0 +1,48 @@
+from datetime import date
+
+REQUEST = {
+    "location": "Shared Plan Town",
+    "date": date.today().isoformat(),
+    "time": "15:00",
+    "activity_description": "Construction site shift"
+}
+
+
+def test_plan_is_computed_once_and_reused_by_id(client, upstream_calls):
+    plan = client.post("/heatwave/planning", json=REQUEST).json()
+    calls = upstream_calls.total
+
+    again = client.get(f"/heatwave/planning/{plan['plan_id']}")
+
+    assert again.status_code == 200
+    assert again.json() == plan
+    assert upstream_calls.total == calls == 2
+
+
+def test_identical_requests_share_one_plan(client, upstream_calls):
+    first = client.post("/heatwave/planning", json=REQUEST).json()
+    second = client.post("/heatwave/planning", json={**REQUEST, "location": "  shared plan TOWN"}).json()
+
+    assert second["plan_id"] == first["plan_id"]
+    assert upstream_calls.total == 2
+
+
+def test_pdf_exports_reuse_the_cached_plan(client, upstream_calls):
+    plan_id = client.post("/heatwave/planning", json=REQUEST).json()["plan_id"]
+    calls = upstream_calls.total
+
+    by_id = client.get(f"/heatwave/planning/{plan_id}/pdf")
+    by_body = client.post("/heatwave/planning/pdf", json=REQUEST)
+
+    for response in (by_id, by_body):
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "application/pdf"
+    assert upstream_calls.total == calls
+
+
+def test_unknown_plan_id_is_not_found(client):
+    assert client.get("/heatwave/planning/0123456789abcdef").status_code == 404
+    assert client.get("/heatwave/planning/0123456789abcdef/pdf").status_code == 404
+
+    # Sibling routes are not mistaken for plan IDs
+    assert client.get("/heatwave/planning/pdf").status_code == 405
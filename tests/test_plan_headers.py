@@ -0,0 +1,49 @@
+import pytest
+
+from planning_service import PlanNotModified, check_not_modified, plan_cache_headers, plan_etag
+from responses import etag_matches
+
+PLAN_ID = "0123456789abcdef"
+GENERATION = 1777766400.0
+
+
+def test_plan_etag_is_weak_and_tracks_the_model_run():
+    etag = plan_etag(PLAN_ID, GENERATION, "full")
+
+    assert etag.startswith('W/"')
+    assert etag != plan_etag(PLAN_ID, GENERATION + 3600, "full")
+    assert etag != plan_etag(PLAN_ID, GENERATION, "compact")
+
+
+def test_no_etag_without_a_model_run():
+    headers = plan_cache_headers(PLAN_ID, None)
+
+    assert "ETag" not in headers
+    assert headers["Vary"] == "Accept-Encoding"
+
+    # Nothing to validate against: never a 304
+    check_not_modified(PLAN_ID, None, "full", "*")
+
+
+def test_not_modified_carries_vary():
+    etag = plan_etag(PLAN_ID, GENERATION, "full")
+
+    with pytest.raises(PlanNotModified) as raised:
+        check_not_modified(PLAN_ID, GENERATION, "full", etag)
+
+    assert raised.value.headers["ETag"] == etag
+    assert raised.value.headers["Vary"] == "Accept-Encoding"
+
+
+@pytest.mark.parametrize("if_none_match", [
+    'W/"a-1-full"',
+    '"a-1-full"',
+    '"other", W/"a-1-full"',
+    "*",
+])
+def test_etag_matches_compares_weakly(if_none_match):
+    assert etag_matches(if_none_match, 'W/"a-1-full"')
+
+
+def test_etag_matches_rejects_other_tags():
+    assert not etag_matches('W/"a-2-full"', 'W/"a-1-full"')
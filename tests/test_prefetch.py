@@ -0,0 +1,26 @@
+from datetime import date
+
+from prefetch import PrefetchScheduler, get_tile
+
+TODAY = date.today().isoformat()
+
+
+def test_prefetched_location_plans_without_upstream_calls(client, upstream_calls):
+    scheduler = PrefetchScheduler(["Prefetch Town"], engine="threshold", days=2)
+    client.portal.call(scheduler.run_once)
+
+    assert scheduler.failed == 0 and scheduler.tiles == 2
+    latitude, longitude = scheduler._coordinates["Prefetch Town"]
+    assert get_tile(latitude, longitude, TODAY, "threshold") is not None
+
+    assert upstream_calls["/search"] == 1 and upstream_calls["/v1/forecast"] == 1
+    response = client.post("/heatwave/planning", json={
+        "location": "Prefetch Town",
+        "date": TODAY,
+        "time": "14:00",
+        "activity_description": "School sports day for students",
+        "risk_model": "threshold"
+    })
+
+    assert response.status_code == 200
+    assert upstream_calls.total == 2
@@ -0,0 +1,76 @@
+import json
+import pickle
+
+import pytest
+
+from benchmarks.synthetic import synthetic_open_meteo_hourly
+from hourly_forecast import HourlyForecast
+from risk_engine import generate_risk_timeline_from_columns
+from risk_engine_vectorized import generate_risk_timeline_columnar
+
+
+def _window_with_gaps() -> HourlyForecast:
+    hourly = synthetic_open_meteo_hourly(days=3)
+    hourly["temperature_2m"][5] = None
+    hourly["relativehumidity_2m"][7] = None
+    hourly["temperature_2m"][24:48] = [None] * 24
+    return HourlyForecast.from_open_meteo(hourly)
+
+
+@pytest.mark.parametrize("date", ["2026-05-01", "2026-05-02", "2026-05-03"])
+def test_scalar_and_columnar_engines_agree(date):
+    day = _window_with_gaps().for_date(date)
+
+    scalar = generate_risk_timeline_from_columns(day.times, day.temperature, day.humidity)
+    columnar = generate_risk_timeline_columnar(day.times, day.temperature, day.humidity, "threshold")
+
+    assert scalar == columnar
+
+
+@pytest.mark.parametrize("engine", ["threshold", "heat_index", "wbgt"])
+def test_missing_hours_are_reported_as_none(engine):
+    day = _window_with_gaps().for_date("2026-05-01")
+
+    result = generate_risk_timeline_columnar(day.times, day.temperature, day.humidity, engine)
+    timeline = result["risk_timeline"]
+
+    assert timeline[5]["temperature"] is None
+    assert timeline[5]["risk_level"] == "Safe"
+    assert timeline[7]["humidity"] is None
+    json.dumps(result, allow_nan=False)
+
+
+def test_day_without_readings_has_no_maximum():
+    day = _window_with_gaps().for_date("2026-05-02")
+
+    result = generate_risk_timeline_from_columns(day.times, day.temperature, day.humidity)
+
+    assert result["summary_facts"]["max_temperature"] is None
+    json.dumps(result, allow_nan=False)
+    json.dumps(day.to_dicts(), allow_nan=False)
+
+
+def test_requests_share_temperature_objects():
+    window = HourlyForecast.from_open_meteo(synthetic_open_meteo_hourly())
+    day = "2026-05-03"
+
+    first, second = (
+        generate_risk_timeline_from_columns(
+            window.for_date(day).times,
+            window.for_date(day).temperature,
+            window.for_date(day).humidity
+        )["risk_timeline"]
+        for _ in range(2)
+    )
+
+    assert all(a["temperature"] is b["temperature"] for a, b in zip(first, second))
+
+
+def test_forecast_pickles_with_generation():
+    window = _window_with_gaps()
+    window.generation = 1760000000.0
+
+    restored = pickle.loads(pickle.dumps(window))
+
+    assert restored.generation == window.generation
+    assert restored.to_dicts() == window.to_dicts()
@@ -0,0 +1,45 @@
+import pytest
+
+from benchmarks.synthetic import synthetic_open_meteo_hourly
+from hourly_forecast import HourlyForecast
+from planning_service import PLAN_VIEWS, compute_plan, plan_id_for, shape_plan
+from schemas import PlanningRequest, PlanningResponse
+
+GEO = {"display_name": "Test City", "lat": 12.97, "lon": 77.59}
+
+
+def _plan(risk_model=None, time="14:00", gaps=False) -> dict:
+    request = PlanningRequest(
+        location="Test City",
+        date="2026-05-03",
+        time=time,
+        activity_description="school picnic in the park",
+        risk_model=risk_model
+    )
+
+    hourly = synthetic_open_meteo_hourly(days=3)
+    if gaps:
+        hourly["temperature_2m"][48:52] = [None] * 4
+        hourly["relativehumidity_2m"][60] = None
+    window = HourlyForecast.from_open_meteo(hourly, generation=1777766400.0)
+
+    plan = compute_plan(request, GEO, window.for_date(request.date))
+    plan["plan_id"] = plan_id_for(request)
+    return plan
+
+
+@pytest.mark.parametrize("view", PLAN_VIEWS)
+@pytest.mark.parametrize("risk_model", [None, "heat_index", "wbgt"])
+def test_every_view_matches_the_response_model(view, risk_model):
+    shaped = shape_plan(_plan(risk_model), view)
+
+    PlanningResponse.model_validate(shaped)
+
+
+@pytest.mark.parametrize("view", PLAN_VIEWS)
+def test_plans_with_missing_hours_match_the_response_model(view):
+    shaped = shape_plan(_plan(time="00:00", gaps=True), view)
+
+    response = PlanningResponse.model_validate(shaped)
+
+    assert response.focused_hour_context.temperature is None
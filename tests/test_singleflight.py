@@ -0,0 +1,74 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+
+import pytest
+
+from singleflight import SingleFlight, ThreadSingleFlight
+
+
+def test_concurrent_requests_share_upstream_calls(client, upstream_calls, fake_upstream, monkeypatch):
+    # Slow upstream, so every request arrives while the first is in flight
+    monkeypatch.setattr(fake_upstream, "latency", 0.2)
+    days = [(date.today() + timedelta(days=i % 4)).isoformat() for i in range(8)]
+    before = client.get("/cache/stats").json()["singleflight"]
+
+    def plan(day: str):
+        return client.post("/heatwave/planning", json={
+            "location": "Alert City",
+            "date": day,
+            "activity_description": "Community football match"
+        }).status_code
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        assert list(pool.map(plan, days)) == [200] * 8
+
+    after = client.get("/cache/stats").json()["singleflight"]
+    coalesced = sum(after[name]["coalesced"] - before[name]["coalesced"] for name in after)
+
+    assert upstream_calls["/search"] == 1
+    assert upstream_calls["/v1/forecast"] == 1
+    assert coalesced >= 7
+
+
+def test_failure_reaches_every_waiter_and_is_not_cached():
+    flight = SingleFlight("test")
+    calls = []
+
+    async def failing():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        raise RuntimeError("upstream down")
+
+    async def run():
+        return await asyncio.gather(
+            *(flight.do("key", failing) for _ in range(5)),
+            return_exceptions=True
+        )
+
+    results = asyncio.run(run())
+
+    assert all(isinstance(result, RuntimeError) for result in results)
+    assert len(calls) == 1
+
+    with pytest.raises(RuntimeError):
+        asyncio.run(flight.do("key", failing))
+    assert len(calls) == 2
+
+
+def test_thread_single_flight_runs_once_per_key():
+    flight = ThreadSingleFlight("test")
+    calls = []
+
+    def slow():
+        calls.append(1)
+        time.sleep(0.2)
+        return "value"
+
+    with ThreadPoolExecutor(max_workers=6) as pool:
+        results = list(pool.map(lambda _: flight.do("key", slow), range(6)))
+
+    assert results == ["value"] * 6
+    assert len(calls) == 1
+    assert flight.stats()["coalesced"] == 5
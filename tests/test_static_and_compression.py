@@ -0,0 +1,69 @@
+from datetime import date
+
+import pytest
+
+PLANNING = {
+    "location": "Gzip Town",
+    "date": date.today().isoformat(),
+    "activity_description": "Construction site shift"
+}
+
+
+@pytest.mark.parametrize("coding", ["gzip", "identity"])
+def test_ui_is_served_with_etag_and_cache_control(client, coding):
+    response = client.get("/ui", headers={"Accept-Encoding": coding})
+
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "text/html; charset=utf-8"
+    assert response.headers.get("content-encoding", "identity") == coding
+    assert response.headers["etag"].startswith('"')
+    assert response.headers["cache-control"] == "no-cache"
+    assert "<html" in response.text.lower()
+
+
+def test_ui_prefers_brotli_when_available(client):
+    pytest.importorskip("brotli")
+
+    response = client.get("/ui", headers={"Accept-Encoding": "gzip, br"})
+
+    assert response.headers["content-encoding"] == "br"
+
+
+def test_ui_revalidation_answers_304(client):
+    etag = client.get("/ui", headers={"Accept-Encoding": "gzip"}).headers["etag"]
+
+    response = client.get("/ui", headers={"Accept-Encoding": "gzip", "If-None-Match": etag})
+
+    assert response.status_code == 304
+    assert response.content == b""
+    assert response.headers["etag"] == etag
+
+
+def test_gzip_and_identity_have_distinct_etags(client):
+    gzip_etag = client.get("/ui", headers={"Accept-Encoding": "gzip"}).headers["etag"]
+    identity_etag = client.get("/ui", headers={"Accept-Encoding": "identity"}).headers["etag"]
+
+    assert gzip_etag != identity_etag
+
+
+def test_planning_json_is_compressed(client):
+    response = client.post("/heatwave/planning", json=PLANNING, headers={"Accept-Encoding": "gzip"})
+
+    assert response.status_code == 200
+    assert response.headers["content-encoding"] == "gzip"
+    assert [field.strip().lower() for field in response.headers["vary"].split(",")].count("accept-encoding") == 1
+    assert response.json()["plan_id"]
+
+
+def test_streams_are_not_compressed(client):
+    request = {
+        "location": "Gzip Town",
+        "start_date": PLANNING["date"],
+        "end_date": PLANNING["date"],
+        "activity_description": "Construction site shift"
+    }
+
+    response = client.post("/heatwave/planning/stream", json=request, headers={"Accept-Encoding": "gzip"})
+
+    assert response.status_code == 200
+    assert "content-encoding" not in response.headers
@@ -0,0 +1,55 @@
+import json
+from datetime import date, timedelta
+
+import pytest
+
+
+def _range(days: int, location: str = "Stream Town") -> dict:
+    start = date.today()
+    return {
+        "location": location,
+        "start_date": start.isoformat(),
+        "end_date": (start + timedelta(days=days - 1)).isoformat(),
+        "activity_description": "School sports day for students"
+    }
+
+
+def test_ndjson_streams_one_line_per_day(client, upstream_calls):
+    request = _range(5)
+
+    with client.stream("POST", "/heatwave/planning/stream", json=request) as response:
+        assert response.headers["content-type"] == "application/x-ndjson"
+        days = [json.loads(line) for line in response.iter_lines() if line]
+
+    assert [day["date"] for day in days] == [
+        (date.today() + timedelta(days=i)).isoformat() for i in range(5)
+    ]
+    assert all(day["error"] is None for day in days)
+    assert days[0]["result"]["decision"]["verdict"] in ("PROCEED", "MODIFY", "AVOID")
+    assert upstream_calls["/search"] == 1 and upstream_calls["/v1/forecast"] == 1
+
+
+def test_streamed_days_are_cached_as_plans(client, upstream_calls):
+    with client.stream("POST", "/heatwave/planning/stream", json=_range(2)) as response:
+        plan_id = json.loads(next(response.iter_lines()))["result"]["plan_id"]
+
+    calls = upstream_calls.total
+    assert client.get(f"/heatwave/planning/{plan_id}").status_code == 200
+    assert upstream_calls.total == calls
+
+
+def test_sse_sends_day_events_then_end(client):
+    response = client.post("/heatwave/planning/stream?format=sse", json=_range(3))
+
+    assert response.headers["content-type"].startswith("text/event-stream")
+    events = [block for block in response.text.split("\n\n") if block]
+    assert [event.splitlines()[0] for event in events] == ["event: day"] * 3 + ["event: end"]
+    assert json.loads(events[0].splitlines()[1][len("data: "):])["date"] == date.today().isoformat()
+
+
+@pytest.mark.parametrize("days", [0, 17])
+def test_range_must_cover_1_to_16_days(client, days):
+    request = _range(1)
+    request["end_date"] = (date.today() + timedelta(days=days - 1)).isoformat()
+
+    assert client.post("/heatwave/planning/stream", json=request).status_code == 422
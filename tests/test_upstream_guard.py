@@ -0,0 +1,82 @@
+import httpx
+import pytest
+
+from http_client import HTTPX_TRANSIENT_ERRORS
+from upstream_guard import WAIT_FOR_TOKEN, CircuitBreaker, UpstreamGuard, UpstreamUnavailable
+
+
+def _status_error(status: int) -> httpx.HTTPStatusError:
+    request = httpx.Request("GET", "https://upstream.test/")
+    response = httpx.Response(status, request=request)
+    return httpx.HTTPStatusError(f"{status}", request=request, response=response)
+
+
+def _guard() -> UpstreamGuard:
+    return UpstreamGuard("test", rate=1000, burst=1000, failure_threshold=2, reset_timeout=0)
+
+
+def test_client_errors_do_not_open_the_breaker():
+    guard = _guard()
+
+    for _ in range(5):
+        guard.record_error(_status_error(404), HTTPX_TRANSIENT_ERRORS)
+
+    assert guard.breaker.state == CircuitBreaker.CLOSED
+    assert guard.failures == 0
+
+
+@pytest.mark.parametrize("exc", [
+    _status_error(503),
+    httpx.ConnectError("refused"),
+    httpx.ReadTimeout("slow"),
+])
+def test_server_and_transport_errors_open_the_breaker(exc):
+    guard = _guard()
+
+    guard.record_error(exc, HTTPX_TRANSIENT_ERRORS)
+    guard.record_error(exc, HTTPX_TRANSIENT_ERRORS)
+
+    assert guard.breaker.state == CircuitBreaker.OPEN
+
+
+def _open(guard: UpstreamGuard):
+    guard.record_failure()
+    guard.record_failure()
+
+
+def test_unrecorded_probe_frees_the_half_open_slot():
+    guard = _guard()
+    _open(guard)
+
+    ticket = guard.before_call()
+    assert guard.breaker.state == CircuitBreaker.HALF_OPEN
+    with pytest.raises(UpstreamUnavailable):
+        guard.before_call()
+
+    guard.release_probe(ticket)
+
+    guard.before_call()
+    assert guard.breaker.state == CircuitBreaker.HALF_OPEN
+
+
+def test_only_the_probe_holder_can_release_it():
+    guard = _guard()
+    guard.record_success()
+    closed_ticket = guard.before_call()
+    _open(guard)
+
+    guard.before_call()
+    guard.release_probe(closed_ticket)
+
+    assert guard.breaker.state == CircuitBreaker.HALF_OPEN
+
+
+def test_waiting_for_token_queues_instead_of_failing():
+    guard = UpstreamGuard("test", rate=100, burst=1, max_wait=0)
+
+    guard.before_call()
+    with pytest.raises(UpstreamUnavailable):
+        guard.before_call()
+
+    guard.before_call(max_wait=WAIT_FOR_TOKEN)
+    assert guard.calls == 2
@@ -0,0 +1,291 @@
+"""
+upstream_guard.py
+
+Client-side protection for upstream services (Nominatim, Open-Meteo).
+A token-bucket rate limiter keeps us inside each provider's usage
+policy, and a circuit breaker fails fast while an upstream is unhealthy
+instead of letting every request wait for the full timeout.
+"""
+
+import asyncio
+import os
+import threading
+import time
+
+
+# Token buckets are per process: policy rates are split across the
+# uvicorn workers (WEB_CONCURRENCY) so the deployment as a whole
+# stays inside them
+WORKER_COUNT = max(1, int(os.getenv("WEB_CONCURRENCY", 1)))
+
+# max_wait for callers that should queue for a token however long
+# it takes (batches, background prefetch)
+WAIT_FOR_TOKEN = float("inf")
+
+
+def worker_share(rate: float) -> float:
+    """
+    This process's share of a deployment-wide rate limit.
+    """
+    return rate / WORKER_COUNT
+
+
+class UpstreamUnavailable(Exception):
+    """
+    Raised when an upstream cannot be reached, is rate limited locally,
+    or its circuit breaker is open. Distinct from "not found".
+    """
+
+    def __init__(self, upstream: str, reason: str, retry_after: float | None = None):
+        super().__init__(f"{upstream} unavailable: {reason}")
+        self.upstream = upstream
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class TokenBucket:
+    """
+    Token bucket allowing `rate` calls per second with bursts of `burst`.
+
+    Callers reserve a token and sleep until it is due, so waiting
+    callers are served in arrival order.
+    """
+
+    def __init__(self, rate: float, burst: int = 1):
+        self.rate = rate
+        self.burst = burst
+
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _reserve(self, max_wait: float | None) -> float | None:
+        """
+        Take a token, returning how long to wait for it,
+        or None if that would exceed max_wait.
+        """
+
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(
+                self.burst,
+                self._tokens + (now - self._updated) * self.rate
+            )
+            self._updated = now
+
+            wait = max(0.0, (1 - self._tokens) / self.rate)
+            if max_wait is not None and wait > max_wait:
+                return None
+
+            self._tokens -= 1
+            return wait
+
+    def acquire(self, max_wait: float | None = None) -> bool:
+        wait = self._reserve(max_wait)
+        if wait is None:
+            return False
+        if wait:
+            time.sleep(wait)
+        return True
+
+    async def acquire_async(self, max_wait: float | None = None) -> bool:
+        wait = self._reserve(max_wait)
+        if wait is None:
+            return False
+        if wait:
+            await asyncio.sleep(wait)
+        return True
+
+
+class CircuitBreaker:
+    """
+    Opens after `failure_threshold` consecutive failures; after
+    `reset_timeout` seconds a single probe call is let through
+    (half-open) and its outcome closes or re-opens the circuit.
+
+    allow() hands the probe caller a ticket; only that ticket can give
+    the probe back (release_probe), so other callers can't discard it.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._probe = None
+        self._lock = threading.Lock()
+
+    def allow(self):
+        """
+        False if the call must not happen; otherwise a truthy ticket,
+        which is the probe ticket when this call tests a half-open circuit.
+        """
+
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+
+            if self.state == self.OPEN:
+                if time.monotonic() - self.opened_at >= self.reset_timeout:
+                    self.state = self.HALF_OPEN
+                    self._probe = object()
+                    return self._probe
+                return False
+
+            # Half-open: a probe is already in flight
+            return False
+
+    def retry_after(self) -> float:
+        remaining = self.reset_timeout - (time.monotonic() - self.opened_at)
+        return max(0.0, remaining)
+
+    def release_probe(self, ticket):
+        """
+        Give back a half-open probe whose outcome was never recorded
+        (the call didn't happen, or raised something unexpected).
+        Tickets other than the current probe's are ignored.
+        """
+        with self._lock:
+            if self.state == self.HALF_OPEN and ticket is self._probe:
+                self.state = self.OPEN
+                self._probe = None
+
+    def record_success(self):
+        with self._lock:
+            self.state = self.CLOSED
+            self.failures = 0
+            self._probe = None
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self._probe = None
+
+            if (
+                self.state == self.HALF_OPEN
+                or self.failures >= self.failure_threshold
+            ):
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+
+
+class UpstreamGuard:
+    """
+    Rate limiter + circuit breaker for one upstream.
+
+    Usage:
+        ticket = guard.before_call()   # may raise UpstreamUnavailable
+        try:
+            ... call upstream ...
+        except ... as exc:
+            guard.record_error(exc, transient_errors)
+        else:
+            guard.record_success()
+        finally:
+            guard.release_probe(ticket)
+    """
+
+    def __init__(
+        self,
+        name: str,
+        rate: float,
+        burst: int = 1,
+        max_wait: float = 10,
+        failure_threshold: int = 5,
+        reset_timeout: float = 30
+    ):
+        self.name = name
+        self.max_wait = max_wait
+        self.bucket = TokenBucket(rate, burst)
+        self.breaker = CircuitBreaker(failure_threshold, reset_timeout)
+
+        self.calls = 0
+        self.failures = 0
+        self.rejected = 0
+
+    def _check_breaker(self):
+        ticket = self.breaker.allow()
+        if not ticket:
+            self.rejected += 1
+            raise UpstreamUnavailable(
+                self.name,
+                "circuit open",
+                retry_after=self.breaker.retry_after()
+            )
+        return ticket
+
+    def _rate_limited(self, ticket):
+        self.rejected += 1
+        self.breaker.release_probe(ticket)
+        return UpstreamUnavailable(
+            self.name,
+            "rate limit exceeded",
+            retry_after=self.max_wait
+        )
+
+    def before_call(self, max_wait: float | None = None):
+        """
+        Returns the breaker ticket for release_probe.
+
+        max_wait overrides how long to queue for a token (0: don't wait,
+        WAIT_FOR_TOKEN: as long as it takes).
+        """
+        ticket = self._check_breaker()
+        if not self.bucket.acquire(self.max_wait if max_wait is None else max_wait):
+            raise self._rate_limited(ticket)
+        self.calls += 1
+        return ticket
+
+    async def before_call_async(self, max_wait: float | None = None):
+        ticket = self._check_breaker()
+        if not await self.bucket.acquire_async(self.max_wait if max_wait is None else max_wait):
+            raise self._rate_limited(ticket)
+        self.calls += 1
+        return ticket
+
+    def record_success(self):
+        self.breaker.record_success()
+
+    def record_failure(self):
+        self.failures += 1
+        self.breaker.record_failure()
+
+    def record_error(self, exc: Exception, transient_errors: tuple):
+        """
+        Record a failed call. Only 5xx responses and `transient_errors`
+        (timeouts, connection failures) count against the breaker; a
+        4xx or an unreadable body means the upstream did answer.
+        """
+
+        response = getattr(exc, "response", None)
+        if response is not None:
+            upstream_fault = response.status_code >= 500
+        else:
+            upstream_fault = isinstance(exc, transient_errors)
+
+        if upstream_fault:
+            self.record_failure()
+        else:
+            self.record_success()
+
+    def release_probe(self, ticket):
+        """
+        Free the half-open probe slot if this call (ticket from
+        before_call) held it and ended without a recorded outcome.
+        """
+        self.breaker.release_probe(ticket)
+
+    def stats(self) -> dict:
+        return {
+            "state": self.breaker.state,
+            "rate_per_second": self.bucket.rate,
+            "calls": self.calls,
+            "failures": self.failures,
+            "rejected": self.rejected
+        }
@@ -0,0 +1,133 @@
+"""
+warmup.py
+
+Optional startup warm-up, so the first requests after a cold start
+don't pay for empty caches and fresh TLS handshakes.
+
+On startup (WARMUP_ENABLED=1):
+- caches are restored from the snapshot written at the last shutdown
+- one keep-alive connection per upstream host is opened in the
+  shared HTTP client pool, through that upstream's rate limiter
+
+On shutdown, the same caches are snapshotted for the next process.
+"""
+
+import asyncio
+import logging
+import os
+from urllib.parse import urlsplit
+
+from cache import load_snapshot, save_snapshot
+from geocoding_client import NOMINATIM_GUARD, NOMINATIM_URL
+from http_client import HTTPX_TRANSIENT_ERRORS, get_http_client
+from upstream_guard import UpstreamUnavailable
+from weather_client import OPEN_METEO_GUARD, OPEN_METEO_URL
+
+
+logger = logging.getLogger(__name__)
+
+WARMUP_ENABLED = os.getenv("WARMUP_ENABLED", "0") == "1"
+
+# Pickle of cache entries; only ever load files this service wrote
+WARMUP_SNAPSHOT_PATH = os.getenv("WARMUP_SNAPSHOT_PATH", "cache_snapshot.pkl") or None
+
+# Geocodes already persist in SQLite; these are memory-only
+WARMUP_SNAPSHOT_CACHES = tuple(
+    name.strip()
+    for name in os.getenv("WARMUP_SNAPSHOT_CACHES", "forecast,tile,plan").split(",")
+    if name.strip()
+)
+
+# Upper bound on time spent opening connections before serving
+WARMUP_TIMEOUT = float(os.getenv("WARMUP_TIMEOUT", 2))
+
+
+def _origin(url: str) -> str:
+    parts = urlsplit(url)
+    return f"{parts.scheme}://{parts.netloc}/"
+
+
+async def open_upstream_connections() -> dict:
+    """
+    HEAD each upstream origin through the pooled client, leaving a
+    warm keep-alive connection behind. Failures are only reported.
+
+    Each HEAD counts against the upstream's guard like any other call
+    (Nominatim allows 1 request/s); it is skipped rather than queued
+    when no token is free or the circuit is open.
+
+    Returns:
+        {origin: status code, error name or "skipped: <reason>"}
+    """
+
+    client = get_http_client()
+    guards = {}
+    for url, guard in ((NOMINATIM_URL, NOMINATIM_GUARD), (OPEN_METEO_URL, OPEN_METEO_GUARD)):
+        guards.setdefault(_origin(url), guard)
+    origins = list(guards)
+
+    async def touch(origin: str):
+        guard = guards[origin]
+        try:
+            ticket = await guard.before_call_async(max_wait=0)
+        except UpstreamUnavailable as exc:
+            return f"skipped: {exc.reason}"
+
+        try:
+            response = await client.head(origin)
+        except Exception as exc:
+            guard.record_error(exc, HTTPX_TRANSIENT_ERRORS)
+            return type(exc).__name__
+        else:
+            # Any answer, even 405, means the upstream is reachable
+            guard.record_success()
+            return response.status_code
+        finally:
+            guard.release_probe(ticket)
+
+    try:
+        results = await asyncio.wait_for(
+            asyncio.gather(*(touch(origin) for origin in origins)),
+            WARMUP_TIMEOUT
+        )
+    except asyncio.TimeoutError:
+        return {origin: "timeout" for origin in origins}
+
+    return dict(zip(origins, results))
+
+
+async def warm_up() -> dict:
+    """
+    Run the startup warm-up; no-op unless WARMUP_ENABLED.
+    """
+
+    if not WARMUP_ENABLED:
+        return {}
+
+    report = {}
+
+    if WARMUP_SNAPSHOT_PATH:
+        try:
+            report["restored"] = load_snapshot(WARMUP_SNAPSHOT_PATH)
+        except Exception:
+            logger.exception("warm-up: could not load %s", WARMUP_SNAPSHOT_PATH)
+
+    report["connections"] = await open_upstream_connections()
+
+    logger.info("warm-up: %s", report)
+    return report
+
+
+def save_warm_state() -> dict:
+    """
+    Snapshot the warm caches for the next process; no-op unless WARMUP_ENABLED.
+    """
+
+    if not (WARMUP_ENABLED and WARMUP_SNAPSHOT_PATH):
+        return {}
+
+    try:
+        return save_snapshot(WARMUP_SNAPSHOT_PATH, WARMUP_SNAPSHOT_CACHES)
+    except Exception:
+        logger.exception("warm-up: could not write %s", WARMUP_SNAPSHOT_PATH)
+        return {}
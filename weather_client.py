@@ -1,10 +1,257 @@
 # weather_client.py
 
-import requests
+import os
+import time
+
+import httpx
 from typing import List, Dict
 
+from cache import MISSING, TTLCache
+from hourly_forecast import HourlyForecast
+from http_client import HTTPX_TRANSIENT_ERRORS, HTTP_TIMEOUT, get_http_client
+from metrics import upstream_call
+from singleflight import SingleFlight, ThreadSingleFlight
+from upstream_guard import UpstreamGuard, UpstreamUnavailable, worker_share
+
+
+# Overridable, e.g. to point at benchmarks/fake_upstream.py
+OPEN_METEO_URL = os.getenv("OPEN_METEO_URL", "https://api.open-meteo.com/v1/forecast")
+
+# Open-Meteo's finest model grid is ~0.1°; requests inside one cell
+# resolve to the same model data, so they can share one download.
+FORECAST_GRID_DEG = float(os.getenv("FORECAST_GRID_DEG", 0.1))
+
+# Upstream models publish new runs on a fixed cadence (seconds, UTC-aligned)
+FORECAST_UPDATE_INTERVAL = int(os.getenv("FORECAST_UPDATE_INTERVAL", 3600))
+
+FORECAST_DAYS = int(os.getenv("FORECAST_DAYS", 16))
+
+HOURLY_VARIABLES = [
+    "temperature_2m",
+    "relativehumidity_2m",
+    "windspeed_10m"
+]
+
+_forecast_cache = TTLCache(
+    name="forecast",
+    maxsize=int(os.getenv("FORECAST_CACHE_SIZE", 512)),
+    ttl=FORECAST_UPDATE_INTERVAL
+)
+
+# Per deployment, split across workers like NOMINATIM_RATE_LIMIT
+OPEN_METEO_GUARD = UpstreamGuard(
+    "open-meteo",
+    rate=worker_share(float(os.getenv("OPEN_METEO_RATE_LIMIT", 10))),
+    burst=int(os.getenv("OPEN_METEO_BURST", 10)),
+    max_wait=float(os.getenv("OPEN_METEO_MAX_WAIT", 5)),
+    failure_threshold=int(os.getenv("OPEN_METEO_FAILURE_THRESHOLD", 5)),
+    reset_timeout=float(os.getenv("OPEN_METEO_RESET_TIMEOUT", 30))
+)
+
+# Concurrent requests for the same grid cell share one download
+_forecast_flight = ThreadSingleFlight("forecast")
+_forecast_flight_async = SingleFlight("forecast_async")
+
+
+def snap_to_grid(latitude: float, longitude: float) -> tuple:
+    """
+    Snap coordinates to the centre of their forecast grid cell.
+    """
+    step = FORECAST_GRID_DEG
+    return (
+        round(round(latitude / step) * step, 4),
+        round(round(longitude / step) * step, 4)
+    )
+
+
+def seconds_until_next_model_run(now: float | None = None) -> float:
+    """
+    Seconds left until the next expected upstream model update.
+    """
+    now = time.time() if now is None else now
+    return FORECAST_UPDATE_INTERVAL - (now % FORECAST_UPDATE_INTERVAL)
+
+
+def model_run_started(now: float | None = None) -> float:
+    """
+    Unix time of the latest expected upstream model update, i.e. the
+    run a download made now reflects.
+    """
+    now = time.time() if now is None else now
+    return now - (now % FORECAST_UPDATE_INTERVAL)
+
+
+def _cell_key(latitude: float, longitude: float) -> str:
+    return f"{latitude:.4f},{longitude:.4f}"
+
+
+def _query_params(latitude: float, longitude: float) -> dict:
+    return {
+        "latitude": latitude,
+        "longitude": longitude,
+        "hourly": HOURLY_VARIABLES,
+        "forecast_days": FORECAST_DAYS,
+        "timezone": "auto"
+    }
+
+
+def _serve_stale(key: str, exc: UpstreamUnavailable) -> HourlyForecast:
+    """
+    Fall back to an expired forecast window, or re-raise the outage.
+    """
+    stale = _forecast_cache.get_stale(key)
+    if stale is not MISSING:
+        return stale
+    raise exc
+
+
+async def _serve_stale_async(key: str, exc: UpstreamUnavailable) -> HourlyForecast:
+    stale = await _forecast_cache.get_stale_async(key)
+    if stale is not MISSING:
+        return stale
+    raise exc
+
+
+def _parse_window(data: Dict) -> HourlyForecast:
+    return HourlyForecast.from_open_meteo(
+        data.get("hourly", {}),
+        generation=model_run_started()
+    )
+
+
+def _store_window(key: str, data: Dict) -> HourlyForecast:
+    forecast = _parse_window(data)
+    _forecast_cache.set(key, forecast, ttl=seconds_until_next_model_run())
+    return forecast
+
+
+async def _store_window_async(key: str, data: Dict) -> HourlyForecast:
+    forecast = _parse_window(data)
+    await _forecast_cache.set_async(key, forecast, ttl=seconds_until_next_model_run())
+    return forecast
+
 
-OPEN_METEO_URL = "https://api.open-meteo.com/v1/forecast"
+def fetch_forecast_window(latitude: float, longitude: float) -> HourlyForecast:
+    """
+    Fetch the full multi-day hourly forecast for the grid cell
+    containing the given coordinates.
+
+    Cached per grid cell until the next model run. While Open-Meteo
+    is unavailable, the last downloaded window is served.
+
+    Returns:
+        HourlyForecast covering the whole forecast window
+
+    Raises:
+        UpstreamUnavailable if Open-Meteo cannot answer and nothing is cached
+    """
+
+    latitude, longitude = snap_to_grid(latitude, longitude)
+    key = _cell_key(latitude, longitude)
+
+    cached = _forecast_cache.get(key)
+    if cached is not MISSING:
+        return cached
+
+    return _forecast_flight.do(
+        key,
+        lambda: _download_window(latitude, longitude, key)
+    )
+
+
+def _download_window(latitude: float, longitude: float, key: str) -> HourlyForecast:
+    # Sync client is only used by scripts; keep requests out of app startup
+    import requests
+
+    try:
+        ticket = OPEN_METEO_GUARD.before_call()
+    except UpstreamUnavailable as exc:
+        return _serve_stale(key, exc)
+
+    try:
+        with upstream_call("open-meteo"):
+            response = requests.get(
+                OPEN_METEO_URL,
+                params=_query_params(latitude, longitude),
+                timeout=HTTP_TIMEOUT
+            )
+            response.raise_for_status()
+            data = response.json()
+    except (requests.RequestException, ValueError) as exc:
+        OPEN_METEO_GUARD.record_error(exc, (requests.Timeout, requests.ConnectionError))
+        return _serve_stale(
+            key,
+            UpstreamUnavailable("open-meteo", type(exc).__name__)
+        )
+    else:
+        OPEN_METEO_GUARD.record_success()
+    finally:
+        # A probe that raised something unexpected must not leave
+        # the breaker stuck half-open
+        OPEN_METEO_GUARD.release_probe(ticket)
+
+    return _store_window(key, data)
+
+
+async def fetch_forecast_window_async(
+    latitude: float,
+    longitude: float,
+    max_wait: float | None = None
+) -> HourlyForecast:
+    """
+    Async variant of fetch_forecast_window using the shared pooled client;
+    cache backend I/O runs off the event loop.
+
+    max_wait: how long to queue for a rate-limit token (default
+    OPEN_METEO_MAX_WAIT; WAIT_FOR_TOKEN for batch and background work)
+    """
+
+    latitude, longitude = snap_to_grid(latitude, longitude)
+    key = _cell_key(latitude, longitude)
+
+    cached = await _forecast_cache.get_async(key)
+    if cached is not MISSING:
+        return cached
+
+    return await _forecast_flight_async.do(
+        key,
+        lambda: _download_window_async(latitude, longitude, key, max_wait)
+    )
+
+
+async def _download_window_async(
+    latitude: float,
+    longitude: float,
+    key: str,
+    max_wait: float | None
+) -> HourlyForecast:
+    try:
+        ticket = await OPEN_METEO_GUARD.before_call_async(max_wait)
+    except UpstreamUnavailable as exc:
+        return await _serve_stale_async(key, exc)
+
+    try:
+        with upstream_call("open-meteo"):
+            response = await get_http_client().get(
+                OPEN_METEO_URL,
+                params=_query_params(latitude, longitude)
+            )
+            response.raise_for_status()
+            data = response.json()
+    except (httpx.HTTPError, ValueError) as exc:
+        OPEN_METEO_GUARD.record_error(exc, HTTPX_TRANSIENT_ERRORS)
+        return await _serve_stale_async(
+            key,
+            UpstreamUnavailable("open-meteo", type(exc).__name__)
+        )
+    else:
+        OPEN_METEO_GUARD.record_success()
+    finally:
+        # A probe that raised something unexpected must not leave
+        # the breaker stuck half-open
+        OPEN_METEO_GUARD.release_probe(ticket)
+
+    return await _store_window_async(key, data)
 
 
 def fetch_hourly_forecast(
@@ -17,40 +264,25 @@ def fetch_hourly_forecast(
     Returns normalized data for heatwave risk analysis.
     """
 
-    params = {
-        "latitude": latitude,
-        "longitude": longitude,
-        "hourly": [
-            "temperature_2m",
-            "relativehumidity_2m",
-            "windspeed_10m"
-        ],
-        "timezone": "auto"
-    }
+    window = fetch_forecast_window(latitude, longitude)
+    return window.for_date(date).to_dicts()
 
-    response = requests.get(OPEN_METEO_URL, params=params, timeout=10)
-    response.raise_for_status()
 
-    data = response.json()
-    hourly = data.get("hourly", {})
-
-    times = hourly.get("time", [])
-    temperatures = hourly.get("temperature_2m", [])
-    humidity = hourly.get("relativehumidity_2m", [])
-    windspeed = hourly.get("windspeed_10m", [])
-
-    normalized = []
+async def fetch_hourly_forecast_async(
+    latitude: float,
+    longitude: float,
+    date: str
+) -> List[Dict]:
+    """
+    Async variant of fetch_hourly_forecast.
+    """
 
-    for i in range(len(times)):
-        # Filter only requested date
-        if not times[i].startswith(date):
-            continue
+    window = await fetch_forecast_window_async(latitude, longitude)
+    return window.for_date(date).to_dicts()
 
-        normalized.append({
-            "time": times[i],
-            "temperature": temperatures[i],
-            "humidity": humidity[i],
-            "wind_speed": windspeed[i]
-        })
 
-    return normalized
+def forecast_cache_stats() -> dict:
+    """
+    Hit/miss counters for the forecast cache.
+    """
+    return _forecast_cache.stats()